@@ -199,6 +199,10 @@ export default function EvaluationResults({ loading, errorMsg, result }) {
                   <Metric label="Average DOM Extraction Time Per Task (ms)" value={metrics.performance.task_ms_dom_extract_avg} />
                   <Metric label="Average DOM Matching Time Per Task (ms)" value={metrics.performance.task_ms_dom_match_avg} />
                   <Metric label="Average LLM Time Per Task (ms)" value={metrics.performance.task_ms_llm_total_avg} />
+                  <Metric label="Model Loading Share of LLM Time" value={metrics.performance.llm_load_share} />
+                  <Metric label="Longest Model Load (ms)" value={metrics.performance.task_ms_llm_load_max} />
+                  <Metric label="Prompt Evaluation (tokens/s)" value={metrics.performance.prompt_eval_tokens_per_s} />
+                  <Metric label="Generation (tokens/s)" value={metrics.performance.eval_tokens_per_s} />
                 </div>
 
                 <div className="mt-3 text-xs text-xtractyl-outline/80">
@@ -27,6 +27,11 @@ export default function StartPrelabellingCard() {
       system_prompt: config.systemPrompt,
       token,
       questions_and_labels: config.questionsAndLabels,
+      extraction_mode: config.extractionMode,
+      context_mode: config.contextMode,
+      retrieval_top_k: Number(config.retrievalTopK) || 8,
+      use_llm_cache: config.useLlmCache,
+      priority: config.priority,
     });
   };
 
@@ -74,9 +79,70 @@ export default function StartPrelabellingCard() {
         <ModelPicker selectedModel={config.model} onChange={config.setModel} refreshKey={refreshKey} />
         <SystemPromptInput value={config.systemPrompt} onChange={config.setSystemPrompt} />
 
+        <div>
+          <label className="block text-sm font-medium mb-1">Extraction mode</label>
+          <select
+            value={config.extractionMode}
+            onChange={(e) => config.setExtractionMode(e.target.value)}
+            className="w-full border rounded px-3 py-2"
+          >
+            <option value="per_question">One LLM call per question</option>
+            <option value="multi_question">All questions in one LLM call (JSON answer)</option>
+          </select>
+        </div>
+
+        <div>
+          <label className="block text-sm font-medium mb-1">Document context</label>
+          <select
+            value={config.contextMode}
+            onChange={(e) => config.setContextMode(e.target.value)}
+            className="w-full border rounded px-3 py-2"
+          >
+            <option value="full">Whole document in every LLM call</option>
+            <option value="chunked">Long documents in chunks (stops at the first grounded answer)</option>
+            <option value="retrieval">Only the passages matching each question (BM25)</option>
+          </select>
+        </div>
+
+        {config.contextMode === "retrieval" && (
+          <div>
+            <label className="block text-sm font-medium mb-1">Passages per question</label>
+            <input
+              type="number"
+              min={1}
+              value={config.retrievalTopK}
+              onChange={(e) => config.setRetrievalTopK(e.target.value)}
+              className="w-full border rounded px-3 py-2"
+            />
+          </div>
+        )}
+
+        <div>
+          <label className="block text-sm font-medium mb-1">Priority</label>
+          <select
+            value={config.priority}
+            onChange={(e) => config.setPriority(e.target.value)}
+            className="w-full border rounded px-3 py-2"
+          >
+            <option value="bulk">Bulk (takes turns with other jobs)</option>
+            <option value="interactive">Interactive, e.g. a small evaluation run (starts first)</option>
+          </select>
+        </div>
+
+        <label className="flex items-center gap-2 text-sm">
+          <input
+            type="checkbox"
+            checked={config.useLlmCache}
+            onChange={(e) => config.setUseLlmCache(e.target.checked)}
+          />
+          Reuse cached answers of this model for unchanged prompts
+        </label>
+
         <div className="pt-2 text-sm text-xtractyl-outline/70">
           <div>Project: <span className="font-mono">{projectName || "—"}</span></div>
           <div>Model: <span className="font-mono">{config.model || "—"}</span></div>
+          <div>Mode: <span className="font-mono">{config.extractionMode}</span></div>
+          <div>Context: <span className="font-mono">{config.contextMode}</span></div>
         </div>
 
         <div className="flex gap-3 pt-2">
@@ -100,6 +166,13 @@ export default function StartPrelabellingCard() {
               <div className="h-2 bg-xtractyl-green rounded"
                 style={{ width: `${Number.isFinite(job.progressPct) ? job.progressPct : 0}%` }} />
             </div>
+            {job.preStatus?.queue_position != null && (
+              <div className="text-sm mt-2">
+                {job.preStatus.queue_position} job(s) ahead
+                {job.preStatus.estimated_start_at &&
+                  ` — starts by ${new Date(Number(job.preStatus.estimated_start_at) * 1000).toLocaleTimeString()}`}
+              </div>
+            )}
             {job.preStatus?.message && <div className="text-sm mt-2">{job.preStatus.message}</div>}
             {job.preJobId && (
               <div className="text-xs text-xtractyl-outline/70 mt-1">
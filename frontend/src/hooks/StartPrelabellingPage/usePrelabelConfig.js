@@ -9,6 +9,11 @@ export function usePrelabelConfig() {
   const { projectName } = useAppContext();
   const [model, setModel] = useLocalStorage("ollamaModel", "");
   const [systemPrompt, setSystemPrompt] = useLocalStorage("xtractylSystemPrompt", "");
+  const [extractionMode, setExtractionMode] = useLocalStorage("xtractylExtractionMode", "per_question");
+  const [contextMode, setContextMode] = useLocalStorage("xtractylContextMode", "full");
+  const [retrievalTopK, setRetrievalTopK] = useLocalStorage("xtractylRetrievalTopK", "8");
+  const [priority, setPriority] = useLocalStorage("xtractylPriority", "bulk");
+  const [useLlmCache, setUseLlmCache] = useState(true);
   const [questionsAndLabels, setQuestionsAndLabels] = useState({});
   const [qalError, setQalError] = useState("");
 
@@ -28,6 +33,11 @@ export function usePrelabelConfig() {
   return {
     model, setModel,
     systemPrompt, setSystemPrompt,
+    extractionMode, setExtractionMode,
+    contextMode, setContextMode,
+    retrievalTopK, setRetrievalTopK,
+    priority, setPriority,
+    useLlmCache, setUseLlmCache,
     questionsAndLabels,
     qalError,
   };
@@ -1,8 +1,10 @@
 # ml_backend/api/contracts/predict.py
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Literal, Optional, Union
 
 from pydantic import BaseModel, Field
 
+from api.contracts.errors import ErrorResponse
+
 
 class LLMConfig(BaseModel):
     ollama_model: str
@@ -10,6 +12,21 @@ class LLMConfig(BaseModel):
     system_prompt: str
     llm_timeout_seconds: int
     num_ctx: int = 4096
+    max_concurrency: int = Field(default=1, ge=1)  # parallel questions per task
+    # multi_question: all questions in one call, answered as a JSON object keyed by label
+    extraction_mode: Literal["per_question", "multi_question"] = "per_question"
+    # None -> LLM_PROMPT_LAYOUT
+    prompt_layout: Optional[Literal["document_first", "question_first"]] = None
+    model_digest: Optional[str] = None  # None -> answers are not cached
+    use_llm_cache: bool = True  # False: ask the model again and refresh the cached answers
+    # chunked: split the text to fit num_ctx, ask each question per chunk
+    # retrieval: send only the blocks ranked best for the question (BM25)
+    context_mode: Literal["full", "chunked", "retrieval"] = "full"
+    chunk_tokens: int = Field(default=3072, ge=1)  # document tokens per call (chunked, retrieval)
+    retrieval_top_k: int = Field(default=8, ge=1)
+    # how long Ollama keeps the model loaded after each call ("30m", seconds, -1: forever);
+    # None -> Ollama's default (OLLAMA_KEEP_ALIVE, 5 minutes)
+    keep_alive: Optional[Union[int, str]] = None
 
 
 class LabelStudioConfig(BaseModel):
@@ -30,10 +47,76 @@ class PredictRequest(BaseModel):
     questions_and_labels: QuestionsAndLabels
     llm_config: LLMConfig
     label_studio_config: LabelStudioConfig
+    dom_engine: Optional[Literal["chromium", "lxml"]] = None  # None -> DOM_EXTRACT_ENGINE
 
 
 class PredictResponse(BaseModel):
     model_version: str
     score: float
     result: List[Dict[str, Any]]
+    prediction_id: Optional[int] = None  # Label Studio id of the saved prediction
     meta: Dict[str, Any]
+
+
+class PredictBatchTask(BaseModel):
+    task_id: str
+    filename: str = Field(default="")
+    html: str = Field(..., min_length=1)
+
+
+class PredictBatchTasksRequest(BaseModel):
+    tasks: List[PredictBatchTask] = Field(..., min_length=1)
+
+
+class PredictBatchRequest(PredictBatchTasksRequest):
+    """Tasks of one job; questions and configs are shared and sent once."""
+
+    job_id: str
+    questions_and_labels: QuestionsAndLabels
+    llm_config: LLMConfig
+    label_studio_config: LabelStudioConfig
+    dom_engine: Optional[Literal["chromium", "lxml"]] = None
+
+
+class PredictBatchResultsRequest(BaseModel):
+    after: int = Field(default=0, ge=0)  # cursor of the last read
+    wait: float = Field(default=0.0, ge=0.0, le=30.0)  # seconds to wait for a new result
+
+
+class PredictBatchSubmittedResponse(BaseModel):
+    batch_id: str
+    job_id: str
+    submitted: int  # tasks in the batch so far
+    pending: int
+
+
+class PredictBatchTaskResult(BaseModel):
+    task_id: str
+    status_code: int  # what /predict would have answered for this task
+    response: Optional[PredictResponse] = None
+    error: Optional[ErrorResponse] = None
+
+
+class PredictBatchClosedResponse(PredictBatchSubmittedResponse):
+    cancelled: int  # queued tasks that will not run
+
+
+class PredictBatchResultsResponse(BaseModel):
+    batch_id: str
+    job_id: str
+    submitted: int
+    pending: int
+    # results in completion order from ?after=<cursor>; pass cursor as after next time
+    # (results before the ?after of a read are dropped and cannot be read again)
+    cursor: int
+    results: List[PredictBatchTaskResult]
+
+
+class CancelJobResponse(BaseModel):
+    job_id: str
+    aborted: int  # LLM calls of the job that were waiting for Ollama
+
+
+class ClearCancelResponse(BaseModel):
+    job_id: str
+    cleared: bool  # the job was cancelled and runs again
@@ -3,6 +3,7 @@ from domain.errors import (
     DomainError,
     ExternalServiceError,
     InternalError,
+    InvalidState,
     NotFound,
     ValidationFailed,
 )
@@ -14,6 +15,8 @@ def map_domain_error(err: DomainError) -> tuple[int, str]:
             return 422, err.code
         case NotFound():
             return 404, err.code
+        case InvalidState():
+            return 409, err.code
         case ExternalServiceError():
             return 502, err.code
         case InternalError():
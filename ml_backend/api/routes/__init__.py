@@ -2,9 +2,10 @@
 from flask import Flask
 from flask_pydantic_spec import FlaskPydanticSpec
 
-from api.routes import health, predict
+from api.routes import health, predict, predict_batch
 
 
 def register_routes(app: Flask, spec: FlaskPydanticSpec) -> None:
     health.register(app, spec)
     predict.register(app, spec)
+    predict_batch.register(app, spec)
@@ -1,4 +1,5 @@
 # ml_backend/api/routes/predict.py
+from domain.cancellation import get_cancel_registry
 from domain.errors import InternalError, ValidationFailed
 from domain.models.predict import PredictCommand
 from domain.predict import run_predict
@@ -7,7 +8,12 @@ from flask_pydantic_spec import FlaskPydanticSpec, Request, Response
 from pydantic import ValidationError
 
 from api.contracts.errors import ErrorResponse
-from api.contracts.predict import PredictRequest, PredictResponse
+from api.contracts.predict import (
+    CancelJobResponse,
+    ClearCancelResponse,
+    PredictRequest,
+    PredictResponse,
+)
 
 
 def register(app: Flask, spec: FlaskPydanticSpec) -> None:
@@ -16,6 +22,7 @@ def register(app: Flask, spec: FlaskPydanticSpec) -> None:
         body=Request(PredictRequest),
         resp=Response(
             HTTP_200=PredictResponse,
+            HTTP_409=ErrorResponse,  # job cancelled
             HTTP_422=ErrorResponse,  # contract violation
             HTTP_502=ErrorResponse,  # label studio unreachable
             HTTP_500=ErrorResponse,  # unexpected
@@ -45,3 +52,29 @@ def register(app: Flask, spec: FlaskPydanticSpec) -> None:
             )
 
         return jsonify(validated.model_dump()), 200
+
+    @app.route("/cancel/<job_id>", methods=["POST"])
+    @spec.validate(
+        resp=Response(
+            HTTP_200=CancelJobResponse,
+            HTTP_500=ErrorResponse,
+        ),
+        tags=["predict"],
+    )
+    def cancel_job(job_id: str):
+        # the job's tasks still queued or started later answer 409 JOB_CANCELLED
+        aborted = get_cancel_registry().cancel(job_id)
+        return jsonify(CancelJobResponse(job_id=job_id, aborted=aborted).model_dump()), 200
+
+    @app.route("/cancel/<job_id>", methods=["DELETE"])
+    @spec.validate(
+        resp=Response(
+            HTTP_200=ClearCancelResponse,
+            HTTP_500=ErrorResponse,
+        ),
+        tags=["predict"],
+    )
+    def clear_cancel(job_id: str):
+        # called when the job is resumed; its earlier tokens were all aborted
+        cleared = get_cancel_registry().clear(job_id)
+        return jsonify(ClearCancelResponse(job_id=job_id, cleared=cleared).model_dump()), 200
@@ -0,0 +1,138 @@
+# ml_backend/api/routes/predict_batch.py
+from domain.errors import DomainError, InternalError, ValidationFailed
+from domain.models.predict import BatchTask, PredictBatchCommand
+from domain.predict_batch import TaskOutcome, get_predict_batch_scheduler
+from flask import Flask, jsonify, request
+from flask_pydantic_spec import FlaskPydanticSpec, Request, Response
+from pydantic import BaseModel, ValidationError
+
+from api.contracts.errors import ErrorResponse
+from api.contracts.predict import (
+    PredictBatchClosedResponse,
+    PredictBatchRequest,
+    PredictBatchResultsRequest,
+    PredictBatchResultsResponse,
+    PredictBatchSubmittedResponse,
+    PredictBatchTasksRequest,
+    PredictResponse,
+)
+from api.error_mapping import map_domain_error
+
+
+def _parse(model: type[BaseModel], data: dict, message: str):
+    try:
+        return model.model_validate(data)
+    except ValidationError as e:
+        raise ValidationFailed(code="INVALID_REQUEST", message=message, details=e.errors())
+
+
+def _validated(model: type[BaseModel], result: dict) -> dict:
+    try:
+        return model.model_validate(result).model_dump()
+    except ValidationError as e:
+        raise InternalError(
+            code="RESPONSE_CONTRACT_VIOLATED",
+            message="Internal response did not match expected schema.",
+            meta={"details": e.errors()},
+        )
+
+
+def _task_result(outcome: TaskOutcome) -> dict:
+    """The outcome as /predict would have answered it: response, or status and error."""
+    err = outcome.error
+    if err is None:
+        try:
+            response = PredictResponse.model_validate(outcome.response)
+            return {"task_id": outcome.task_id, "status_code": 200, "response": response}
+        except ValidationError:
+            err = InternalError(
+                code="RESPONSE_CONTRACT_VIOLATED",
+                message="Internal response did not match expected schema.",
+            )
+    if isinstance(err, DomainError):
+        status, code = map_domain_error(err)
+        error = ErrorResponse(error=code, message=err.message)
+    else:
+        status = 500
+        error = ErrorResponse(error="INTERNAL_ERROR", message="Unexpected server error.")
+    return {"task_id": outcome.task_id, "status_code": int(status), "error": error}
+
+
+def register(app: Flask, spec: FlaskPydanticSpec) -> None:
+    @app.route("/predict_batch", methods=["POST"])
+    @spec.validate(
+        body=Request(PredictBatchRequest),
+        resp=Response(
+            HTTP_202=PredictBatchSubmittedResponse,
+            HTTP_422=ErrorResponse,  # contract violation
+            HTTP_500=ErrorResponse,  # unexpected
+        ),
+        tags=["predict"],
+    )
+    def create_predict_batch():
+        contract = _parse(
+            PredictBatchRequest,
+            request.get_json(silent=True) or {},
+            "Request did not match expected schema.",
+        )
+        summary = get_predict_batch_scheduler().create(
+            PredictBatchCommand.from_contract(contract),
+            [BatchTask.from_contract(t) for t in contract.tasks],
+        )
+        return jsonify(_validated(PredictBatchSubmittedResponse, summary)), 202
+
+    @app.route("/predict_batch/<batch_id>/tasks", methods=["POST"])
+    @spec.validate(
+        body=Request(PredictBatchTasksRequest),
+        resp=Response(
+            HTTP_202=PredictBatchSubmittedResponse,
+            HTTP_404=ErrorResponse,  # unknown or expired batch
+            HTTP_422=ErrorResponse,
+            HTTP_500=ErrorResponse,
+        ),
+        tags=["predict"],
+    )
+    def add_predict_batch_tasks(batch_id: str):
+        contract = _parse(
+            PredictBatchTasksRequest,
+            request.get_json(silent=True) or {},
+            "Request did not match expected schema.",
+        )
+        summary = get_predict_batch_scheduler().submit(
+            batch_id, [BatchTask.from_contract(t) for t in contract.tasks]
+        )
+        return jsonify(_validated(PredictBatchSubmittedResponse, summary)), 202
+
+    @app.route("/predict_batch/<batch_id>", methods=["GET"])
+    @spec.validate(
+        query=PredictBatchResultsRequest,
+        resp=Response(
+            HTTP_200=PredictBatchResultsResponse,
+            HTTP_404=ErrorResponse,
+            HTTP_422=ErrorResponse,
+            HTTP_500=ErrorResponse,
+        ),
+        tags=["predict"],
+    )
+    def get_predict_batch_results(batch_id: str):
+        contract = _parse(
+            PredictBatchResultsRequest, dict(request.args or {}), "Invalid query parameters."
+        )
+        out = get_predict_batch_scheduler().results(
+            batch_id, after=contract.after, wait=contract.wait
+        )
+        out["results"] = [_task_result(o) for o in out.pop("outcomes")]
+        return jsonify(_validated(PredictBatchResultsResponse, out)), 200
+
+    @app.route("/predict_batch/<batch_id>", methods=["DELETE"])
+    @spec.validate(
+        resp=Response(
+            HTTP_200=PredictBatchClosedResponse,
+            HTTP_404=ErrorResponse,
+            HTTP_500=ErrorResponse,
+        ),
+        tags=["predict"],
+    )
+    def close_predict_batch(batch_id: str):
+        summary = get_predict_batch_scheduler().close(batch_id)
+        return jsonify(_validated(PredictBatchClosedResponse, summary)), 200
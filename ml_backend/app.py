@@ -3,6 +3,8 @@ import os
 
 from api.error_handler import register_error_handlers
 from api.routes import register_routes
+from domain.utils.browser_pool import get_browser_pool
+from domain.utils.dom_extract import DOM_EXTRACT_ENGINE
 from flask import Flask
 from flask_pydantic_spec import FlaskPydanticSpec
 from utils.logging_utils import dev_logger, safe_logger
@@ -13,6 +15,7 @@ if dev_logger:
 
 
 APP_PORT = int(os.getenv("ML_BACKEND_PORT", "6789"))
+DOM_BROWSER_POOL_PREWARM = os.getenv("DOM_BROWSER_POOL_PREWARM", "1") == "1"
 
 
 def create_app() -> Flask:
@@ -31,4 +34,13 @@ def create_app() -> Flask:
 app = create_app()
 
 if __name__ == "__main__":
+    # requests can still pick chromium per call, the pool then starts lazily
+    if DOM_BROWSER_POOL_PREWARM and DOM_EXTRACT_ENGINE == "chromium":
+        try:
+            pool = get_browser_pool()
+            pool.warm()
+            safe_logger.info("browser_pool_warm | launched=%s", pool.stats()["launched"])
+        except Exception:
+            # extraction falls back to lazy launches on first use
+            safe_logger.error("browser_pool_warm_failed")
     app.run(host="0.0.0.0", port=APP_PORT)
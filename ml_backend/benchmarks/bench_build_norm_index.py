@@ -0,0 +1,74 @@
+# ml_backend/benchmarks/bench_build_norm_index.py
+"""
+Micro-benchmark: build_norm_index vs. the former per-character loop.
+
+Run from ml_backend/:
+    python -m benchmarks.bench_build_norm_index [--pages 200] [--repeat 5]
+
+The input is the body text of the Docling-style fixture documents, repeated
+to roughly the requested number of pages (~3,000 characters per page).
+"""
+
+import argparse
+import timeit
+from pathlib import Path
+
+from domain.utils.dom_extract import extract_dom_with_lxml
+from domain.utils.normalization import build_norm_index, norm_char
+
+FIXTURES_DIR = Path(__file__).resolve().parents[1] / "tests" / "fixtures" / "dom"
+CHARS_PER_PAGE = 3000
+
+
+def build_norm_index_per_char(original_text: str):
+    """The implementation build_norm_index replaced."""
+    norm_parts = []
+    index_map = []
+
+    for i, ch in enumerate(original_text):
+        n = norm_char(ch)
+        if not n:
+            continue
+
+        norm_parts.append(n)
+        for _ in range(len(n)):
+            index_map.append(i)
+
+    return "".join(norm_parts), index_map
+
+
+def load_text(pages: int) -> str:
+    sample = "".join(
+        extract_dom_with_lxml(p.read_text(encoding="utf-8")).raw_text
+        for p in sorted(FIXTURES_DIR.glob("*.html"))
+    )
+    target = pages * CHARS_PER_PAGE
+    return (sample * (target // len(sample) + 1))[:target]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = load_text(args.pages)
+    new_text, new_map = build_norm_index(text)
+    old_text, old_map = build_norm_index_per_char(text)
+    assert new_text == old_text and list(new_map) == old_map
+
+    results = {}
+    for name, fn in (
+        ("per_char", build_norm_index_per_char),
+        ("build_norm_index", build_norm_index),
+    ):
+        results[name] = min(timeit.repeat(lambda fn=fn: fn(text), number=1, repeat=args.repeat))
+
+    print(f"input: {len(text):,} characters (~{args.pages} pages)")
+    for name, seconds in results.items():
+        print(f"{name:>18}: {seconds * 1000:9.1f} ms")
+    print(f"{'speedup':>18}: {results['per_char'] / results['build_norm_index']:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
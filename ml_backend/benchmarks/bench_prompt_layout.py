@@ -0,0 +1,84 @@
+# ml_backend/benchmarks/bench_prompt_layout.py
+"""
+Prompt-eval time per question: question_first vs. document_first layout.
+
+Needs a running Ollama with the model pulled. Run from ml_backend/:
+    python -m benchmarks.bench_prompt_layout --model llama3.1:8b \
+        [--ollama http://localhost:11434] [--questions 5]
+
+Each layout asks the same questions about every fixture document in turn,
+the way run_predict does for a task. With document_first only the first
+question of a document should pay for evaluating the document.
+"""
+
+import argparse
+import statistics
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from domain.utils.prompt_layout import PROMPT_LAYOUTS, build_llm_input
+from infrastructure.ollama import ask_llm_with_timeout
+
+FIXTURES_DIR = Path(__file__).resolve().parents[1] / "tests" / "fixtures" / "dom"
+SYSTEM_PROMPT = (
+    "Answer with the exact passage from the text. "
+    "If there is NO matching passage: respond with <<<NO_MATCH>>>."
+)
+QUESTIONS = [
+    "What is the main diagnosis?",
+    "How old is the patient?",
+    "Which medication was given?",
+    "When was the patient discharged?",
+    "What is the patient's sex?",
+    "Which procedure was performed?",
+    "What allergies are documented?",
+    "Who is the treating physician?",
+]
+
+
+def run_layout(layout: str, args, documents: list[str]) -> list[list[float]]:
+    """prompt_eval_ms per question, per document."""
+    per_document = []
+    for text in documents:
+        timings = []
+        for q in QUESTIONS[: args.questions]:
+            result = ask_llm_with_timeout(
+                ollama_base=args.ollama,
+                timeout=args.timeout,
+                model_name=args.model,
+                **build_llm_input(layout, SYSTEM_PROMPT, text, f"Question: {q}"),
+            )
+            if result["status"] != "ok":
+                raise SystemExit(f"{layout}: {result['status']} ({result['error']})")
+            timings.append(result["timings"]["prompt_eval_ms"])
+        per_document.append(timings)
+    return per_document
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--ollama", default="http://localhost:11434")
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--timeout", type=int, default=600)
+    args = parser.parse_args()
+
+    documents = [
+        BeautifulSoup(p.read_text(encoding="utf-8"), "html.parser").get_text("\n", strip=True)
+        for p in sorted(FIXTURES_DIR.glob("*.html"))
+    ]
+
+    for layout in PROMPT_LAYOUTS:
+        per_document = run_layout(layout, args, documents)
+        first = [t[0] for t in per_document]
+        rest = [ms for t in per_document for ms in t[1:]]
+        total = sum(first) + sum(rest)
+        print(f"{layout}:")
+        print(f"  first question  median {statistics.median(first):9.1f} ms prompt eval")
+        if rest:
+            print(f"  later questions median {statistics.median(rest):9.1f} ms prompt eval")
+        print(f"  total           {total:9.1f} ms over {len(documents)} documents")
+
+
+if __name__ == "__main__":
+    main()
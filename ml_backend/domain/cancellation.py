@@ -0,0 +1,63 @@
+# ml_backend/domain/cancellation.py
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Optional
+
+from infrastructure.ollama import CancelToken
+
+# a job's token is dropped after this long without a task of the job starting
+# (and none of its calls in flight); a cancelled job keeps refusing tasks until then
+CANCEL_TOKEN_TTL_SECONDS = int(os.getenv("CANCEL_TOKEN_TTL_SECONDS", "3600"))
+
+
+class CancelRegistry:
+    """
+    One CancelToken per job_id, shared by all tasks of the job in /predict and
+    /predict_batch. Cancelling a job aborts its LLM calls in flight, and tasks of
+    the job that start afterwards are refused.
+    """
+
+    def __init__(self, ttl_seconds: float = CANCEL_TOKEN_TTL_SECONDS) -> None:
+        self._ttl = ttl_seconds
+        self._tokens: dict[str, CancelToken] = {}
+        self._lock = threading.Lock()
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self._ttl
+        for job_id, token in list(self._tokens.items()):
+            if token.touched_at <= cutoff and token.in_flight == 0:
+                del self._tokens[job_id]
+
+    def token(self, job_id: str) -> CancelToken:
+        with self._lock:
+            self._expire()
+            token = self._tokens.get(job_id)
+            if token is None:
+                token = self._tokens[job_id] = CancelToken()
+            token.touched_at = time.monotonic()
+            return token
+
+    def cancel(self, job_id: str) -> int:
+        """Cancels the job, also before its first task arrived; returns the calls aborted."""
+        return self.token(job_id).cancel()
+
+    def clear(self, job_id: str) -> bool:
+        """Forgets a cancel so a resumed job runs again; False if nothing was recorded."""
+        with self._lock:
+            token = self._tokens.pop(job_id, None)
+        return token is not None and token.cancelled
+
+
+_registry: Optional[CancelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_cancel_registry() -> CancelRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = CancelRegistry()
+        return _registry
@@ -15,6 +15,11 @@ class NotFound(DomainError):
     pass
 
 
+@dataclass
+class InvalidState(DomainError):
+    pass
+
+
 @dataclass
 class ValidationFailed(DomainError):
     details: Optional[list] = None
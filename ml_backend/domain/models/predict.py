@@ -2,8 +2,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Optional, Union
 
-from api.contracts.predict import PredictRequest
+from api.contracts.predict import PredictBatchRequest, PredictBatchTask, PredictRequest
 
 
 @dataclass
@@ -13,6 +14,15 @@ class LLMConfig:
     system_prompt: str
     llm_timeout_seconds: int
     num_ctx: int = 4096
+    max_concurrency: int = 1
+    extraction_mode: str = "per_question"
+    prompt_layout: Optional[str] = None
+    model_digest: Optional[str] = None
+    use_llm_cache: bool = True
+    context_mode: str = "full"
+    chunk_tokens: int = 3072
+    retrieval_top_k: int = 8
+    keep_alive: Optional[Union[int, str]] = None
 
 
 @dataclass
@@ -36,6 +46,7 @@ class PredictCommand:
     questions_and_labels: QuestionsAndLabels
     llm_config: LLMConfig
     label_studio_config: LabelStudioConfig
+    dom_engine: Optional[str] = None
 
     @classmethod
     def from_contract(cls, contract: PredictRequest) -> PredictCommand:
@@ -44,19 +55,74 @@ class PredictCommand:
             task_id=contract.task_id,
             filename=contract.filename,
             html=contract.html,
-            questions_and_labels=QuestionsAndLabels(
-                questions=contract.questions_and_labels.questions,
-                labels=contract.questions_and_labels.labels,
-            ),
-            llm_config=LLMConfig(
-                ollama_model=contract.llm_config.ollama_model,
-                ollama_base=contract.llm_config.ollama_base,
-                system_prompt=contract.llm_config.system_prompt,
-                llm_timeout_seconds=contract.llm_config.llm_timeout_seconds,
-                num_ctx=contract.llm_config.num_ctx,
-            ),
-            label_studio_config=LabelStudioConfig(
-                label_studio_url=contract.label_studio_config.label_studio_url,
-                ls_token=contract.label_studio_config.ls_token,
-            ),
+            **_shared_settings(contract),
         )
+
+
+def _shared_settings(contract: PredictRequest | PredictBatchRequest) -> dict:
+    """Everything but the task: identical for all tasks of a batch."""
+    return {
+        "questions_and_labels": QuestionsAndLabels(
+            questions=contract.questions_and_labels.questions,
+            labels=contract.questions_and_labels.labels,
+        ),
+        "llm_config": LLMConfig(
+            ollama_model=contract.llm_config.ollama_model,
+            ollama_base=contract.llm_config.ollama_base,
+            system_prompt=contract.llm_config.system_prompt,
+            llm_timeout_seconds=contract.llm_config.llm_timeout_seconds,
+            num_ctx=contract.llm_config.num_ctx,
+            max_concurrency=contract.llm_config.max_concurrency,
+            extraction_mode=contract.llm_config.extraction_mode,
+            prompt_layout=contract.llm_config.prompt_layout,
+            model_digest=contract.llm_config.model_digest,
+            use_llm_cache=contract.llm_config.use_llm_cache,
+            context_mode=contract.llm_config.context_mode,
+            chunk_tokens=contract.llm_config.chunk_tokens,
+            retrieval_top_k=contract.llm_config.retrieval_top_k,
+            keep_alive=contract.llm_config.keep_alive,
+        ),
+        "label_studio_config": LabelStudioConfig(
+            label_studio_url=contract.label_studio_config.label_studio_url,
+            ls_token=contract.label_studio_config.ls_token,
+        ),
+        "dom_engine": contract.dom_engine,
+    }
+
+
+@dataclass
+class BatchTask:
+    task_id: str
+    filename: str
+    html: str
+
+    @classmethod
+    def from_contract(cls, contract: PredictBatchTask) -> BatchTask:
+        return cls(task_id=contract.task_id, filename=contract.filename, html=contract.html)
+
+
+@dataclass
+class PredictBatchCommand:
+    """Settings shared by all tasks of a batch; tasks can be added while it runs."""
+
+    job_id: str
+    questions_and_labels: QuestionsAndLabels
+    llm_config: LLMConfig
+    label_studio_config: LabelStudioConfig
+    dom_engine: Optional[str] = None
+
+    def command_for(self, task: BatchTask) -> PredictCommand:
+        return PredictCommand(
+            job_id=self.job_id,
+            task_id=task.task_id,
+            filename=task.filename,
+            html=task.html,
+            questions_and_labels=self.questions_and_labels,
+            llm_config=self.llm_config,
+            label_studio_config=self.label_studio_config,
+            dom_engine=self.dom_engine,
+        )
+
+    @classmethod
+    def from_contract(cls, contract: PredictBatchRequest) -> PredictBatchCommand:
+        return cls(job_id=contract.job_id, **_shared_settings(contract))
@@ -1,15 +1,42 @@
 # ml_backend/domain/predict.py
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+
 from bs4 import BeautifulSoup
+from infrastructure.dom_cache import CachedDocument, get_dom_cache, html_hash
 from infrastructure.label_studio import save_predictions_to_labelstudio
-from infrastructure.ollama import ask_llm_with_timeout
+from infrastructure.llm_cache import get_llm_cache, response_key
+from infrastructure.ollama import GENERATION_OPTIONS, ask_llm_with_timeout
 
-from domain.errors import ExternalServiceError, InternalError
+from domain.cancellation import get_cancel_registry
+from domain.errors import ExternalServiceError, InternalError, InvalidState
 from domain.models.predict import PredictCommand
-from domain.utils.dom_extract import extract_dom_with_chromium
+from domain.utils.chunking import (
+    chunk_token_budget,
+    is_confident,
+    reduce_chunk_answers,
+    split_into_chunks,
+)
+from domain.utils.dom_extract import DOM_EXTRACT_ENGINE, extract_dom
 from domain.utils.dom_match import extract_xpath_matches_from_dom
+from domain.utils.multi_question import (
+    build_answer_schema,
+    build_multi_question_instruction,
+    parse_multi_question_answer,
+)
 from domain.utils.perf_collector import PerfCollector
+from domain.utils.prompt_layout import LLM_PROMPT_LAYOUT, build_llm_input
+from domain.utils.retrieval import Bm25Index, passages_text, select_passages
+
+
+def _raise_if_cancelled(cancel, cmd: PredictCommand) -> None:
+    if cancel.cancelled:
+        raise InvalidState(
+            code="JOB_CANCELLED",
+            message="Job was cancelled.",
+            meta={"job_id": cmd.job_id, "task_id": cmd.task_id},
+        )
 
 
 def run_predict(cmd: PredictCommand) -> dict:
@@ -18,40 +45,217 @@ def run_predict(cmd: PredictCommand) -> dict:
     ls = cmd.label_studio_config
     qal = cmd.questions_and_labels
 
-    with perf.measure("dom.extract"):
-        try:
-            dom_data = extract_dom_with_chromium(cmd.html)
-        except Exception as e:
-            raise InternalError(
-                code="DOM_EXTRACT_FAILED",
-                message="Failed to extract DOM from HTML.",
-                meta={"error": str(e)},
-            )
+    # shared by the job's tasks: POST /cancel/<job_id> aborts their LLM calls
+    cancel = get_cancel_registry().token(cmd.job_id)
+    _raise_if_cancelled(cancel, cmd)
 
-    puretext = BeautifulSoup(cmd.html, "html.parser").get_text("\n", strip=True)
+    dom_engine = cmd.dom_engine or DOM_EXTRACT_ENGINE
+    dom_cache = get_dom_cache()
+    doc_key = html_hash(cmd.html)
+    with perf.measure("dom.extract", engine=dom_engine) as t:
+        cached = dom_cache.get(doc_key) if dom_cache else None
+        t["cache"] = "hit" if cached else ("miss" if dom_cache else "disabled")
+        if cached is None:
+            try:
+                dom_data = extract_dom(cmd.html, engine=dom_engine, perf=perf)
+            except Exception as e:
+                raise InternalError(
+                    code="DOM_EXTRACT_FAILED",
+                    message="Failed to extract DOM from HTML.",
+                    meta={"error": str(e)},
+                )
+        else:
+            dom_data = cached.dom
 
-    answers_by_label: dict = {}
-    timed_out = False
+    if cached is None:
+        puretext = BeautifulSoup(cmd.html, "html.parser").get_text("\n", strip=True)
+        if dom_cache:
+            dom_cache.put(doc_key, CachedDocument(dom=dom_data, puretext=puretext))
+    else:
+        puretext = cached.puretext
+
+    layout = llm.prompt_layout or LLM_PROMPT_LAYOUT
+    # without the digest a tag could point to other weights than the cached answers came from
+    llm_cache = get_llm_cache() if llm.model_digest else None
+
+    # chunked: the text is split to fit num_ctx instead of being truncated by Ollama
+    chunks = [puretext]
+    if llm.context_mode == "chunked":
+        chunks = split_into_chunks(puretext, chunk_token_budget(llm.num_ctx, llm.chunk_tokens))
+
+    # retrieval: each question only sees its best-ranked text blocks
+    retriever = None
+    if llm.context_mode == "retrieval":
+        with perf.measure("retrieval.index") as t:
+            retriever = Bm25Index(puretext.split("\n"))
+            t["n_blocks"] = len(retriever.blocks)
+
+    def _call(t: dict, instruction: str, context: str = puretext, **kwargs) -> dict:
+        llm_input = build_llm_input(layout, llm.system_prompt, context, instruction)
+        cache_key = None
+        t["cache"] = "disabled"
+        if llm_cache is not None:
+            options = {**GENERATION_OPTIONS, "num_ctx": llm.num_ctx}
+            cache_key = response_key(llm.model_digest, {**llm_input, **kwargs, "options": options})
+            t["cache"] = "bypass"
+            if llm.use_llm_cache:
+                hit = llm_cache.get(cache_key)
+                t["cache"] = "hit" if hit else "miss"
+                if hit:
+                    t["status"] = "ok"
+                    return {
+                        "answer": hit["answer"],
+                        "status": "ok",
+                        "error": None,
+                        "cached": True,
+                    }
+
+        result = ask_llm_with_timeout(
+            ollama_base=llm.ollama_base,
+            timeout=llm.llm_timeout_seconds,
+            model_name=llm.ollama_model,
+            num_ctx=llm.num_ctx,
+            keep_alive=llm.keep_alive,
+            cancel=cancel,
+            **llm_input,
+            **kwargs,
+        )
+        t["status"] = result.get("status")
+        t.update(result.get("timings") or {})
+        if cache_key is not None and result.get("status") == "ok":
+            llm_cache.put(cache_key, result["answer"])
+        return {**result, "cached": False}
 
-    for q, lab in zip(qal.questions, qal.labels, strict=False):
-        prompt = f"{llm.system_prompt}\n\nQuestion: {q}\n\nText: {puretext}"
+    def _retrieve(t: dict, queries: list[str]) -> tuple[str, list | None]:
+        """Context for the queries and the blocks it was built from (None: full text)."""
+        if retriever is None:
+            return puretext, None
+        passages = select_passages(
+            retriever,
+            queries,
+            llm.retrieval_top_k,
+            chunk_token_budget(llm.num_ctx, llm.chunk_tokens),
+        )
+        t["passages"] = len(passages)
+        if not passages:
+            # no term of the question in the document: nothing to rank by
+            return puretext, None
+        return passages_text(retriever.blocks, passages), passages
+
+    def _ask(q: str, lab: str, fallback: bool = False) -> dict:
+        if len(chunks) > 1:
+            return _ask_chunked(q, lab, fallback)
         with perf.measure("llm.call", label=str(lab)) as t:
-            result = ask_llm_with_timeout(
-                ollama_base=llm.ollama_base,
-                prompt=prompt,
-                timeout=llm.llm_timeout_seconds,
-                model_name=llm.ollama_model,
-                num_ctx=llm.num_ctx,
+            if fallback:
+                t["fallback"] = True
+            context, passages = _retrieve(t, [q])
+            return {**_call(t, f"Question: {q}", context=context), "passages": passages}
+
+    def _ask_chunk(q: str, lab: str, fallback: bool, i: int) -> dict:
+        with perf.measure("llm.call", label=str(lab), chunk=i, n_chunks=len(chunks)) as t:
+            if fallback:
+                t["fallback"] = True
+            return _call(t, f"Question: {q}", context=chunks[i])
+
+    def _ask_chunked(q: str, lab: str, fallback: bool) -> dict:
+        """Map: the question per chunk, in waves; reduce: one answer for the label."""
+        workers = max(1, llm.max_concurrency)
+        results: list = [None] * len(chunks)
+        for start in range(0, len(chunks), workers):
+            wave = range(start, min(start + workers, len(chunks)))
+            if len(wave) > 1:
+                with ThreadPoolExecutor(max_workers=len(wave), thread_name_prefix="llm") as pool:
+                    answers = list(pool.map(lambda i: _ask_chunk(q, lab, fallback, i), wave))
+            else:
+                answers = [_ask_chunk(q, lab, fallback, start)]
+            for i, result in zip(wave, answers, strict=True):
+                results[i] = result
+            # early exit: the remaining chunks are not asked once an answer is grounded
+            if any(
+                r.get("status") == "ok" and is_confident(r.get("answer"), chunks[i])
+                for i, r in zip(wave, answers, strict=True)
+            ):
+                break
+        result, chunk = reduce_chunk_answers(results, chunks)
+        return {**result, "chunk": chunk}
+
+    def _ask_at_once(pairs: list) -> tuple[dict, list]:
+        """One call for all questions; returns results by label and the pairs left to ask."""
+        labels = [str(lab) for _, lab in pairs]
+        with perf.measure("llm.call", label=",".join(labels), mode="multi_question") as t:
+            context, passages = _retrieve(t, [q for q, _ in pairs])
+            result = _call(
+                t,
+                build_multi_question_instruction(pairs),
+                context=context,
+                response_format=build_answer_schema(labels),
+            )
+            status = result.get("status")
+            if status in ("timeout", "model_missing", "cancelled"):
+                # asking again per question would not fit the request's time budget
+                return {lab: result for lab in labels}, []
+
+            # malformed JSON, missing labels or a rejected schema: those labels degrade
+            # to per-question calls
+            parsed = (
+                parse_multi_question_answer(result.get("answer"), labels) if status == "ok" else {}
             )
-            t["status"] = result.get("status")
-            if result.get("status") == "timeout":
-                timed_out = True
-            answers_by_label[str(lab)] = {
-                "question": q,
-                "answer": result["answer"],
-                "status": result["status"],
-                "error": result.get("error"),
+            pending = [(q, lab) for q, lab in pairs if str(lab) not in parsed]
+            t["fallback"] = len(pending)
+        answers = {
+            lab: {
+                "answer": a,
+                "status": "ok",
+                "error": None,
+                "cached": result["cached"],
+                "passages": passages,
             }
+            for lab, a in parsed.items()
+        }
+        return answers, pending
+
+    pairs = list(zip(qal.questions, qal.labels, strict=False))
+    results_by_label: dict = {}
+
+    with perf.measure(
+        "llm.wall", mode=llm.extraction_mode, layout=layout, n_chunks=len(chunks)
+    ) as t:
+        pending = pairs
+        # a multi-question call needs the whole text in one prompt
+        if llm.extraction_mode == "multi_question" and len(chunks) == 1:
+            results_by_label, pending = _ask_at_once(pairs)
+        fallback = pending is not pairs
+
+        # with chunks, the calls of one question already use max_concurrency
+        workers = 1 if len(chunks) > 1 else min(max(1, llm.max_concurrency), len(pending))
+        t["concurrency"] = workers
+        if workers > 1:
+            # Ollama serves up to OLLAMA_NUM_PARALLEL requests per model concurrently
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm") as pool:
+                results = list(pool.map(lambda p: _ask(*p, fallback=fallback), pending))
+        else:
+            results = [_ask(q, lab, fallback=fallback) for q, lab in pending]
+        for (_, lab), result in zip(pending, results, strict=True):
+            results_by_label[str(lab)] = result
+
+    # a cancelled task is not written to Label Studio with the answers it got so far
+    _raise_if_cancelled(cancel, cmd)
+
+    answers_by_label: dict = {}
+    timed_out = False
+    for q, lab in pairs:
+        result = results_by_label[str(lab)]
+        if result.get("status") == "timeout":
+            timed_out = True
+        answers_by_label[str(lab)] = {
+            "question": q,
+            "answer": result["answer"],
+            "status": result["status"],
+            "error": result.get("error"),
+            "cached": result.get("cached", False),
+            "chunk": result.get("chunk"),
+            "passages": result.get("passages"),
+        }
 
     with perf.measure("dom.match"):
         try:
@@ -84,6 +288,11 @@ def run_predict(cmd: PredictCommand) -> dict:
         "raw_llm_answers": answers_by_label,
         "system_prompt": llm.system_prompt,
         "model": llm.ollama_model,
+        "extraction_mode": llm.extraction_mode,
+        "prompt_layout": layout,
+        "context_mode": llm.context_mode,
+        "context_chunks": len(chunks),
+        "retrieval_top_k": llm.retrieval_top_k if retriever is not None else None,
         "dom_match_diagnostics": diagnostics,
         "dom_match_by_label": dom_match_by_label,
         "job_id": cmd.job_id,
@@ -91,7 +300,8 @@ def run_predict(cmd: PredictCommand) -> dict:
     }
 
     try:
-        save_predictions_to_labelstudio(
+        # written synchronously: the id is the caller's acknowledgement that the prediction exists
+        prediction_id = save_predictions_to_labelstudio(
             label_studio_url=ls.label_studio_url,
             token=ls.ls_token,
             model_version=llm.ollama_model,
@@ -112,6 +322,7 @@ def run_predict(cmd: PredictCommand) -> dict:
         "model_version": llm.ollama_model,
         "score": 1.0 if prelabels else 0.0,
         "result": prelabels,
+        "prediction_id": prediction_id,
         "meta": {
             **meta,
             "status": "timeout" if timed_out else "success",
@@ -0,0 +1,181 @@
+# ml_backend/domain/predict_batch.py
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from domain.errors import NotFound
+from domain.models.predict import BatchTask, PredictBatchCommand, PredictCommand
+from domain.predict import run_predict
+
+# tasks predicted at the same time across all batches; each task still runs
+# its questions with llm_config.max_concurrency
+PREDICT_BATCH_WORKERS = max(1, int(os.getenv("PREDICT_BATCH_WORKERS", "2")))
+# batches without pending tasks are dropped after this long without being read
+PREDICT_BATCH_TTL_SECONDS = int(os.getenv("PREDICT_BATCH_TTL_SECONDS", "900"))
+# upper bound for ?wait= on result reads
+PREDICT_BATCH_MAX_WAIT_SECONDS = 30.0
+
+
+@dataclass
+class TaskOutcome:
+    """Result of one task: the /predict response or the exception it raised."""
+
+    task_id: str
+    response: Optional[dict] = None
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class _Batch:
+    batch_id: str
+    command: PredictBatchCommand
+    submitted: int = 0
+    # outcomes from cursor `base` on; the ones before were read and dropped
+    outcomes: List[TaskOutcome] = field(default_factory=list)
+    base: int = 0
+    futures: List[Future] = field(default_factory=list)
+    touched_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def finished(self) -> int:
+        return self.base + len(self.outcomes)
+
+    @property
+    def pending(self) -> int:
+        return self.submitted - self.finished
+
+    def drop_read(self, cursor: int) -> None:
+        # a read after `cursor` confirms the client has everything before it
+        n = min(cursor, self.finished) - self.base
+        if n > 0:
+            del self.outcomes[:n]
+            self.base += n
+
+
+class PredictBatchScheduler:
+    """
+    Runs the tasks of all open batches on one shared pool of PREDICT_BATCH_WORKERS
+    threads, in submission order, and keeps their outcomes until they are read:
+    a read after a cursor drops the outcomes before it, so a batch only holds
+    what its client has not confirmed yet.
+
+    Callers never wait on a task: they submit, then read the outcomes finished
+    after a cursor (optionally waiting up to a few seconds for new ones).
+    """
+
+    def __init__(
+        self,
+        workers: int = PREDICT_BATCH_WORKERS,
+        ttl_seconds: float = PREDICT_BATCH_TTL_SECONDS,
+        predict: Callable[[PredictCommand], dict] = run_predict,
+    ) -> None:
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="predict")
+        self._ttl = ttl_seconds
+        self._predict = predict
+        self._batches: dict[str, _Batch] = {}
+        self._changed = threading.Condition()
+
+    def _get(self, batch_id: str) -> _Batch:
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            raise NotFound(
+                code="BATCH_NOT_FOUND",
+                message="Unknown or expired batch.",
+                meta={"batch_id": batch_id},
+            )
+        batch.touched_at = time.monotonic()
+        return batch
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self._ttl
+        for batch_id, batch in list(self._batches.items()):
+            if batch.pending == 0 and batch.touched_at <= cutoff:
+                del self._batches[batch_id]
+
+    def _run(self, batch: _Batch, task: BatchTask) -> None:
+        outcome = TaskOutcome(task_id=task.task_id)
+        try:
+            outcome.response = self._predict(batch.command.command_for(task))
+        except BaseException as e:  # reported with the task, the pool thread goes on
+            outcome.error = e
+        with self._changed:
+            batch.outcomes.append(outcome)
+            self._changed.notify_all()
+
+    def create(self, command: PredictBatchCommand, tasks: List[BatchTask]) -> dict:
+        with self._changed:
+            self._expire()
+            batch = _Batch(batch_id=uuid.uuid4().hex, command=command)
+            self._batches[batch.batch_id] = batch
+        return self.submit(batch.batch_id, tasks)
+
+    def submit(self, batch_id: str, tasks: List[BatchTask]) -> dict:
+        with self._changed:
+            batch = self._get(batch_id)
+            for task in tasks:
+                batch.futures.append(self._pool.submit(self._run, batch, task))
+            batch.submitted += len(tasks)
+            return self._summary(batch)
+
+    def results(self, batch_id: str, after: int = 0, wait: float = 0.0) -> dict:
+        """
+        Outcomes finished after the cursor `after`; waits up to `wait` seconds for
+        one. Outcomes before `after` are dropped, so a cursor only moves forward.
+        """
+        deadline = time.monotonic() + min(max(wait, 0.0), PREDICT_BATCH_MAX_WAIT_SECONDS)
+        with self._changed:
+            self._expire()
+            batch = self._get(batch_id)
+            after = max(0, after)
+            batch.drop_read(after)
+            while batch.finished <= after and batch.pending > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            return {
+                **self._summary(batch),
+                "cursor": batch.finished,
+                "outcomes": batch.outcomes[max(0, after - batch.base) :],
+            }
+
+    def close(self, batch_id: str) -> dict:
+        """Drops the batch; queued tasks are not started, running ones finish unseen."""
+        with self._changed:
+            batch = self._get(batch_id)
+            cancelled = sum(1 for f in batch.futures if f.cancel())
+            del self._batches[batch_id]
+            self._changed.notify_all()
+            return {**self._summary(batch), "cancelled": cancelled}
+
+    @staticmethod
+    def _summary(batch: _Batch) -> dict:
+        return {
+            "batch_id": batch.batch_id,
+            "job_id": batch.command.job_id,
+            "submitted": batch.submitted,
+            "pending": batch.pending,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_scheduler: Optional[PredictBatchScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_predict_batch_scheduler() -> PredictBatchScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PredictBatchScheduler()
+            atexit.register(_scheduler.shutdown)
+        return _scheduler
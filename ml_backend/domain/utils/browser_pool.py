@@ -0,0 +1,235 @@
+# /ml_backend/utils/browser_pool.py
+from __future__ import annotations
+
+import atexit
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import Any, Callable, List, Optional
+
+from playwright.sync_api import sync_playwright
+
+from domain.utils.perf_collector import PerfCollector
+
+POOL_SIZE = int(os.getenv("DOM_BROWSER_POOL_SIZE", "2"))
+MAX_PAGES_PER_BROWSER = int(os.getenv("DOM_BROWSER_MAX_PAGES", "200"))
+ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("DOM_BROWSER_ACQUIRE_TIMEOUT", "120"))
+
+
+# ----------------------------------
+# Pooled browser (one thread per Chromium)
+# ----------------------------------
+class _BrowserSlot:
+    """
+    One warm Chromium owned by a dedicated thread.
+
+    Playwright's sync API binds every object to the thread that created it,
+    while Flask serves each request on its own thread. Pages are therefore
+    never handed out; callers submit a function that runs on the slot thread.
+    """
+
+    def __init__(self, name: str, playwright_factory, max_pages: int) -> None:
+        self._playwright_factory = playwright_factory
+        self._max_pages = max(1, int(max_pages))
+        self._inbox: queue.Queue = queue.Queue()
+        self._started: Future = Future()
+        self.launches = 0
+        self.pages_served = 0
+        self._pages_since_launch = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        # surface launch errors (e.g. missing Chromium) to the first borrower
+        self._started.result()
+
+    def submit(self, fn: Callable[[Any], Any]) -> Future:
+        fut: Future = Future()
+        self._inbox.put((fn, fut))
+        return fut
+
+    def close(self, timeout: float = 10.0) -> None:
+        self._inbox.put(None)
+        self._thread.join(timeout=timeout)
+
+    def _launch(self, p, browser):
+        if browser is not None:
+            try:
+                browser.close()
+            except Exception:
+                pass
+        browser = p.chromium.launch(headless=True)
+        self.launches += 1
+        self._pages_since_launch = 0
+        return browser
+
+    def _healthy(self, browser) -> bool:
+        if browser is None or self._pages_since_launch >= self._max_pages:
+            return False
+        try:
+            return bool(browser.is_connected())
+        except Exception:
+            return False
+
+    def _run(self) -> None:
+        try:
+            ctx = self._playwright_factory()
+            p = ctx.__enter__()
+            browser = self._launch(p, None)
+        except BaseException as e:
+            self._started.set_exception(e)
+            return
+        self._started.set_result(None)
+
+        try:
+            while True:
+                item = self._inbox.get()
+                if item is None:
+                    break
+                fn, fut = item
+                if not fut.set_running_or_notify_cancel():
+                    continue
+                try:
+                    # health check + recycling after MAX_PAGES_PER_BROWSER pages
+                    if not self._healthy(browser):
+                        browser = self._launch(p, browser)
+                    page = browser.new_page()
+                    try:
+                        result = fn(page)
+                    finally:
+                        self.pages_served += 1
+                        self._pages_since_launch += 1
+                        try:
+                            page.close()
+                        except Exception:
+                            pass
+                    fut.set_result(result)
+                except BaseException as e:
+                    fut.set_exception(e)
+        finally:
+            try:
+                browser.close()
+            except Exception:
+                pass
+            try:
+                ctx.__exit__(None, None, None)
+            except Exception:
+                pass
+
+
+class BrowserPool:
+    """
+    Process-wide, bounded pool of pre-launched headless Chromium instances.
+
+    - at most `size` browsers are launched (lazily, or all at once via warm())
+    - every borrow gets a fresh page (own browser context), closed afterwards
+    - a browser is relaunched when it disconnects or after `max_pages_per_browser`
+    """
+
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        max_pages_per_browser: int = MAX_PAGES_PER_BROWSER,
+        acquire_timeout: float = ACQUIRE_TIMEOUT_SECONDS,
+        playwright_factory=sync_playwright,
+    ) -> None:
+        self._size = max(1, int(size))
+        self._max_pages = max_pages_per_browser
+        self._acquire_timeout = acquire_timeout
+        self._playwright_factory = playwright_factory
+        self._idle: queue.LifoQueue = queue.LifoQueue()  # LIFO keeps the hottest browser busy
+        self._slots: List[_BrowserSlot] = []
+        self._launched = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _reserve_slot(self) -> bool:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Browser pool is closed.")
+            if self._launched >= self._size:
+                return False
+            self._launched += 1
+            return True
+
+    def _new_slot(self) -> _BrowserSlot:
+        # launching takes a while, so it happens outside the lock
+        try:
+            slot = _BrowserSlot(
+                name=f"browser-pool-{self._launched}",
+                playwright_factory=self._playwright_factory,
+                max_pages=self._max_pages,
+            )
+        except BaseException:
+            with self._lock:
+                self._launched -= 1
+            raise
+        with self._lock:
+            self._slots.append(slot)
+        return slot
+
+    def _acquire(self) -> _BrowserSlot:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        if self._reserve_slot():
+            return self._new_slot()
+
+        try:
+            return self._idle.get(timeout=self._acquire_timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"No pooled browser became available within {self._acquire_timeout}s."
+            )
+
+    def run(self, fn: Callable[[Any], Any], perf: Optional[PerfCollector] = None) -> Any:
+        """
+        Runs fn(page) on a pooled browser and returns its result.
+        Wait and borrow times are recorded as dom.pool_wait / dom.pool_borrow.
+        """
+        with perf.measure("dom.pool_wait") if perf else nullcontext():
+            slot = self._acquire()
+        try:
+            with perf.measure("dom.pool_borrow") if perf else nullcontext():
+                return slot.submit(fn).result()
+        finally:
+            self._idle.put(slot)
+
+    def warm(self) -> None:
+        """Launches all browsers up front instead of on first use."""
+        while self._reserve_slot():
+            self._idle.put(self._new_slot())
+
+    def stats(self) -> dict:
+        with self._lock:
+            slots = list(self._slots)
+        return {
+            "size": self._size,
+            "launched": len(slots),
+            "idle": self._idle.qsize(),
+            "launches": sum(s.launches for s in slots),
+            "pages_served": sum(s.pages_served for s in slots),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            slots, self._slots = self._slots, []
+            self._launched = 0
+        for slot in slots:
+            slot.close()
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.close)
+        return _pool
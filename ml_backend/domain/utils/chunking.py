@@ -0,0 +1,105 @@
+# ml_backend/domain/utils/chunking.py
+import re
+
+from domain.utils.normalization import normalize_text_block
+
+# room left in num_ctx for system prompt, question and answer
+PROMPT_RESERVE_TOKENS = 1024
+MIN_CHUNK_TOKENS = 256
+# rough estimate without the model's tokenizer, on the safe side for German/English prose
+CHARS_PER_TOKEN = 3
+
+NO_MATCH = "<<<NO_MATCH>>>"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+")
+
+
+def chunk_token_budget(num_ctx: int, chunk_tokens: int) -> int:
+    """Document tokens per chunk: the configured size, but always fitting num_ctx."""
+    return max(MIN_CHUNK_TOKENS, min(chunk_tokens, num_ctx - PROMPT_RESERVE_TOKENS))
+
+
+def _split_long_line(line: str, max_chars: int) -> list[str]:
+    """Sentences (or, failing that, words) of a line that alone exceeds the budget."""
+    parts, current = [], ""
+    for piece in _SENTENCE_END.split(line):
+        while len(piece) > max_chars:
+            cut = piece.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(piece[:cut])
+            piece = piece[cut:].lstrip()
+        if current and len(current) + 1 + len(piece) > max_chars:
+            parts.append(current)
+            current = ""
+        current = f"{current} {piece}" if current else piece
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_into_chunks(text: str, max_tokens: int, overlap_lines: int = 1) -> list[str]:
+    """
+    Pack the lines of the plain text (one per DOM text block, as produced by
+    get_text("\\n")) into chunks of at most max_tokens.
+
+    Chunks never cut through a block unless the block alone is too long.
+    The last overlap_lines lines of a chunk open the next one, so an answer
+    right at a boundary is still seen whole by one call.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return [text]
+
+    lines = []
+    for line in text.split("\n"):
+        lines.extend(_split_long_line(line, max_chars) if len(line) > max_chars else [line])
+
+    chunks, current, size = [], [], 0
+    for line in lines:
+        if current and size + len(line) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            current = current[-overlap_lines:] if overlap_lines else []
+            size = sum(len(kept) + 1 for kept in current)
+            if size + len(line) + 1 > max_chars:
+                current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def is_confident(answer, chunk: str) -> bool:
+    """A real answer that can be found in the chunk it was taken from."""
+    if not answer or answer.strip() == NO_MATCH:
+        return False
+    needle = normalize_text_block(answer)
+    return bool(needle) and needle in normalize_text_block(chunk)
+
+
+def reduce_chunk_answers(results: list, chunks: list[str]) -> tuple[dict, int]:
+    """
+    One result per question from the per-chunk results (None = chunk not asked).
+
+    Preference: first answer grounded in its chunk, then the first other real
+    answer, then NO_MATCH if any chunk said so, else the first failure.
+    Returns the result and the index of the chunk it came from.
+    """
+    asked = [(i, r) for i, r in enumerate(results) if r is not None]
+    ok = [(i, r) for i, r in asked if r.get("status") == "ok"]
+
+    for i, r in ok:
+        if is_confident(r.get("answer"), chunks[i]):
+            return r, i
+    for i, r in ok:
+        answer = r.get("answer")
+        if answer and answer.strip() != NO_MATCH:
+            return r, i
+    if ok:
+        i, r = next(((i, r) for i, r in ok if r.get("answer")), ok[0])
+        return r, i
+    i, r = asked[0]
+    return r, i
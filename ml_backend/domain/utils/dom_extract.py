@@ -1,66 +1,170 @@
 # /ml_backend/utils/dom_extract.py
+import os
+from typing import Optional
 
-from playwright.sync_api import sync_playwright
+import html5lib
 
-from domain.utils.normalization import build_norm_index, normalize_xpath_for_labelstudio
+from domain.utils.browser_pool import get_browser_pool
+from domain.utils.dom_index import DomIndex
+from domain.utils.perf_collector import PerfCollector
+
+DOM_EXTRACT_ENGINE = os.getenv("DOM_EXTRACT_ENGINE", "chromium")
+
+# Single in-page pass over the tree below <body> in document order (same
+# element order as "body *"). XPaths are built incrementally from the
+# parent's path with the same rules as the former per-element getXPath():
+#   - element with id -> //*[@id="..."]
+#   - <body>          -> /html/body
+#   - otherwise       -> parent path + /tag[ix], ix counting same-tagName siblings
+# Text is returned once, as the list of text node contents ("chunks");
+# every element is [xpath, parent index, first chunk, end chunk], so its
+# textContent is the concatenation of its chunk range.
+_DOM_WALK_JS = """() => {
+    const chunks = [];
+    const nodes = [];
+    const body = document.body;
+    if (!body) return {chunks, nodes};
+
+    const idPath = (e) => '//*[@id="' + e.id + '"]';
+    const stack = [];
+    const pushChildren = (parent, parentPath, parentIdx) => {
+        const counts = new Map();
+        const kids = [];
+        for (const child of parent.childNodes) {
+            if (child.nodeType === 1) {
+                const ix = (counts.get(child.tagName) || 0) + 1;
+                counts.set(child.tagName, ix);
+                const path = child.id
+                    ? idPath(child)
+                    : parentPath + '/' + child.tagName.toLowerCase() + '[' + ix + ']';
+                kids.push({el: child, path: path, parent: parentIdx});
+            } else if (child.nodeType === 3 || child.nodeType === 4) {
+                kids.push({text: child.data});
+            }
+        }
+        for (let i = kids.length - 1; i >= 0; i--) stack.push(kids[i]);
+    };
+
+    pushChildren(body, body.id ? idPath(body) : '/html/body', -1);
+    while (stack.length) {
+        const item = stack.pop();
+        if (item.text !== undefined) {
+            if (item.text) chunks.push(item.text);
+        } else if (item.exit !== undefined) {
+            nodes[item.exit][3] = chunks.length;
+        } else {
+            const idx = nodes.length;
+            nodes.push([item.path, item.parent, chunks.length, chunks.length]);
+            stack.push({exit: idx});
+            pushChildren(item.el, item.path, idx);
+        }
+    }
+    return {chunks, nodes};
+}"""
 
 
 # ----------------------------------
-# DOM extraction (raw + normalized + index_map)
+# DOM extraction (normalized text + per-element offsets)
 # ----------------------------------
-def extract_dom_with_chromium(html: str):
+def extract_dom(html: str, engine: Optional[str] = None, perf: Optional[PerfCollector] = None):
+    """
+    Dispatches to the configured extraction engine (DOM_EXTRACT_ENGINE unless
+    given per request). Both engines return the same DomIndex.
+    """
+    engine = engine or DOM_EXTRACT_ENGINE
+    if engine == "chromium":
+        return extract_dom_with_chromium(html, perf=perf)
+    if engine == "lxml":
+        return extract_dom_with_lxml(html)
+    raise ValueError(f"Unknown DOM extraction engine: {engine}")
+
+
+def extract_dom_with_chromium(html: str, perf: Optional[PerfCollector] = None) -> DomIndex:
     """
-    Returns list of dicts:
-      {
-        "xpath": str,
-        "raw": original textContent,
-        "content": normalized text,
-        "index_map": list[int] mapping normalized indices -> original indices
-      }
+    Returns a DomIndex over all elements below <body> (see dom_index.py);
+    DomIndex.to_records() gives the former per-element
+    {"xpath", "raw", "content", "index_map"} dicts.
+
+    Runs on a warm browser from the process-wide pool instead of launching
+    Chromium per call.
     """
-    extracted = []
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+
+    def _extract(page):
         page.set_content(html, wait_until="domcontentloaded")
+        walked = page.evaluate(_DOM_WALK_JS) or {}
+        return walked.get("chunks") or [], walked.get("nodes") or []
 
-        elements = page.query_selector_all("body *")
-        for el in elements:
-            try:
-                raw_text = page.evaluate("el => el.textContent", el) or ""
-                norm_text, index_map = build_norm_index(raw_text)
-                if not norm_text:
-                    continue
-
-                xpath = page.evaluate(
-                    """el => {
-                        function getXPath(e) {
-                            if (e.id) return '//*[@id="' + e.id + '"]';
-                            if (e === document.body) return '/html/body';
-                            let ix = 1;
-                            const siblings = e.parentNode ? e.parentNode.childNodes : [];
-                            for (let i = 0; i < siblings.length; i++) {
-                                const s = siblings[i];
-                                if (s === e) return getXPath(e.parentNode) + '/' + e.tagName.toLowerCase() + '[' + ix + ']';
-                                if (s.nodeType === 1 && s.tagName === e.tagName) ix++;
-                            }
-                            return '';
-                        }
-                        return getXPath(el);
-                    }""",
-                    el,
-                )
-                cleaned_xpath = normalize_xpath_for_labelstudio(xpath)
-                extracted.append(
-                    {
-                        "xpath": cleaned_xpath,
-                        "raw": raw_text,
-                        "content": norm_text,
-                        "index_map": index_map,
-                    }
+    # offsets are computed in Python from the chunks: JS string indices are
+    # UTF-16 code units, which differ from Python's for astral characters
+    chunks, nodes = get_browser_pool().run(_extract, perf=perf)
+    return DomIndex.from_chunks(chunks, nodes)
+
+
+# ----------------------------------
+# Browserless extraction (html5lib + lxml)
+# ----------------------------------
+def _tag_name(el) -> str:
+    # mirrors Element.tagName: upper-case for HTML, case-preserved for SVG/MathML
+    tag = el.tag
+    if tag.startswith("{"):
+        return tag.rsplit("}", 1)[1]
+    return tag.upper()
+
+
+def _walk_lxml(body):
+    """
+    Python counterpart of _DOM_WALK_JS on an html5lib-built lxml tree: same
+    document order, same XPath rules, same chunks. Text nodes are lxml's
+    text/tail (comments contribute only their tail); <template> content is
+    not part of the document in browsers.
+    """
+    chunks = []
+    nodes = []
+
+    def children(el, path, parent_idx):
+        kids = [("text", el.text)]
+        counts: dict = {}
+        for child in el:
+            if isinstance(child.tag, str):
+                name = _tag_name(child)
+                ix = counts.get(name, 0) + 1
+                counts[name] = ix
+                child_id = child.get("id")
+                child_path = (
+                    f'//*[@id="{child_id}"]' if child_id else f"{path}/{name.lower()}[{ix}]"
                 )
-            except Exception:
-                continue
+                kids.append(("el", child, child_path, parent_idx))
+            kids.append(("text", child.tail))
+        return reversed(kids)
+
+    body_id = body.get("id")
+    stack = list(children(body, f'//*[@id="{body_id}"]' if body_id else "/html/body", -1))
+    while stack:
+        item = stack.pop()
+        if item[0] == "text":
+            if item[1]:
+                chunks.append(item[1])
+        elif item[0] == "exit":
+            nodes[item[1]][3] = len(chunks)
+        else:
+            _, el, path, parent_idx = item
+            idx = len(nodes)
+            nodes.append([path, parent_idx, len(chunks), len(chunks)])
+            stack.append(("exit", idx))
+            if el.tag != "template":
+                stack.extend(children(el, path, idx))
+    return chunks, nodes
 
-        browser.close()
-    return extracted
+
+def extract_dom_with_lxml(html: str) -> DomIndex:
+    """
+    Same DomIndex as extract_dom_with_chromium without a browser process.
+    html5lib implements the HTML5 parsing algorithm (implied tags, foster
+    parenting, entity handling), so the tree matches what Chromium builds.
+    """
+    parser = html5lib.HTMLParser(tree=html5lib.getTreeBuilder("lxml"), namespaceHTMLElements=False)
+    root = parser.parse(html, scripting=True).getroot()
+    body = next((el for el in root if el.tag == "body"), None)
+    if body is None:
+        return DomIndex.from_chunks([], [])
+    return DomIndex.from_chunks(*_walk_lxml(body))
@@ -0,0 +1,181 @@
+# /ml_backend/utils/dom_index.py
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from domain.utils.normalization import build_norm_index, normalize_xpath_for_labelstudio
+
+
+# ----------------------------------
+# Compact DOM text index
+# ----------------------------------
+@dataclass
+class DomIndex:
+    """
+    Text of all elements below <body> without per-element copies.
+
+    The body's textContent is normalized once into `content`; every element
+    is a [start, end) range into it (an element's textContent is always a
+    contiguous slice of its parent's). Elements are stored in document
+    order, elements whose normalized text is empty are left out.
+
+      raw_text:    body textContent (original characters)
+      content:     normalized body text
+      index_map:   content index -> raw_text index
+      xpaths:      Label Studio XPath per element
+      raw_starts/raw_ends: range of the element's textContent in raw_text
+      starts/ends: range of the element's normalized text in content
+      parents:     index of the parent element, -1 below <body>
+    """
+
+    raw_text: str
+    content: str
+    index_map: array
+    xpaths: List[str]
+    raw_starts: array
+    raw_ends: array
+    starts: array
+    ends: array
+    parents: array
+
+    @classmethod
+    def from_chunks(
+        cls, chunks: Sequence[str], nodes: Sequence[Tuple[str, int, int, int]]
+    ) -> DomIndex:
+        """
+        chunks: text node contents in document order
+        nodes:  (raw xpath, parent node index, first chunk, end chunk) per
+                element in document order; chunk ranges are end-exclusive
+        """
+        raw_text = "".join(chunks)
+        chunk_offsets = list(accumulate((len(c) for c in chunks), initial=0))
+        content, index_map = build_norm_index(raw_text)
+
+        xpaths: List[str] = []
+        raw_starts, raw_ends = array("i"), array("i")
+        starts, ends, parents = array("i"), array("i"), array("i")
+        kept = array("i", [-1]) * len(nodes)
+
+        for i, (xpath, parent, first_chunk, end_chunk) in enumerate(nodes):
+            raw_start, raw_end = chunk_offsets[first_chunk], chunk_offsets[end_chunk]
+            start = bisect_left(index_map, raw_start)
+            end = bisect_left(index_map, raw_end)
+            if start == end:
+                # no normalized text -> no descendant has any either
+                continue
+
+            kept[i] = len(xpaths)
+            xpaths.append(normalize_xpath_for_labelstudio(xpath))
+            raw_starts.append(raw_start)
+            raw_ends.append(raw_end)
+            starts.append(start)
+            ends.append(end)
+            parents.append(kept[parent] if parent >= 0 else -1)
+
+        return cls(
+            raw_text=raw_text,
+            content=content,
+            index_map=index_map,
+            xpaths=xpaths,
+            raw_starts=raw_starts,
+            raw_ends=raw_ends,
+            starts=starts,
+            ends=ends,
+            parents=parents,
+        )
+
+    def __len__(self) -> int:
+        return len(self.xpaths)
+
+    def node_content(self, node: int) -> str:
+        return self.content[self.starts[node] : self.ends[node]]
+
+    def _tightest_node(self, start: int, end: int) -> int:
+        """
+        Shortest element containing content[start:end], the outermost one if
+        several elements share the same text (as sorting by length did).
+        """
+        # every element containing `start` is the last one starting at or
+        # before it, or one of its ancestors
+        node = bisect_right(self.starts, start) - 1
+        while node != -1 and self.ends[node] < end:
+            node = self.parents[node]
+        if node == -1:
+            return -1
+
+        parent = self.parents[node]
+        while (
+            parent != -1
+            and self.starts[parent] == self.starts[node]
+            and self.ends[parent] == self.ends[node]
+        ):
+            node, parent = parent, self.parents[parent]
+        return node
+
+    def locate(self, needle: str) -> Optional[Tuple[int, int, int]]:
+        """
+        Finds the tightest element whose normalized text contains needle.
+        Returns (node, start, end) with start/end as offsets into the
+        element's own textContent, or None.
+        """
+        if not needle:
+            return None
+
+        n = len(needle)
+        best: Optional[Tuple[int, int]] = None  # (length, node)
+        pos = self.content.find(needle)
+        while pos != -1:
+            node = self._tightest_node(pos, pos + n)
+            if node != -1:
+                candidate = (self.ends[node] - self.starts[node], node)
+                if best is None or candidate < best:
+                    best = candidate
+                if candidate[0] == n:
+                    # nothing shorter exists, and a later occurrence can only
+                    # be inside an element later in document order
+                    break
+            pos = self.content.find(needle, pos + 1)
+
+        if best is None:
+            return None
+
+        node = best[1]
+        offset = self.content.find(needle, self.starts[node], self.ends[node])
+        raw_start = self.raw_starts[node]
+        return (
+            node,
+            self.index_map[offset] - raw_start,
+            self.index_map[offset + n - 1] + 1 - raw_start,
+        )
+
+    def locate_all(self, needles: Iterable[str]) -> Dict[str, Optional[Tuple[int, int, int]]]:
+        """
+        locate() for several needles, each distinct needle searched once.
+        Results are not kept on the index: a cached index is shared by
+        concurrent tasks and must stay immutable.
+        """
+        located: Dict[str, Optional[Tuple[int, int, int]]] = {}
+        for needle in needles:
+            if needle not in located:
+                located[needle] = self.locate(needle)
+        return located
+
+    def to_records(self) -> list:
+        """Per-element {"xpath", "raw", "content", "index_map"} dicts (debugging/tests)."""
+        records = []
+        for node, xpath in enumerate(self.xpaths):
+            start, end = self.starts[node], self.ends[node]
+            raw_start = self.raw_starts[node]
+            records.append(
+                {
+                    "xpath": xpath,
+                    "raw": self.raw_text[raw_start : self.raw_ends[node]],
+                    "content": self.content[start:end],
+                    "index_map": [self.index_map[j] - raw_start for j in range(start, end)],
+                }
+            )
+        return records
@@ -0,0 +1,48 @@
+# ml_backend/domain/utils/multi_question.py
+import json
+
+
+def build_answer_schema(labels: list[str]) -> dict:
+    """JSON schema for Ollama's `format`: one string answer per label."""
+    return {
+        "type": "object",
+        "properties": {str(lab): {"type": "string"} for lab in labels},
+        "required": [str(lab) for lab in labels],
+    }
+
+
+def build_multi_question_instruction(pairs) -> str:
+    """
+    The instruction asking all questions of a task at once.
+
+    The system prompt's rules (e.g. the <<<NO_MATCH>>> sentinel) apply to
+    every single answer.
+    """
+    questions = "\n".join(f"- {lab}: {q}" for q, lab in pairs)
+    return (
+        "Answer each of the following questions separately. Respond with a JSON object "
+        "with one key per label below; its value is the answer to that label's question.\n\n"
+        f"Questions:\n{questions}"
+    )
+
+
+def parse_multi_question_answer(answer: str | None, labels: list[str]) -> dict:
+    """
+    Answers by label from the model's JSON response.
+
+    Labels whose value is missing or not a string are left out, the caller
+    asks them one by one. Unparsable JSON yields an empty dict.
+    """
+    try:
+        data = json.loads(answer or "")
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    answers = {}
+    for lab in labels:
+        value = data.get(str(lab))
+        if isinstance(value, str):
+            answers[str(lab)] = value.strip() or None
+    return answers
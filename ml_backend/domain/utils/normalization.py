@@ -1,6 +1,8 @@
 # /ml_backend/domain/utils/utils.py
 import re
 import unicodedata
+from array import array
+from functools import lru_cache
 
 # ----------------------------------
 # Normalization helpers
@@ -22,24 +24,64 @@ def norm_char(c: str) -> str:
     )
 
 
+_cached_norm_char = lru_cache(maxsize=8192)(norm_char)
+_identity = array("i")
+
+
+def _identity_map(n: int) -> array:
+    """Shared 0..n-1 array; slicing it is a memcpy instead of creating n ints."""
+    global _identity
+    identity = _identity
+    if len(identity) < n:
+        identity = array("i", range(max(n, 2 * len(identity))))
+        _identity = identity
+    return identity
+
+
 def build_norm_index(original_text: str):
     """
     Returns (norm_text, index_map)
 
     norm_text: normalized concatenated string
-    index_map[j]: original index of the j-th character in norm_text
+    index_map[j]: original index of the j-th character in norm_text (array('i'))
+
+    Same result as applying norm_char() to every character, but only the
+    characters that actually change are touched (found via a character class
+    built from the distinct characters of the text); unchanged runs are
+    copied as slices, their index_map entries from a shared identity array.
     """
+    n = len(original_text)
+
+    # pure ASCII: NFKC is a no-op, only CR/LF are dropped
+    if original_text.isascii() and "\n" not in original_text and "\r" not in original_text:
+        return original_text, _identity_map(n)[:n]
+
+    changed = {}
+    for ch in set(original_text):
+        normed = _cached_norm_char(ch)
+        if normed != ch:
+            changed[ch] = normed
+    if not changed:
+        return original_text, _identity_map(n)[:n]
+
+    pattern = re.compile("[" + "".join(re.escape(ch) for ch in changed) + "]")
+    identity = _identity_map(n)  # unchanged runs are copied from here
     norm_parts = []
-    index_map = []
-
-    for i, ch in enumerate(original_text):
-        n = norm_char(ch)
-        if not n:
-            continue
-
-        norm_parts.append(n)
-        for _ in range(len(n)):
-            index_map.append(i)
+    index_map = array("i")
+    pos = 0
+    for m in pattern.finditer(original_text):
+        i = m.start()
+        if i > pos:
+            norm_parts.append(original_text[pos:i])
+            index_map += identity[pos:i]
+        normed = changed[m.group()]
+        if normed:
+            norm_parts.append(normed)
+            index_map += array("i", [i]) * len(normed)
+        pos = i + 1
+    if pos < n:
+        norm_parts.append(original_text[pos:])
+        index_map += identity[pos:n]
 
     return "".join(norm_parts), index_map
 
@@ -2,11 +2,16 @@
 from __future__ import annotations
 
 import statistics
+import threading
 from contextlib import contextmanager
 from dataclasses import dataclass
 from time import perf_counter
 from typing import Any, Dict, List, Optional
 
+# events measured inside another event (e.g. inside dom.extract or
+# llm.wall); they are reported separately but not added to task_ms_total twice
+NESTED_EVENTS = frozenset({"dom.pool_wait", "dom.pool_borrow", "llm.call"})
+
 
 @dataclass
 class PerfEvent:
@@ -18,6 +23,7 @@ class PerfEvent:
 class PerfCollector:
     def __init__(self) -> None:
         self._events: List[PerfEvent] = []
+        self._lock = threading.Lock()  # measure() may run on several threads
         self._task_ctx: Optional[str] = None  # e.g. LS task_id / filename
 
     @contextmanager
@@ -39,47 +45,84 @@ class PerfCollector:
             yield tags
         finally:
             t1 = perf_counter()
-            self._events.append(
-                PerfEvent(
-                    name=name,
-                    ms=(t1 - t0) * 1000.0,
-                    tags=dict(tags),
-                )
+            event = PerfEvent(
+                name=name,
+                ms=(t1 - t0) * 1000.0,
+                tags=dict(tags),
             )
+            with self._lock:
+                self._events.append(event)
 
     def to_dict(self, include_events: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            all_events = list(self._events)
+
         def events(prefix: str) -> List[PerfEvent]:
-            return [e for e in self._events if e.name.startswith(prefix)]
+            return [e for e in all_events if e.name.startswith(prefix)]
 
         llm = events("llm.")
         dom = events("dom.")
 
         task_ms_dom_extract = sum(e.ms for e in dom if e.name == "dom.extract")
+        dom_cache = [e.tags.get("cache") for e in dom if e.name == "dom.extract"]
         task_ms_dom_match = sum(e.ms for e in dom if e.name == "dom.match")
-
-        task_ms_llm_total = sum(e.ms for e in llm)
-        task_ms_total = sum(e.ms for e in self._events)
-
-        llm_calls = [e.ms for e in llm if e.name == "llm.call"]
+        task_ms_dom_pool_wait = sum(e.ms for e in dom if e.name == "dom.pool_wait")
+        task_ms_dom_pool_borrow = sum(e.ms for e in dom if e.name == "dom.pool_borrow")
+
+        # summed per-call time vs. elapsed time (differ when questions run concurrently)
+        task_ms_llm_total = sum(e.ms for e in llm if e.name == "llm.call")
+        task_ms_llm_wall = sum(e.ms for e in llm if e.name == "llm.wall")
+        # as reported by Ollama; drops once the document prefix is served from its KV cache
+        task_ms_llm_prompt_eval = sum(
+            e.tags.get("prompt_eval_ms") or 0.0 for e in llm if e.name == "llm.call"
+        )
+        n_llm_prompt_eval_tokens = sum(
+            e.tags.get("prompt_eval_count") or 0 for e in llm if e.name == "llm.call"
+        )
+        # a large load time means Ollama had to (re)load the weights for this task
+        task_ms_llm_load = sum(e.tags.get("load_ms") or 0.0 for e in llm if e.name == "llm.call")
+        task_ms_llm_eval = sum(e.tags.get("eval_ms") or 0.0 for e in llm if e.name == "llm.call")
+        n_llm_eval_tokens = sum(e.tags.get("eval_count") or 0 for e in llm if e.name == "llm.call")
+        task_ms_total = sum(e.ms for e in all_events if e.name not in NESTED_EVENTS)
+
+        # answers served from the LLM response cache are not model calls
+        calls = [e for e in llm if e.name == "llm.call" and e.tags.get("cache") != "hit"]
+        llm_cache = [e.tags.get("cache") for e in llm if e.name == "llm.call"]
+        llm_calls = [e.ms for e in calls]
         avg_call_ms = statistics.mean(llm_calls) if llm_calls else 0.0
         median_call_ms = statistics.median(llm_calls) if llm_calls else 0.0
 
         timeouts = sum(1 for e in llm if e.name == "llm.call" and e.tags.get("status") == "timeout")
+        # per-question calls made because a multi_question answer was unusable
+        fallbacks = sum(1 for e in llm if e.name == "llm.call" and e.tags.get("fallback") is True)
 
         out = {
             "request": {
                 "task_ms_total": task_ms_total,
                 "task_ms_llm_total": task_ms_llm_total,
+                "task_ms_llm_wall": task_ms_llm_wall,
+                "task_ms_llm_prompt_eval": task_ms_llm_prompt_eval,
+                "n_llm_prompt_eval_tokens": n_llm_prompt_eval_tokens,
+                "task_ms_llm_load": task_ms_llm_load,
+                "task_ms_llm_eval": task_ms_llm_eval,
+                "n_llm_eval_tokens": n_llm_eval_tokens,
                 "task_ms_dom_extract": task_ms_dom_extract,
                 "task_ms_dom_match": task_ms_dom_match,
-                "n_llm_calls": sum(1 for e in llm if e.name == "llm.call"),
+                "task_ms_dom_pool_wait": task_ms_dom_pool_wait,
+                "task_ms_dom_pool_borrow": task_ms_dom_pool_borrow,
+                "n_dom_cache_hits": dom_cache.count("hit"),
+                "n_dom_cache_misses": dom_cache.count("miss"),
+                "n_llm_calls": len(calls),
+                "n_llm_cache_hits": llm_cache.count("hit"),
+                "n_llm_cache_misses": llm_cache.count("miss"),
                 "n_timeouts": timeouts,
+                "n_llm_fallbacks": fallbacks,
                 "avg_llm_call_ms": avg_call_ms,
                 "median_llm_call_ms": median_call_ms,
             }
         }
 
         if include_events:
-            out["events"] = [{"name": e.name, "ms": e.ms, "tags": e.tags} for e in self._events]
+            out["events"] = [{"name": e.name, "ms": e.ms, "tags": e.tags} for e in all_events]
 
         return out
@@ -0,0 +1,28 @@
+# ml_backend/domain/utils/prompt_layout.py
+import os
+
+PROMPT_LAYOUTS = ("document_first", "question_first")
+LLM_PROMPT_LAYOUT = os.getenv("LLM_PROMPT_LAYOUT", "document_first")
+
+
+def build_llm_input(layout: str, system_prompt: str, puretext: str, instruction: str) -> dict:
+    """
+    Prompt or chat messages for ask_llm_with_timeout.
+
+    - document_first: system prompt and document open a chat, the question
+      comes last. Every question of a task shares the same prefix, so Ollama
+      reuses its evaluated KV cache and only evaluates the question.
+    - question_first: the former single prompt with the question in front of
+      the document, which makes every call re-evaluate the whole text.
+    """
+    if layout == "question_first":
+        return {"prompt": f"{system_prompt}\n\n{instruction}\n\nText: {puretext}"}
+    if layout != "document_first":
+        raise ValueError(f"Unknown prompt layout: {layout!r}")
+    return {
+        "prompt": None,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Text: {puretext}\n\n{instruction}"},
+        ],
+    }
@@ -0,0 +1,94 @@
+# ml_backend/domain/utils/retrieval.py
+import math
+import re
+from collections import Counter, defaultdict
+
+from domain.utils.chunking import CHARS_PER_TOKEN
+
+# Okapi BM25 defaults
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# blocks kept on each side of a hit: in tables and definition lists the
+# field name ("Diagnose") and its value are separate text blocks
+NEIGHBOUR_BLOCKS = 1
+GAP_MARKER = "[...]"
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN.findall(text.casefold()) if len(t) > 1 or t.isdigit()]
+
+
+class Bm25Index:
+    """
+    In-memory inverted index over the text blocks of one document (the lines
+    of the plain text, one per DOM text block), ranked with Okapi BM25.
+    """
+
+    def __init__(self, blocks: list[str]) -> None:
+        self.blocks = blocks
+        self._postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self._lengths = []
+        for i, block in enumerate(blocks):
+            terms = Counter(tokenize(block))
+            self._lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self._postings[term].append((i, tf))
+        self._avg_length = (sum(self._lengths) / len(blocks)) if blocks else 0.0
+
+    def _idf(self, term: str) -> float:
+        df = len(self._postings.get(term, ()))
+        return math.log(1 + (len(self.blocks) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str) -> list[tuple[int, float]]:
+        """(block index, score) of every block sharing a term with the query, best first."""
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf(term)
+            for i, tf in self._postings.get(term, ()):
+                norm = 1 - BM25_B + BM25_B * self._lengths[i] / self._avg_length
+                scores[i] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def select_passages(index: Bm25Index, queries: list[str], top_k: int, max_tokens: int) -> list[int]:
+    """
+    Block indices (in document order) of the top_k hits per query, each with
+    its neighbouring blocks, as long as they fit max_tokens.
+
+    With several queries (multi-question) the hits are taken rank by rank
+    across the queries, so every question gets its best passages first.
+    Empty when no block shares a term with any query.
+    """
+    ranked = [index.search(q)[:top_k] for q in queries]
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chosen: set[int] = set()
+    size = 0
+    for rank in range(top_k):
+        for hits in ranked:
+            if rank >= len(hits):
+                continue
+            hit = hits[rank][0]
+            window = [
+                i
+                for i in range(hit - NEIGHBOUR_BLOCKS, hit + NEIGHBOUR_BLOCKS + 1)
+                if 0 <= i < len(index.blocks) and i not in chosen
+            ]
+            cost = sum(len(index.blocks[i]) + 1 for i in window)
+            if size + cost > max_chars:
+                continue
+            chosen.update(window)
+            size += cost
+    return sorted(chosen)
+
+
+def passages_text(blocks: list[str], passages: list[int]) -> str:
+    """The selected blocks, with a marker where blocks in between were left out."""
+    lines = []
+    for n, i in enumerate(passages):
+        if n and i != passages[n - 1] + 1:
+            lines.append(GAP_MARKER)
+        lines.append(blocks[i])
+    return "\n".join(lines)
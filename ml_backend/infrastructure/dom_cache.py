@@ -0,0 +1,219 @@
+# ml_backend/infrastructure/dom_cache.py
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Optional
+
+from domain.utils.dom_index import DomIndex
+from utils.logging_utils import safe_logger
+
+DOM_CACHE_ENABLED = os.getenv("DOM_CACHE_ENABLED", "1") == "1"
+DOM_CACHE_MAX_BYTES = int(os.getenv("DOM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+DOM_CACHE_DIR = os.getenv("DOM_CACHE_DIR", "")  # empty -> memory tier only
+DOM_CACHE_DISK_MAX_BYTES = int(os.getenv("DOM_CACHE_DISK_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+# bump when DomIndex or the extraction output changes, old disk entries are ignored
+CACHE_FORMAT_VERSION = 2
+
+
+@dataclass
+class CachedDocument:
+    dom: DomIndex
+    puretext: str
+
+
+def entry_size(entry: CachedDocument) -> int:
+    """
+    Estimated size of an entry: its strings and array buffers, read off without
+    serializing it (a miss only pickles the entry to write it to disk).
+    """
+    size = len(entry.puretext)
+    for f in fields(entry.dom):
+        value = getattr(entry.dom, f.name)
+        if isinstance(value, str):
+            size += len(value)
+        elif isinstance(value, array):
+            size += value.itemsize * len(value)
+        elif isinstance(value, list):
+            size += sum(len(item) for item in value)
+    return size
+
+
+def html_hash(html: str) -> str:
+    # same hash worker_conversion stores as files.html_hash
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+class DomCache:
+    """
+    Content-addressed cache of extracted documents (DomIndex + plain text).
+
+    - memory tier: LRU bounded by the estimated size of the entries (entry_size)
+    - disk tier (optional): one pickle per document under cache_dir, least
+      recently used files are deleted once disk_max_bytes is exceeded
+    Entries are immutable per HTML hash, so there is nothing to invalidate.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DOM_CACHE_MAX_BYTES,
+        cache_dir: Optional[str] = DOM_CACHE_DIR,
+        disk_max_bytes: int = DOM_CACHE_DISK_MAX_BYTES,
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[CachedDocument, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._dir = Path(cache_dir) if cache_dir else None
+        self._disk_max_bytes = disk_max_bytes
+        self._disk_bytes = 0
+        if self._dir is not None:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(p.stat().st_size for p in self._dir.glob("*.pkl"))
+
+    def _path(self, key: str) -> Path:
+        return self._dir / f"{key}.v{CACHE_FORMAT_VERSION}.pkl"
+
+    # ----------------------------------
+    # memory tier
+    # ----------------------------------
+    def _remember(self, key: str, entry: CachedDocument, size: int) -> None:
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = (entry, size)
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    # ----------------------------------
+    # disk tier
+    # ----------------------------------
+    def _read_disk(self, key: str) -> Optional[CachedDocument]:
+        if self._dir is None:
+            return None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            entry = pickle.loads(data)
+            os.utime(path)  # mtime = last use, for LRU eviction
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # truncated/foreign file: drop it, the document gets re-extracted
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def _write_disk(self, key: str, entry: CachedDocument) -> None:
+        if self._dir is None:
+            return
+        path = self._path(key)
+        if path.exists():
+            return
+        # the disk tier only saves re-extractions: a failed write must not fail the task
+        tmp = None
+        try:
+            data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+            if len(data) > self._disk_max_bytes:
+                return
+            fd, tmp = tempfile.mkstemp(dir=self._dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            tmp = None
+
+            with self._lock:
+                self._disk_bytes += len(data)
+                over = self._disk_bytes > self._disk_max_bytes
+            if over:
+                self._evict_disk()
+        except Exception as e:
+            safe_logger.warning("dom_cache_write_failed | key=%s | error=%s", key, type(e).__name__)
+        finally:
+            if tmp is not None:
+                Path(tmp).unlink(missing_ok=True)
+
+    def _evict_disk(self) -> None:
+        files = []
+        for p in self._dir.glob("*.pkl"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for _, size, p in files:
+            if total <= self._disk_max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+    # ----------------------------------
+    # public API
+    # ----------------------------------
+    def get(self, key: str) -> Optional[CachedDocument]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+
+        entry = self._read_disk(key)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        self._remember(key, entry, entry_size(entry))
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: CachedDocument) -> None:
+        self._remember(key, entry, entry_size(entry))
+        self._write_disk(key, entry)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "disk_bytes": self._disk_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_cache: Optional[DomCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_dom_cache() -> Optional[DomCache]:
+    """Process-wide cache, None when DOM_CACHE_ENABLED=0."""
+    global _cache
+    if not DOM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = DomCache()
+        return _cache
@@ -9,7 +9,8 @@ def save_predictions_to_labelstudio(
     model_version: str,
     task_id: str,
     prediction_result: list,
-) -> None:
+) -> int | None:
+    """Creates the prediction and returns its Label Studio id (None if LS did not send one)."""
     payload = {
         "task": task_id,
         "model_version": model_version,
@@ -29,3 +30,9 @@ def save_predictions_to_labelstudio(
             message="Could not save predictions to Label Studio.",
             meta={"error": str(e)},
         )
+    try:
+        created = response.json()
+    except ValueError:
+        # saved, but the body was not the created prediction
+        return None
+    return created.get("id") if isinstance(created, dict) else None
@@ -0,0 +1,174 @@
+# ml_backend/infrastructure/llm_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")  # empty -> no cache
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(90 * 24 * 3600)))
+
+
+def response_key(model_digest: str, request: dict) -> str:
+    """
+    Key of one deterministic completion: the model's weights (digest, not the
+    tag, which can be re-pulled) plus everything else sent to Ollama.
+    """
+    blob = json.dumps(
+        {"model_digest": model_digest, "request": request},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class LlmResponseCache:
+    """
+    Persistent cache of successful LLM answers in a SQLite file.
+
+    Only worth it because every call runs with temperature 0 and a fixed
+    seed, so a (model digest, request) pair always yields the same answer.
+    - entries older than ttl_seconds are dropped on read and on write
+    - the least recently used entries are deleted once the stored answers
+      exceed max_bytes; triggers keep their total in cache_meta, so a write
+      only scans entries when there is something to evict
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = LLM_CACHE_MAX_BYTES,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " answer TEXT,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS ix_responses_last_used ON responses(last_used)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS ix_responses_created_at ON responses(created_at)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache_meta ("
+            " id INTEGER PRIMARY KEY CHECK (id = 1),"
+            " total INTEGER NOT NULL)"
+        )
+        for name, event, delta in (
+            ("tr_responses_insert", "INSERT", "NEW.size"),
+            ("tr_responses_delete", "DELETE", "-OLD.size"),
+            ("tr_responses_update", "UPDATE OF size", "NEW.size - OLD.size"),
+        ):
+            self._db.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON responses BEGIN"
+                f" UPDATE cache_meta SET total = total + {delta} WHERE id = 1; END"
+            )
+        # once per file: files written before cache_meta existed are summed up here
+        self._db.execute(
+            "INSERT OR IGNORE INTO cache_meta (id, total)"
+            " SELECT 1, COALESCE(SUM(size), 0) FROM responses"
+        )
+
+    def get(self, key: str) -> Optional[dict]:
+        """{"answer": ...} for a stored response (the answer may be None), else None."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT answer, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] < now - self._ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return {"answer": row[0]}
+
+    def put(self, key: str, answer: Optional[str]) -> None:
+        now = time.time()
+        size = len(key) + len((answer or "").encode("utf-8"))
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            # an upsert, not INSERT OR REPLACE: its implicit delete would skip the triggers
+            self._db.execute(
+                "INSERT INTO responses (key, answer, size, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET answer = excluded.answer,"
+                " size = excluded.size, created_at = excluded.created_at,"
+                " last_used = excluded.last_used",
+                (key, answer, size, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self._db.execute("DELETE FROM responses WHERE created_at < ?", (now - self._ttl,))
+        total = self._total()
+        if total <= self._max_bytes:
+            return
+        doomed = []
+        # read lazily: only the least recently used entries up to the overshoot
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_used")
+        for key, size in rows:
+            if total <= self._max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        rows.close()
+        self._db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def _total(self) -> int:
+        return self._db.execute("SELECT total FROM cache_meta WHERE id = 1").fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {
+                "entries": entries,
+                "bytes": self._total(),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_cache: Optional[LlmResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LlmResponseCache]:
+    """Process-wide cache, None when LLM_CACHE_ENABLED=0 or no LLM_CACHE_PATH is set."""
+    global _cache
+    if not LLM_CACHE_ENABLED or not LLM_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LlmResponseCache(LLM_CACHE_PATH)
+        return _cache
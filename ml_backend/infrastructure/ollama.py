@@ -1,32 +1,197 @@
 # ml_backend/infrastructure/ollama.py
+import socket
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.connection import HTTPConnection, HTTPSConnection
+
+# fixed so that a model answers the same prompt the same way (see infrastructure/llm_cache.py)
+GENERATION_OPTIONS = {"temperature": 0, "seed": 42}
+# connections kept to Ollama; above PREDICT_BATCH_WORKERS * max_concurrency they are reopened
+OLLAMA_POOL_SIZE = 32
+
+
+class CancelToken:
+    """
+    Cancel signal shared by the LLM calls of one job. cancel() shuts down the
+    sockets of the calls waiting for Ollama, which makes Ollama abort them
+    (it stops generating when the client disconnects); later calls are not sent.
+    """
+
+    def __init__(self) -> None:
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._sockets: set[socket.socket] = set()
+        self.touched_at = time.monotonic()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._sockets)
+
+    def cancel(self) -> int:
+        """Returns the number of calls aborted."""
+        with self._lock:
+            self._cancelled.set()
+            sockets, self._sockets = self._sockets, set()
+        for sock in sockets:
+            _shutdown(sock)
+        return len(sockets)
+
+    def _attach(self, sock: socket.socket) -> bool:
+        with self._lock:
+            if self._cancelled.is_set():
+                return False
+            self._sockets.add(sock)
+            return True
+
+    def _detach(self, sock: socket.socket) -> None:
+        with self._lock:
+            self._sockets.discard(sock)
+
+
+def _shutdown(sock: socket.socket) -> None:
+    try:
+        # wakes the thread blocked in recv; Ollama sees the connection close
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+# the token of the call running in this thread, read by the connection while it waits
+_current = threading.local()
+
+
+class _CancellableConnectionMixin:
+    def getresponse(self, *args, **kwargs):
+        token = getattr(_current, "token", None)
+        sock = self.sock
+        if token is None or sock is None:
+            return super().getresponse(*args, **kwargs)
+        if not token._attach(sock):
+            # cancelled between sending the request and waiting for the answer
+            _shutdown(sock)
+        try:
+            return super().getresponse(*args, **kwargs)
+        finally:
+            token._detach(sock)
+
+
+class _CancellableHTTPConnection(_CancellableConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CancellableHTTPSConnection(_CancellableConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _CancellableHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _CancellableHTTPConnection
+
+
+class _CancellableHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _CancellableHTTPSConnection
+
+
+class _CancellableAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CancellableHTTPPool,
+            "https": _CancellableHTTPSPool,
+        }
+
+
+# one session for all calls: connections to Ollama are reused, and every call can be cancelled
+_session = requests.Session()
+_session.mount("http://", _CancellableAdapter(pool_maxsize=OLLAMA_POOL_SIZE))
+_session.mount("https://", _CancellableAdapter(pool_maxsize=OLLAMA_POOL_SIZE))
+
+CANCELLED = {"answer": None, "status": "cancelled", "error": "cancelled"}
+
+
+def _timings(body: dict) -> dict:
+    # Ollama reports durations in nanoseconds; with a reused KV-cache prefix
+    # prompt_eval_count only covers the newly evaluated tokens
+    return {
+        # time to get the weights into memory, near zero when the model was loaded
+        "load_ms": (body.get("load_duration") or 0) / 1e6,
+        "prompt_eval_count": body.get("prompt_eval_count"),
+        "prompt_eval_ms": (body.get("prompt_eval_duration") or 0) / 1e6,
+        "eval_count": body.get("eval_count"),
+        "eval_ms": (body.get("eval_duration") or 0) / 1e6,
+        "ollama_total_ms": (body.get("total_duration") or 0) / 1e6,
+    }
 
 
 def ask_llm_with_timeout(
     ollama_base: str,
-    prompt: str,
+    prompt: str | None,
     timeout: int,
     model_name: str,
     num_ctx: int = 4096,
+    response_format: dict | None = None,
+    messages: list[dict] | None = None,
+    keep_alive: int | str | None = None,
+    cancel: CancelToken | None = None,
 ) -> dict:
+    """
+    One non-streaming completion: /api/generate for a plain prompt,
+    /api/chat when messages are given. With a cancel token the call is not
+    sent once it is cancelled, and aborted while it waits.
+    """
+    if cancel is not None and cancel.cancelled:
+        return dict(CANCELLED)
+    payload = {
+        "model": model_name,
+        "stream": False,
+        "think": False,
+        "options": {**GENERATION_OPTIONS, "num_ctx": num_ctx},
+    }
+    if messages is not None:
+        endpoint = "/api/chat"
+        payload["messages"] = messages
+    else:
+        endpoint = "/api/generate"
+        payload["prompt"] = prompt
+    if keep_alive is not None:
+        # how long the model stays loaded after this call, None -> Ollama's default
+        payload["keep_alive"] = keep_alive
+    if response_format is not None:
+        # JSON schema the response is constrained to (Ollama structured outputs)
+        payload["format"] = response_format
+    _current.token = cancel
     try:
-        response = requests.post(
-            f"{ollama_base}/api/generate",
-            json={
-                "model": model_name,
-                "prompt": prompt,
-                "stream": False,
-                "think": False,
-                "options": {"temperature": 0, "seed": 42},
-            },
+        response = _session.post(
+            f"{ollama_base}{endpoint}",
+            json=payload,
             timeout=timeout,
         )
         if response.status_code == 404:
             return {"answer": None, "status": "model_missing", "error": "model_not_available"}
         response.raise_for_status()
-        ans = (response.json().get("response") or "").strip()
-        return {"answer": ans if ans else None, "status": "ok", "error": None}
+        body = response.json()
+        if messages is not None:
+            ans = ((body.get("message") or {}).get("content") or "").strip()
+        else:
+            ans = (body.get("response") or "").strip()
+        return {
+            "answer": ans if ans else None,
+            "status": "ok",
+            "error": None,
+            "timings": _timings(body),
+        }
     except requests.exceptions.Timeout:
         return {"answer": None, "status": "timeout", "error": "timeout"}
     except Exception as e:
+        if cancel is not None and cancel.cancelled:
+            return dict(CANCELLED)
         return {"answer": None, "status": "error", "error": str(e)}
+    finally:
+        _current.token = None
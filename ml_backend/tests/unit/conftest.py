@@ -0,0 +1,75 @@
+# ml_backend/tests/unit/conftest.py
+
+import pytest
+from domain import predict
+from domain.models.predict import (
+    LabelStudioConfig,
+    LLMConfig,
+    PredictCommand,
+    QuestionsAndLabels,
+)
+from domain.utils.dom_extract import extract_dom_with_lxml
+
+
+class FakeLlm:
+    """Stands in for ask_llm_with_timeout: records every call and answers with reply(call)."""
+
+    def __init__(self):
+        self.calls = []
+        self.reply = lambda call: {"answer": "Pneumonie", "status": "ok", "error": None}
+
+    def __call__(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.reply(kwargs)
+
+    @staticmethod
+    def text(call):
+        """The text the question is asked about, whichever prompt layout built the call."""
+        return call["prompt"] or call["messages"][-1]["content"]
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """run_predict without browser, caches, Ollama or Label Studio."""
+    llm = FakeLlm()
+    monkeypatch.setattr(predict, "get_dom_cache", lambda: None)
+    monkeypatch.setattr(predict, "get_llm_cache", lambda: None)
+    monkeypatch.setattr(predict, "extract_dom", lambda html, **kw: extract_dom_with_lxml(html))
+    monkeypatch.setattr(predict, "ask_llm_with_timeout", llm)
+    monkeypatch.setattr(predict, "save_predictions_to_labelstudio", lambda **kwargs: None)
+    return llm
+
+
+@pytest.fixture
+def make_cmd():
+    """PredictCommand factory; keywords other than the task's go to LLMConfig."""
+
+    def _cmd(
+        html="<p>Diagnose: Pneumonie</p>",
+        questions=("Diagnose?",),
+        labels=None,
+        job_id="job-1",
+        **llm_config,
+    ):
+        return PredictCommand(
+            job_id=job_id,
+            task_id="1",
+            filename="a.html",
+            html=html,
+            questions_and_labels=QuestionsAndLabels(
+                questions=list(questions),
+                labels=list(labels or (f"L{i}" for i in range(len(questions)))),
+            ),
+            llm_config=LLMConfig(
+                **{
+                    "ollama_model": "llama3",
+                    "ollama_base": "http://ollama:11434",
+                    "system_prompt": "Extract.",
+                    "llm_timeout_seconds": 5,
+                    **llm_config,
+                }
+            ),
+            label_studio_config=LabelStudioConfig(label_studio_url="http://ls", ls_token="t"),
+        )
+
+    return _cmd
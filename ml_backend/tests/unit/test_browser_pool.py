@@ -0,0 +1,212 @@
+# ml_backend/tests/unit/test_browser_pool.py
+
+import threading
+
+import pytest
+from domain.utils.browser_pool import BrowserPool
+from domain.utils.perf_collector import PerfCollector
+
+
+class FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.pages = []
+
+    def is_connected(self):
+        return self.connected
+
+    def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+    def close(self):
+        self.closed = True
+        self.connected = False
+
+
+class FakePlaywright:
+    """Stands in for the sync_playwright() context manager."""
+
+    def __init__(self, fail_launch=False):
+        self.fail_launch = fail_launch
+        self.browsers = []
+        self.chromium = self
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def launch(self, headless=True):
+        if self.fail_launch:
+            raise RuntimeError("Executable doesn't exist")
+        browser = FakeBrowser()
+        self.browsers.append(browser)
+        return browser
+
+
+@pytest.fixture
+def fake_pw():
+    return FakePlaywright()
+
+
+def make_pool(fake_pw, **kwargs):
+    kwargs.setdefault("size", 1)
+    kwargs.setdefault("max_pages_per_browser", 100)
+    kwargs.setdefault("acquire_timeout", 5)
+    return BrowserPool(playwright_factory=fake_pw, **kwargs)
+
+
+# --- reuse ---
+
+
+def test_run_reuses_warm_browser_with_fresh_pages(fake_pw):
+    pool = make_pool(fake_pw)
+    try:
+        first = pool.run(lambda page: page)
+        second = pool.run(lambda page: page)
+    finally:
+        pool.close()
+
+    assert len(fake_pw.browsers) == 1
+    assert first is not second
+    assert first.browser is second.browser
+    assert first.closed and second.closed
+
+
+def test_run_executes_on_slot_thread(fake_pw):
+    pool = make_pool(fake_pw)
+    try:
+        thread_name = pool.run(lambda page: threading.current_thread().name)
+    finally:
+        pool.close()
+
+    assert thread_name.startswith("browser-pool-")
+    assert thread_name != threading.current_thread().name
+
+
+def test_warm_launches_all_browsers(fake_pw):
+    pool = make_pool(fake_pw, size=3)
+    try:
+        pool.warm()
+        stats = pool.stats()
+    finally:
+        pool.close()
+
+    assert stats["launched"] == 3
+    assert stats["idle"] == 3
+    assert len(fake_pw.browsers) == 3
+
+
+# --- health / recycling ---
+
+
+def test_browser_recycled_after_max_pages(fake_pw):
+    pool = make_pool(fake_pw, max_pages_per_browser=2)
+    try:
+        for _ in range(5):
+            pool.run(lambda page: None)
+        stats = pool.stats()
+    finally:
+        pool.close()
+
+    assert stats["launches"] == 3
+    assert stats["pages_served"] == 5
+    assert all(b.closed for b in fake_pw.browsers)
+
+
+def test_disconnected_browser_is_relaunched(fake_pw):
+    pool = make_pool(fake_pw)
+    try:
+        first = pool.run(lambda page: page.browser)
+        first.connected = False
+        second = pool.run(lambda page: page.browser)
+    finally:
+        pool.close()
+
+    assert first is not second
+    assert len(fake_pw.browsers) == 2
+
+
+def test_error_in_fn_propagates_and_releases_slot(fake_pw):
+    pool = make_pool(fake_pw)
+
+    def boom(page):
+        raise ValueError("bad html")
+
+    try:
+        with pytest.raises(ValueError):
+            pool.run(boom)
+        assert pool.run(lambda page: "ok") == "ok"
+        assert pool.stats()["idle"] == 1
+    finally:
+        pool.close()
+
+
+def test_launch_failure_is_raised_to_caller():
+    pool = make_pool(FakePlaywright(fail_launch=True))
+    with pytest.raises(RuntimeError):
+        pool.run(lambda page: None)
+    assert pool.stats()["launched"] == 0
+    pool.close()
+
+
+# --- bounded size ---
+
+
+def test_acquire_times_out_when_pool_exhausted(fake_pw):
+    pool = make_pool(fake_pw, acquire_timeout=0.05)
+    release = threading.Event()
+    busy = threading.Event()
+
+    def hold(page):
+        busy.set()
+        release.wait(5)
+
+    t = threading.Thread(target=pool.run, args=(hold,))
+    t.start()
+    try:
+        assert busy.wait(5)
+        with pytest.raises(TimeoutError):
+            pool.run(lambda page: None)
+    finally:
+        release.set()
+        t.join(5)
+        pool.close()
+
+    assert len(fake_pw.browsers) == 1
+
+
+# --- perf ---
+
+
+def test_run_records_pool_perf_events_outside_total(fake_pw):
+    pool = make_pool(fake_pw)
+    perf = PerfCollector()
+    try:
+        with perf.measure("dom.extract"):
+            pool.run(lambda page: None, perf=perf)
+    finally:
+        pool.close()
+
+    names = [e["name"] for e in perf.to_dict(include_events=True)["events"]]
+    assert names == ["dom.pool_wait", "dom.pool_borrow", "dom.extract"]
+
+    req = perf.to_dict()["request"]
+    assert req["task_ms_total"] == pytest.approx(req["task_ms_dom_extract"])
+    assert req["task_ms_dom_pool_borrow"] <= req["task_ms_dom_extract"]
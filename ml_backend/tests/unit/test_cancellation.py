@@ -0,0 +1,158 @@
+# ml_backend/tests/unit/test_cancellation.py
+
+import socket
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from app import create_app
+from domain import predict
+from domain.cancellation import CancelRegistry
+from domain.errors import InvalidState
+from infrastructure.ollama import CancelToken, ask_llm_with_timeout
+
+
+@pytest.fixture
+def silent_ollama():
+    """Accepts connections and never answers, like Ollama busy evaluating a long prompt."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    closed = threading.Event()
+
+    def _serve():
+        conn, _ = server.accept()
+        while conn.recv(65536):
+            pass
+        closed.set()  # the client went away
+        conn.close()
+
+    threading.Thread(target=_serve, daemon=True).start()
+    yield f"http://127.0.0.1:{server.getsockname()[1]}", closed
+    server.close()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+# --- ask_llm_with_timeout ---
+
+
+def test_cancel_aborts_a_call_waiting_for_ollama(silent_ollama):
+    base, closed = silent_ollama
+    token = CancelToken()
+    results = []
+    call = threading.Thread(
+        target=lambda: results.append(
+            ask_llm_with_timeout(base, "Extract.", 30, "llama3", cancel=token)
+        )
+    )
+    call.start()
+    _wait_for(lambda: token.in_flight == 1)
+
+    start = time.monotonic()
+    assert token.cancel() == 1
+    call.join(5)
+
+    assert time.monotonic() - start < 2
+    assert results == [{"answer": None, "status": "cancelled", "error": "cancelled"}]
+    assert closed.wait(5)
+
+
+def test_calls_of_a_cancelled_job_are_not_sent():
+    token = CancelToken()
+    token.cancel()
+
+    with patch("infrastructure.ollama._session.post") as post:
+        result = ask_llm_with_timeout("http://ollama:11434", "Extract.", 5, "llama3", cancel=token)
+
+    post.assert_not_called()
+    assert result["status"] == "cancelled"
+
+
+# --- registry ---
+
+
+def test_cancel_before_the_first_task_is_kept_for_the_job():
+    registry = CancelRegistry()
+
+    assert registry.cancel("job-1") == 0
+    assert registry.token("job-1").cancelled
+    assert not registry.token("job-2").cancelled
+
+
+def test_idle_tokens_expire():
+    registry = CancelRegistry(ttl_seconds=0)
+    first = registry.token("job-1")
+    first.cancel()
+
+    assert registry.token("job-1") is not first
+
+
+# --- run_predict ---
+
+
+@pytest.fixture
+def registry(fake_llm, monkeypatch):
+    registry = CancelRegistry()
+    monkeypatch.setattr(predict, "get_cancel_registry", lambda: registry)
+    return registry
+
+
+def test_task_of_a_cancelled_job_is_refused(registry, fake_llm, make_cmd):
+    registry.cancel("job-1")
+
+    with pytest.raises(InvalidState) as err:
+        predict.run_predict(make_cmd(job_id="job-1"))
+
+    assert err.value.code == "JOB_CANCELLED"
+    assert fake_llm.calls == []
+
+
+def test_task_cancelled_midway_is_not_saved(registry, fake_llm, make_cmd):
+    def reply(call):
+        registry.cancel("job-1")
+        return {"answer": None, "status": "cancelled", "error": "cancelled"}
+
+    fake_llm.reply = reply
+    with patch.object(predict, "save_predictions_to_labelstudio") as save:
+        with pytest.raises(InvalidState):
+            predict.run_predict(make_cmd(job_id="job-1", questions=["Diagnose?", "Alter?"]))
+
+    save.assert_not_called()
+
+
+# --- route ---
+
+
+def test_cancel_route_reports_aborted_calls(monkeypatch):
+    registry = CancelRegistry()
+    monkeypatch.setattr("api.routes.predict.get_cancel_registry", lambda: registry)
+    app = create_app()
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        res = client.post("/cancel/job-7")
+
+    assert res.status_code == 200
+    assert res.get_json() == {"job_id": "job-7", "aborted": 0}
+    assert registry.token("job-7").cancelled
+
+
+def test_clearing_the_cancel_lets_a_resumed_job_run(monkeypatch):
+    registry = CancelRegistry()
+    registry.cancel("job-7")
+    monkeypatch.setattr("api.routes.predict.get_cancel_registry", lambda: registry)
+    app = create_app()
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        res = client.delete("/cancel/job-7")
+
+    assert res.get_json() == {"job_id": "job-7", "cleared": True}
+    assert not registry.token("job-7").cancelled
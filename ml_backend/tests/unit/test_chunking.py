@@ -0,0 +1,171 @@
+# ml_backend/tests/unit/test_chunking.py
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from domain import predict
+from domain.utils.chunking import (
+    CHARS_PER_TOKEN,
+    NO_MATCH,
+    chunk_token_budget,
+    is_confident,
+    reduce_chunk_answers,
+    split_into_chunks,
+)
+from infrastructure.ollama import ask_llm_with_timeout
+
+# --- split_into_chunks ---
+
+
+def test_text_within_budget_is_one_chunk():
+    assert split_into_chunks("Diagnose: Pneumonie\nAlter: 54", max_tokens=100) == [
+        "Diagnose: Pneumonie\nAlter: 54"
+    ]
+
+
+def test_chunks_follow_block_boundaries_and_fit_the_budget():
+    lines = [f"Befund {i}: " + "unauffällig " * 5 for i in range(40)]
+    chunks = split_into_chunks("\n".join(lines), max_tokens=100)
+
+    assert len(chunks) > 1
+    assert all(len(c) <= 100 * CHARS_PER_TOKEN for c in chunks)
+    # no block is cut, every block is in some chunk
+    assert all(line in lines for c in chunks for line in c.split("\n"))
+    assert {line for c in chunks for line in c.split("\n")} == set(lines)
+
+
+def test_consecutive_chunks_overlap_by_one_block():
+    lines = [f"Befund {i}: " + "unauffällig " * 5 for i in range(40)]
+    chunks = split_into_chunks("\n".join(lines), max_tokens=100)
+
+    for previous, following in zip(chunks, chunks[1:], strict=False):
+        assert following.split("\n")[0] == previous.split("\n")[-1]
+
+
+def test_overlong_block_is_split_at_sentences():
+    sentence = "Der Patient wurde stationär aufgenommen. "
+    chunks = split_into_chunks(sentence * 40, max_tokens=50)
+
+    assert len(chunks) > 1
+    assert all(len(c) <= 50 * CHARS_PER_TOKEN for c in chunks)
+    assert all(c.rstrip().endswith(".") for c in chunks)
+
+
+def test_budget_leaves_room_for_prompt_in_num_ctx():
+    assert chunk_token_budget(num_ctx=8192, chunk_tokens=3072) == 3072
+    assert chunk_token_budget(num_ctx=4096, chunk_tokens=8000) == 3072
+    assert chunk_token_budget(num_ctx=1024, chunk_tokens=3072) == 256
+
+
+# --- reduce ---
+
+
+def _ok(answer):
+    return {"answer": answer, "status": "ok", "error": None}
+
+
+def test_confident_means_found_in_its_chunk():
+    assert is_confident("Pneu monie", "Diagnose: Pneu monie")
+    assert not is_confident("Sepsis", "Diagnose: Pneumonie")
+    assert not is_confident(NO_MATCH, "Diagnose: Pneumonie")
+    assert not is_confident(None, "Diagnose: Pneumonie")
+
+
+def test_reduce_prefers_grounded_then_any_answer_then_no_match():
+    chunks = ["Alter: 54", "Diagnose: Pneumonie", "Diagnose: Sepsis"]
+    timeout = {"answer": None, "status": "timeout", "error": "timeout"}
+
+    assert reduce_chunk_answers([_ok("Sepsis"), _ok("Pneumonie"), None], chunks) == (
+        _ok("Pneumonie"),
+        1,
+    )
+    assert reduce_chunk_answers([_ok(NO_MATCH), _ok("Fieber"), None], chunks) == (
+        _ok("Fieber"),
+        1,
+    )
+    assert reduce_chunk_answers([timeout, _ok(NO_MATCH), _ok(None)], chunks) == (
+        _ok(NO_MATCH),
+        1,
+    )
+    assert reduce_chunk_answers([timeout, timeout, None], chunks) == (timeout, 0)
+
+
+# --- ollama ---
+
+
+def test_num_ctx_is_sent_to_ollama():
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"response": "54"}
+    with patch("infrastructure.ollama._session.post", return_value=response) as post:
+        ask_llm_with_timeout("http://ollama:11434", "Extract.", 5, "llama3", num_ctx=8192)
+
+    assert post.call_args.kwargs["json"]["options"]["num_ctx"] == 8192
+
+
+# --- run_predict ---
+
+BLOCKS = [f"<p>Abschnitt {i}: " + "ohne Befund " * 30 + "</p>" for i in range(8)]
+
+
+# num_ctx=1024 -> 256-token (768-character) chunks, two blocks each
+TASK = {"html": "".join(BLOCKS), "questions": ["Welcher Abschnitt?"], "num_ctx": 1024}
+
+
+@pytest.fixture
+def answer_in(fake_llm):
+    """The block the answer is found in."""
+    answer_in = {"block": 5}
+
+    def reply(call):
+        if f"Abschnitt {answer_in['block']}:" in fake_llm.text(call):
+            return _ok(f"Abschnitt {answer_in['block']}")
+        return _ok(NO_MATCH)
+
+    fake_llm.reply = reply
+    return answer_in
+
+
+def _chunk_events(meta):
+    return [e for e in meta["performance"]["events"] if e["name"] == "llm.call"]
+
+
+def test_full_mode_sends_the_whole_text_once(fake_llm, answer_in, make_cmd):
+    out = predict.run_predict(make_cmd(**TASK, context_mode="full"))
+
+    assert len(fake_llm.calls) == 1
+    assert out["meta"]["context_chunks"] == 1
+    assert out["meta"]["raw_llm_answers"]["L0"]["chunk"] is None
+
+
+def test_chunks_are_asked_in_order_until_a_grounded_answer(fake_llm, answer_in, make_cmd):
+    out = predict.run_predict(make_cmd(**TASK, context_mode="chunked"))
+    meta = out["meta"]
+
+    n_chunks = meta["context_chunks"]
+    texts = [fake_llm.text(c) for c in fake_llm.calls]
+    found_in = next(i for i, text in enumerate(texts) if "Abschnitt 5:" in text)
+    assert n_chunks > found_in + 1  # chunks after the answer were skipped
+    assert len(texts) == found_in + 1
+    assert [e["tags"]["chunk"] for e in _chunk_events(meta)] == list(range(found_in + 1))
+    assert all(e["tags"]["n_chunks"] == n_chunks for e in _chunk_events(meta))
+    assert meta["raw_llm_answers"]["L0"]["answer"] == "Abschnitt 5"
+    assert meta["raw_llm_answers"]["L0"]["chunk"] == found_in
+    assert out["result"][0]["value"]["text"] == "Abschnitt 5"
+
+
+def test_parallel_waves_stop_after_the_wave_with_the_answer(fake_llm, answer_in, make_cmd):
+    out = predict.run_predict(make_cmd(**TASK, context_mode="chunked", max_concurrency=2))
+
+    found_in = out["meta"]["raw_llm_answers"]["L0"]["chunk"]
+    wave_end = (found_in // 2 + 1) * 2
+    assert len(fake_llm.calls) == min(wave_end, out["meta"]["context_chunks"])
+
+
+def test_no_match_in_every_chunk_is_no_match(fake_llm, answer_in, make_cmd):
+    answer_in["block"] = 99
+
+    out = predict.run_predict(make_cmd(**TASK, context_mode="chunked"))
+
+    assert len(fake_llm.calls) == out["meta"]["context_chunks"]
+    assert out["meta"]["raw_llm_answers"]["L0"]["answer"] == NO_MATCH
+    assert out["meta"]["status"] == "success"
@@ -0,0 +1,155 @@
+# ml_backend/tests/unit/test_dom_cache.py
+
+import hashlib
+import os
+import pickle
+
+import pytest
+from domain import predict
+from domain.utils.dom_extract import extract_dom_with_lxml
+from infrastructure import dom_cache
+from infrastructure.dom_cache import CachedDocument, DomCache, entry_size, html_hash
+
+HTML = "<p>Diagnose: Pneumonie</p>"
+
+
+def _doc(text="Pneumonie"):
+    return CachedDocument(dom=extract_dom_with_lxml(f"<p>{text}</p>"), puretext=text)
+
+
+def _size(entry):
+    return len(pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def test_html_hash_matches_worker_conversion_html_hash():
+    # worker_conversion: hashlib.sha256(html_content.encode("utf-8")).hexdigest()
+    assert html_hash("ä") == hashlib.sha256("ä".encode("utf-8")).hexdigest()
+    assert html_hash(HTML) != html_hash(HTML + " ")
+
+
+# --- memory tier ---
+
+
+def test_get_returns_put_entry_and_counts_hits_and_misses():
+    cache = DomCache(max_bytes=10**6, cache_dir=None)
+    assert cache.get("a") is None
+
+    entry = _doc()
+    cache.put("a", entry)
+
+    assert cache.get("a") is entry
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_memory_tier_evicts_least_recently_used_by_size():
+    size = entry_size(_doc("x" * 100))
+    cache = DomCache(max_bytes=size * 2 + 10, cache_dir=None)
+
+    cache.put("a", _doc("a" * 100))
+    cache.put("b", _doc("b" * 100))
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", _doc("c" * 100))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["bytes"] <= size * 2 + 10
+
+
+def test_memory_tier_does_not_serialize_entries(monkeypatch):
+    def no_pickle(*args, **kwargs):
+        raise AssertionError("pickled without a disk tier")
+
+    monkeypatch.setattr(dom_cache.pickle, "dumps", no_pickle)
+    entry = _doc("x" * 100)
+    cache = DomCache(max_bytes=10**6, cache_dir=None)
+    cache.put("a", entry)
+    assert cache.stats()["bytes"] == entry_size(entry)
+
+
+def test_entry_larger_than_memory_tier_is_not_kept():
+    cache = DomCache(max_bytes=10, cache_dir=None)
+    cache.put("a", _doc())
+    assert cache.get("a") is None
+
+
+# --- disk tier ---
+
+
+def test_disk_tier_survives_a_new_cache_instance(tmp_path):
+    DomCache(max_bytes=10**6, cache_dir=str(tmp_path)).put("a", _doc())
+
+    restarted = DomCache(max_bytes=10**6, cache_dir=str(tmp_path))
+    entry = restarted.get("a")
+
+    assert entry is not None
+    assert entry.puretext == "Pneumonie"
+    assert entry.dom.to_records() == _doc().dom.to_records()
+    assert restarted.stats()["entries"] == 1  # promoted to memory
+
+
+def test_disk_tier_evicts_least_recently_used_files(tmp_path):
+    entry_size = _size(_doc("x" * 100))
+    cache = DomCache(max_bytes=0, cache_dir=str(tmp_path), disk_max_bytes=entry_size * 2 + 10)
+
+    cache.put("a", _doc("a" * 100))
+    cache.put("b", _doc("b" * 100))
+    # pin last-use times, file systems may not resolve sub-second mtimes
+    for age, key in enumerate(["a", "b"], start=1):
+        os.utime(next(tmp_path.glob(f"{key}.*.pkl")), (age, age))
+    cache.put("c", _doc("c" * 100))
+
+    names = sorted(p.name.split(".")[0] for p in tmp_path.glob("*.pkl"))
+    assert names == ["b", "c"]
+    assert cache.stats()["disk_bytes"] <= entry_size * 2 + 10
+
+
+def test_corrupt_disk_entry_is_a_miss_and_removed(tmp_path):
+    cache = DomCache(max_bytes=0, cache_dir=str(tmp_path))
+    cache.put("a", _doc())
+    path = next(tmp_path.glob("*.pkl"))
+    path.write_bytes(b"not a pickle")
+
+    assert cache.get("a") is None
+    assert not path.exists()
+
+
+def test_failed_disk_write_keeps_the_memory_entry(tmp_path, monkeypatch):
+    def disk_full(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(dom_cache.tempfile, "mkstemp", disk_full)
+    cache = DomCache(max_bytes=10**6, cache_dir=str(tmp_path))
+    cache.put("a", _doc())
+
+    assert cache.get("a") is not None
+    assert list(tmp_path.iterdir()) == []
+    assert cache.stats()["disk_bytes"] == 0
+
+
+# --- run_predict ---
+
+
+@pytest.fixture
+def extractions(fake_llm, monkeypatch):
+    cache = DomCache(max_bytes=10**6, cache_dir=None)
+    extractions = []
+
+    def fake_extract(html, engine=None, perf=None):
+        extractions.append(html)
+        return extract_dom_with_lxml(html)
+
+    monkeypatch.setattr(predict, "get_dom_cache", lambda: cache)
+    monkeypatch.setattr(predict, "extract_dom", fake_extract)
+    return extractions
+
+
+def test_second_predict_on_same_html_skips_extraction(extractions, make_cmd):
+    first = predict.run_predict(make_cmd(html=HTML))
+    second = predict.run_predict(make_cmd(html=HTML))
+
+    assert extractions == [HTML]
+    assert (first["meta"]["n_dom_cache_hits"], first["meta"]["n_dom_cache_misses"]) == (0, 1)
+    assert (second["meta"]["n_dom_cache_hits"], second["meta"]["n_dom_cache_misses"]) == (1, 0)
+    assert second["result"][0]["value"] == first["result"][0]["value"]
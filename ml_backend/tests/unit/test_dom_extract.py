@@ -0,0 +1,230 @@
+# ml_backend/tests/unit/test_dom_extract.py
+
+from pathlib import Path
+
+import pytest
+from domain.utils import dom_extract
+from domain.utils.browser_pool import get_browser_pool
+from domain.utils.normalization import build_norm_index, normalize_xpath_for_labelstudio
+
+HTML = """<!DOCTYPE html>
+<html><head><title>t</title></head>
+<body>
+  <h2>Befund</h2>
+  <p>Diagnose:&nbsp;Pneumonie</p>
+  <p></p>
+  <div id="sec-1"><p>Erste Zeile</p><span>x</span><p>Zwei&shy;te Zeile</p></div>
+  <table><tbody><tr><td>Alter</td><td>54</td></tr><tr><td>Ort</td><td>Köln</td></tr></tbody></table>
+  <ul><li>eins</li><li><b>zwei</b> drei</li></ul>
+</body></html>"""
+
+FIXTURES_DIR = Path(__file__).resolve().parents[1] / "fixtures" / "dom"
+# HTML renditions of the e2e documents are picked up too when present in a checkout
+E2E_DATA_DIR = Path(__file__).resolve().parents[3] / "tests" / "e2e" / "data"
+PARITY_DOCUMENTS = sorted(FIXTURES_DIR.glob("*.html")) + sorted(E2E_DATA_DIR.glob("**/*.html"))
+
+# per-element extraction as it was done before the single-pass walker,
+# kept here as the reference for byte-identical output
+_LEGACY_XPATH_JS = """el => {
+    function getXPath(e) {
+        if (e.id) return '//*[@id="' + e.id + '"]';
+        if (e === document.body) return '/html/body';
+        let ix = 1;
+        const siblings = e.parentNode ? e.parentNode.childNodes : [];
+        for (let i = 0; i < siblings.length; i++) {
+            const s = siblings[i];
+            if (s === e) return getXPath(e.parentNode) + '/' + e.tagName.toLowerCase() + '[' + ix + ']';
+            if (s.nodeType === 1 && s.tagName === e.tagName) ix++;
+        }
+        return '';
+    }
+    return getXPath(el);
+}"""
+
+
+def _legacy_extract(page, html):
+    extracted = []
+    page.set_content(html, wait_until="domcontentloaded")
+    for el in page.query_selector_all("body *"):
+        raw_text = page.evaluate("el => el.textContent", el) or ""
+        norm_text, index_map = build_norm_index(raw_text)
+        if not norm_text:
+            continue
+        xpath = page.evaluate(_LEGACY_XPATH_JS, el)
+        extracted.append(
+            {
+                "xpath": normalize_xpath_for_labelstudio(xpath),
+                "raw": raw_text,
+                "content": norm_text,
+                "index_map": list(index_map),
+            }
+        )
+    return extracted
+
+
+class FakePage:
+    def __init__(self, walked):
+        self.walked = walked
+        self.evaluate_calls = 0
+
+    def set_content(self, html, wait_until=None):
+        self.html = html
+
+    def evaluate(self, script, *args):
+        self.evaluate_calls += 1
+        return self.walked
+
+
+class FakePool:
+    def __init__(self, page):
+        self.page = page
+
+    def run(self, fn, perf=None):
+        return fn(self.page)
+
+
+@pytest.fixture
+def chromium_pool():
+    pool = get_browser_pool()
+    try:
+        pool.run(lambda page: None)
+    except Exception:
+        pytest.skip("Chromium is not available")
+    return pool
+
+
+# --- post-processing ---
+
+
+def test_extract_uses_single_evaluate_and_builds_index(monkeypatch):
+    page = FakePage(
+        {
+            "chunks": ["Diagnose: Pneumonie", "\n\n", "Zwei\u00adte"],
+            "nodes": [
+                ["/html/body/p[1]", -1, 0, 1],
+                ["/html/body/div[1]", -1, 1, 3],
+                ["/html/body/div[1]/p[1]", 1, 2, 3],
+                ["/html/body/div[1]/br[1]", 1, 3, 3],
+            ],
+        }
+    )
+    monkeypatch.setattr(dom_extract, "get_browser_pool", lambda: FakePool(page))
+
+    records = dom_extract.extract_dom_with_chromium("<p>ignored</p>").to_records()
+
+    assert page.evaluate_calls == 1
+    assert records == [
+        {
+            "xpath": "/p[1]",
+            "raw": "Diagnose: Pneumonie",
+            "content": "Diagnose: Pneumonie",
+            "index_map": list(range(19)),
+        },
+        {
+            "xpath": "/div[1]",
+            "raw": "\n\nZwei\u00adte",
+            "content": "Zweite",
+            "index_map": [2, 3, 4, 5, 7, 8],
+        },
+        {
+            "xpath": "/div[1]/p[1]",
+            "raw": "Zwei\u00adte",
+            "content": "Zweite",
+            "index_map": [0, 1, 2, 3, 5, 6],
+        },
+    ]
+
+
+# --- parity with the per-element extraction (needs Chromium) ---
+
+
+def test_walker_matches_legacy_extraction(chromium_pool):
+    legacy = chromium_pool.run(lambda page: _legacy_extract(page, HTML))
+    walked = dom_extract.extract_dom_with_chromium(HTML).to_records()
+
+    assert walked == legacy
+
+
+def test_walker_matches_legacy_extraction_on_fixtures(chromium_pool):
+    for path in sorted(FIXTURES_DIR.glob("*.html")):
+        html = path.read_text(encoding="utf-8")
+        legacy = chromium_pool.run(lambda page, html=html: _legacy_extract(page, html))
+        assert dom_extract.extract_dom_with_chromium(html).to_records() == legacy, path.name
+
+
+# --- lxml engine ---
+
+
+def _xpaths_and_raw(index):
+    return [(r["xpath"], r["raw"]) for r in index.to_records()]
+
+
+def test_lxml_builds_xpaths_like_the_browser_walker():
+    html = (
+        "<body><div id='a'><p>one</p><span>x</span><p>two</p></div><div><p>three</p></div></body>"
+    )
+    assert _xpaths_and_raw(dom_extract.extract_dom_with_lxml(html)) == [
+        ('//*[@id="a"]', "onextwo"),
+        ('//*[@id="a"]/p[1]', "one"),
+        ('//*[@id="a"]/span[1]', "x"),
+        ('//*[@id="a"]/p[2]', "two"),
+        ("/div[2]", "three"),
+        ("/div[2]/p[1]", "three"),
+    ]
+
+
+def test_lxml_emulates_text_content():
+    html = (
+        "<p>a<!-- note -->b<i>c</i>d</p>"
+        "<template><p>hidden</p></template>"
+        "<svg><foreignObject>f</foreignObject></svg>"
+        "<p>crlf\r\nline</p>"
+    )
+    assert _xpaths_and_raw(dom_extract.extract_dom_with_lxml(html)) == [
+        ("/p[1]", "abcd"),
+        ("/p[1]/i[1]", "c"),
+        ("/svg[1]", "f"),
+        ("/svg[1]/foreignobject[1]", "f"),
+        ("/p[2]", "crlf\nline"),
+    ]
+
+
+def test_lxml_records_are_normalized():
+    records = dom_extract.extract_dom_with_lxml("<p>Typ&nbsp;2 Dia&shy;betes</p>").to_records()
+    assert records == [
+        {
+            "xpath": "/p[1]",
+            "raw": "Typ\u00a02 Dia\u00adbetes",
+            "content": "Typ 2 Diabetes",
+            "index_map": [0, 1, 2, 3, 4, 5, 6, 7, 8, 10, 11, 12, 13, 14],
+        }
+    ]
+
+
+def test_extract_dom_dispatches_by_engine(monkeypatch):
+    monkeypatch.setattr(
+        dom_extract, "extract_dom_with_chromium", lambda html, perf=None: "chromium"
+    )
+    monkeypatch.setattr(dom_extract, "extract_dom_with_lxml", lambda html: "lxml")
+
+    assert dom_extract.extract_dom("<p>x</p>", engine="lxml") == "lxml"
+    assert dom_extract.extract_dom("<p>x</p>", engine="chromium") == "chromium"
+
+    monkeypatch.setattr(dom_extract, "DOM_EXTRACT_ENGINE", "lxml")
+    assert dom_extract.extract_dom("<p>x</p>") == "lxml"
+
+    with pytest.raises(ValueError):
+        dom_extract.extract_dom("<p>x</p>", engine="webkit")
+
+
+# --- engine parity (needs Chromium) ---
+
+
+@pytest.mark.parametrize("path", PARITY_DOCUMENTS, ids=lambda p: p.name)
+def test_lxml_matches_chromium(chromium_pool, path):
+    html = path.read_text(encoding="utf-8")
+    chromium = dom_extract.extract_dom_with_chromium(html).to_records()
+    lxml = dom_extract.extract_dom_with_lxml(html).to_records()
+
+    assert [r["xpath"] for r in lxml] == [r["xpath"] for r in chromium]
+    assert lxml == chromium
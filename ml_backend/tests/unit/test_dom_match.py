@@ -0,0 +1,172 @@
+# ml_backend/tests/unit/test_dom_match.py
+
+import re
+from pathlib import Path
+
+import pytest
+from domain.utils.dom_extract import extract_dom_with_lxml
+from domain.utils.dom_index import DomIndex
+from domain.utils.dom_match import extract_xpath_matches_from_dom
+from domain.utils.normalization import normalize_text_block
+
+FIXTURES_DIR = Path(__file__).resolve().parents[1] / "fixtures" / "dom"
+
+
+def _legacy_locate(records, normalized_answer):
+    """Matching as done on per-element records before the compact index."""
+    for el in sorted(records, key=lambda el: len(el["content"])):
+        offset = el["content"].find(normalized_answer)
+        if offset == -1:
+            continue
+        index_map = el["index_map"]
+        return (
+            el["xpath"],
+            index_map[offset],
+            index_map[offset + len(normalized_answer) - 1] + 1,
+        )
+    return None
+
+
+def _strip_ids(matches):
+    return [{k: v for k, v in m.items() if k != "id"} for m in matches]
+
+
+def _answers(texts):
+    return [{"label": f"L{i}", "question": "q", "answer": t} for i, t in enumerate(texts)]
+
+
+# --- DomIndex ---
+
+
+def test_index_keeps_text_once_and_maps_elements_to_ranges():
+    index = DomIndex.from_chunks(
+        ["\n", "Alter", "54", "\n"],
+        [
+            ["/html/body/table[1]", -1, 0, 4],
+            ["/html/body/table[1]/td[1]", 0, 1, 2],
+            ["/html/body/table[1]/td[2]", 0, 2, 3],
+        ],
+    )
+
+    assert index.content == "Alter54"
+    assert index.xpaths == ["/table[1]", "/table[1]/td[1]", "/table[1]/td[2]"]
+    assert list(index.starts) == [0, 0, 5]
+    assert list(index.ends) == [7, 5, 7]
+    assert list(index.parents) == [-1, 0, 0]
+    assert index.to_records()[0]["raw"] == "\nAlter54\n"
+    assert index.to_records()[0]["index_map"] == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_locate_prefers_tightest_then_outermost_element():
+    index = extract_dom_with_lxml(
+        "<div><section><p>Pneumonie</p></section><p>Pneumonie links</p></div>"
+    )
+
+    node, start, end = index.locate("Pneumonie")
+    # <section> and its <p> share the same text; sorting by length picked the outer one
+    assert index.xpaths[node] == "/div[1]/section[1]"
+    assert (start, end) == (0, 9)
+
+    node, _, _ = index.locate("Pneumonie links")
+    assert index.xpaths[node] == "/div[1]/p[1]"
+
+
+def test_locate_spanning_siblings_resolves_to_parent():
+    index = extract_dom_with_lxml("<p><b>Typ</b> 2 <i>Diabetes</i></p>")
+
+    node, start, end = index.locate("Typ 2 Diabetes")
+    assert index.xpaths[node] == "/p[1]"
+    assert (start, end) == (0, 14)
+
+
+def test_locate_maps_offsets_to_raw_text_with_astral_characters():
+    index = extract_dom_with_lxml("<p>\U0001f600 Dia&shy;gnose: Pneu&nbsp;monie</p>")
+
+    node, start, end = index.locate("Pneu monie")
+    raw = index.to_records()[node]["raw"]
+    assert raw[start:end] == "Pneu monie"
+
+
+def test_locate_returns_none_when_missing():
+    index = extract_dom_with_lxml("<p>Befund</p>")
+    assert index.locate("Diagnose") is None
+    assert index.locate("") is None
+
+
+# --- extract_xpath_matches_from_dom ---
+
+
+def test_matches_and_diagnostics_format():
+    index = extract_dom_with_lxml("<div><p>Diagnose: Pneumonie</p><p>Therapie</p></div>")
+    matches, diagnostics = extract_xpath_matches_from_dom(
+        index,
+        _answers(["Pneumonie", "Sepsis", "", "   "]),
+    )
+
+    assert _strip_ids(matches) == [
+        {
+            "from_name": "label",
+            "to_name": "html",
+            "type": "labels",
+            "origin": "prediction",
+            "value": {
+                "start": "/div[1]/p[1]",
+                "end": "/div[1]/p[1]",
+                "startOffset": 10,
+                "endOffset": 19,
+                "labels": ["L0"],
+                "text": "Pneumonie",
+            },
+        }
+    ]
+    assert diagnostics == [{"label": "L1", "reason": "Not found in any content block"}]
+
+
+def test_shared_answers_are_located_once(monkeypatch):
+    index = extract_dom_with_lxml("<p>Ja</p><p>Nein</p>")
+    calls = []
+    locate = DomIndex.locate
+    monkeypatch.setattr(DomIndex, "locate", lambda self, n: calls.append(n) or locate(self, n))
+
+    matches, diagnostics = extract_xpath_matches_from_dom(
+        index, _answers(["Ja", "Nein", " Ja ", "Ja", "Vielleicht", "Vielleicht"])
+    )
+
+    assert sorted(calls) == ["Ja", "Nein", "Vielleicht"]
+    assert [m["value"]["labels"] for m in matches] == [["L0"], ["L1"], ["L2"], ["L3"]]
+    assert [m["value"]["start"] for m in matches] == ["/p[1]", "/p[2]", "/p[1]", "/p[1]"]
+    assert [m["value"]["text"] for m in matches][2] == " Ja "
+    assert diagnostics == [
+        {"label": "L4", "reason": "Not found in any content block"},
+        {"label": "L5", "reason": "Not found in any content block"},
+    ]
+
+    # nothing is kept on the index, which the DOM cache shares across tasks
+    extract_xpath_matches_from_dom(index, _answers(["Nein"]))
+    assert len(calls) == 4
+
+
+@pytest.mark.parametrize("path", sorted(FIXTURES_DIR.glob("*.html")), ids=lambda p: p.name)
+def test_matches_agree_with_per_element_matching(path):
+    index = extract_dom_with_lxml(path.read_text(encoding="utf-8"))
+    records = index.to_records()
+
+    # every word, every element text and some cross-element spans
+    texts = set(re.findall(r"\w+", index.content))
+    texts |= {r["raw"] for r in records}
+    texts |= {index.content[i : i + 25] for i in range(0, len(index.content), 7)}
+    texts |= {"not in this document"}
+
+    matches, diagnostics = extract_xpath_matches_from_dom(index, _answers(sorted(texts)))
+    by_label = {m["value"]["labels"][0]: m["value"] for m in matches}
+    missing = {d["label"] for d in diagnostics}
+
+    for ans in _answers(sorted(texts)):
+        expected = _legacy_locate(records, normalize_text_block(ans["answer"]))
+        if not normalize_text_block(ans["answer"]):
+            continue
+        if expected is None:
+            assert ans["label"] in missing
+            continue
+        value = by_label[ans["label"]]
+        assert (value["start"], value["startOffset"], value["endOffset"]) == expected
@@ -0,0 +1,164 @@
+# ml_backend/tests/unit/test_llm_cache.py
+
+import pytest
+from domain import predict
+from infrastructure import llm_cache
+from infrastructure.llm_cache import LlmResponseCache, response_key
+
+REQUEST = {"prompt": "Extract.\n\nQuestion: Diagnose?", "options": {"temperature": 0, "seed": 42}}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    return now
+
+
+# --- response_key ---
+
+
+def test_key_depends_on_digest_and_every_request_field():
+    key = response_key("sha256:a", REQUEST)
+
+    assert key == response_key("sha256:a", dict(reversed(REQUEST.items())))
+    assert key != response_key("sha256:b", REQUEST)
+    assert key != response_key("sha256:a", {**REQUEST, "prompt": "Extract.\n\nQuestion: Alter?"})
+    assert key != response_key("sha256:a", {**REQUEST, "options": {"temperature": 0, "seed": 1}})
+    assert key != response_key("sha256:a", {**REQUEST, "response_format": {"type": "object"}})
+
+
+# --- LlmResponseCache ---
+
+
+def test_put_then_get_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "llm" / "responses.sqlite3")
+    cache = LlmResponseCache(path)
+    assert cache.get("a") is None
+
+    cache.put("a", "Pneumonie")
+    cache.put("b", None)  # "no answer" is an answer too
+    cache.close()
+
+    restarted = LlmResponseCache(path)
+    assert restarted.get("a") == {"answer": "Pneumonie"}
+    assert restarted.get("b") == {"answer": None}
+    assert restarted.stats()["entries"] == 2
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = LlmResponseCache(str(tmp_path / "c.sqlite3"), ttl_seconds=60)
+    cache.put("a", "Pneumonie")
+
+    clock[0] += 59
+    assert cache.get("a") is not None
+    clock[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted_by_size(tmp_path, clock):
+    entry_size = len("a") + len("x" * 100)
+    cache = LlmResponseCache(str(tmp_path / "c.sqlite3"), max_bytes=entry_size * 2)
+
+    cache.put("a", "x" * 100)
+    clock[0] += 1
+    cache.put("b", "x" * 100)
+    clock[0] += 1
+    cache.get("a")  # "b" is now the least recently used
+    clock[0] += 1
+    cache.put("c", "x" * 100)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["bytes"] <= entry_size * 2
+
+
+def test_stored_total_follows_every_write_without_summing(tmp_path, clock):
+    import sqlite3
+
+    path = tmp_path / "c.sqlite3"
+    legacy = sqlite3.connect(path)  # a file from before cache_meta
+    legacy.execute(
+        "CREATE TABLE responses (key TEXT PRIMARY KEY, answer TEXT, size INTEGER NOT NULL,"
+        " created_at REAL NOT NULL, last_used REAL NOT NULL)"
+    )
+    legacy.execute("INSERT INTO responses VALUES ('old', 'x', 4, ?, ?)", (clock[0], clock[0]))
+    legacy.commit()
+    legacy.close()
+
+    cache = LlmResponseCache(str(path), max_bytes=50, ttl_seconds=60)
+    assert cache.stats()["bytes"] == 4
+    cache.put("a", "x" * 10)
+    cache.put("a", "x" * 20)  # replaced, counted once
+    clock[0] += 61
+    cache.put("b", "x" * 30)  # "old" and "a" expire
+    cache.put("c", "x" * 30)  # "b" is evicted
+
+    actual = cache._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    assert cache.stats()["bytes"] == actual == 31
+
+
+# --- run_predict ---
+
+DIGEST = "sha256:a"
+
+
+@pytest.fixture
+def llm_calls(fake_llm, monkeypatch, tmp_path):
+    cache = LlmResponseCache(str(tmp_path / "responses.sqlite3"))
+    monkeypatch.setattr(predict, "get_llm_cache", lambda: cache)
+    return fake_llm.calls
+
+
+def test_rerun_only_pays_for_new_prompts(llm_calls, make_cmd):
+    first = predict.run_predict(make_cmd(model_digest=DIGEST))
+    # e.g. a label was added to the project
+    second = predict.run_predict(make_cmd(model_digest=DIGEST, questions=("Diagnose?", "Alter?")))
+
+    assert len(llm_calls) == 2
+    assert first["meta"]["raw_llm_answers"]["L0"]["cached"] is False
+    assert second["meta"]["raw_llm_answers"]["L0"]["cached"] is True
+    assert second["meta"]["raw_llm_answers"]["L1"]["cached"] is False
+    assert second["meta"]["raw_llm_answers"]["L0"]["answer"] == "Pneumonie"
+    assert (second["meta"]["n_llm_cache_hits"], second["meta"]["n_llm_cache_misses"]) == (1, 1)
+    assert second["meta"]["n_llm_calls"] == 1
+    assert second["result"][0]["value"] == first["result"][0]["value"]
+
+
+def test_other_model_digest_is_not_served_from_cache(llm_calls, make_cmd):
+    predict.run_predict(make_cmd(model_digest=DIGEST))
+    predict.run_predict(make_cmd(model_digest="sha256:b"))
+
+    assert len(llm_calls) == 2
+
+
+def test_bypass_asks_again_and_refreshes(llm_calls, make_cmd):
+    predict.run_predict(make_cmd(model_digest=DIGEST))
+    bypassed = predict.run_predict(make_cmd(model_digest=DIGEST, use_llm_cache=False))
+
+    assert len(llm_calls) == 2
+    assert bypassed["meta"]["raw_llm_answers"]["L0"]["cached"] is False
+    tags = [e["tags"] for e in bypassed["meta"]["performance"]["events"] if e["name"] == "llm.call"]
+    assert tags[0]["cache"] == "bypass"
+
+
+def test_without_digest_nothing_is_cached(llm_calls, make_cmd):
+    predict.run_predict(make_cmd(model_digest=None))
+    out = predict.run_predict(make_cmd(model_digest=None))
+
+    assert len(llm_calls) == 2
+    assert (out["meta"]["n_llm_cache_hits"], out["meta"]["n_llm_cache_misses"]) == (0, 0)
+
+
+@pytest.mark.parametrize("status", ["timeout", "error"])
+def test_failed_calls_are_not_cached(fake_llm, llm_calls, make_cmd, status):
+    ok = fake_llm.reply
+    fake_llm.reply = lambda call: {"answer": None, "status": status, "error": "boom"}
+    predict.run_predict(make_cmd(model_digest=DIGEST))
+    fake_llm.reply = ok
+    out = predict.run_predict(make_cmd(model_digest=DIGEST))
+
+    assert len(llm_calls) == 2
+    assert out["meta"]["raw_llm_answers"]["L0"]["answer"] == "Pneumonie"
@@ -0,0 +1,138 @@
+# ml_backend/tests/unit/test_multi_question.py
+
+import json
+
+import pytest
+from domain import predict
+from domain.utils.multi_question import (
+    build_answer_schema,
+    build_multi_question_instruction,
+    parse_multi_question_answer,
+)
+
+HTML = "<p>Diagnose: Pneumonie</p><p>Alter: 54</p>"
+QUESTIONS = ["Diagnose?", "Alter?"]
+LABELS = ["diagnosis", "age"]
+TASK = {"html": HTML, "questions": QUESTIONS, "labels": LABELS}
+
+
+# --- prompt, schema, parsing ---
+
+
+def test_schema_requires_one_string_per_label():
+    assert build_answer_schema(LABELS) == {
+        "type": "object",
+        "properties": {"diagnosis": {"type": "string"}, "age": {"type": "string"}},
+        "required": ["diagnosis", "age"],
+    }
+
+
+def test_instruction_lists_every_question_by_label():
+    instruction = build_multi_question_instruction(zip(QUESTIONS, LABELS))
+    assert instruction.endswith("Questions:\n- diagnosis: Diagnose?\n- age: Alter?")
+
+
+@pytest.mark.parametrize(
+    "answer, expected",
+    [
+        ('{"diagnosis": " Pneumonie ", "age": "54"}', {"diagnosis": "Pneumonie", "age": "54"}),
+        ('{"diagnosis": "Pneumonie", "age": 54}', {"diagnosis": "Pneumonie"}),
+        ('{"diagnosis": ""}', {"diagnosis": None}),
+        ('["Pneumonie", "54"]', {}),
+        ('{"diagnosis": "Pneu', {}),
+        (None, {}),
+    ],
+)
+def test_parse_keeps_only_string_answers_of_known_labels(answer, expected):
+    assert parse_multi_question_answer(answer, LABELS) == expected
+
+
+# --- run_predict ---
+
+
+@pytest.fixture
+def replies(fake_llm):
+    """Answers per question; the one-call answer is set by each test as "multi"."""
+    replies = {"Diagnose?": "Pneumonie", "Alter?": "54"}
+
+    def reply(call):
+        if call.get("response_format") is not None:
+            return replies["multi"]
+        question = next(q for q in QUESTIONS if f"Question: {q}" in fake_llm.text(call))
+        return {"answer": replies[question], "status": "ok", "error": None}
+
+    fake_llm.reply = reply
+    return replies
+
+
+MULTI_OK = {
+    "answer": json.dumps({"diagnosis": "Pneumonie", "age": "54"}),
+    "status": "ok",
+    "error": None,
+}
+
+
+def _answers(meta):
+    return {lab: v["answer"] for lab, v in meta["raw_llm_answers"].items()}
+
+
+def test_multi_question_answers_all_labels_with_one_call(fake_llm, replies, make_cmd):
+    replies["multi"] = MULTI_OK
+
+    out = predict.run_predict(make_cmd(**TASK, extraction_mode="multi_question"))
+
+    assert len(fake_llm.calls) == 1
+    assert fake_llm.calls[0]["response_format"] == build_answer_schema(LABELS)
+    assert _answers(out["meta"]) == {"diagnosis": "Pneumonie", "age": "54"}
+    assert [r["value"]["labels"] for r in out["result"]] == [["diagnosis"], ["age"]]
+    assert out["meta"]["extraction_mode"] == "multi_question"
+    assert (out["meta"]["n_llm_calls"], out["meta"]["n_llm_fallbacks"]) == (1, 0)
+
+
+def test_multi_question_matches_per_question_predictions(replies, make_cmd):
+    replies["multi"] = MULTI_OK
+
+    def strip(result):
+        return [{k: v for k, v in r.items() if k != "id"} for r in result]
+
+    multi = predict.run_predict(make_cmd(**TASK, extraction_mode="multi_question"))
+    single = predict.run_predict(make_cmd(**TASK, extraction_mode="per_question"))
+    assert strip(multi["result"]) == strip(single["result"])
+    assert _answers(multi["meta"]) == _answers(single["meta"])
+
+
+@pytest.mark.parametrize(
+    "reply, asked_again",
+    [
+        ({"answer": "not json", "status": "ok", "error": None}, ["Diagnose?", "Alter?"]),
+        ({"answer": '{"diagnosis": "Pneumonie"}', "status": "ok", "error": None}, ["Alter?"]),
+        ({"answer": None, "status": "error", "error": "400 Bad Request"}, ["Diagnose?", "Alter?"]),
+    ],
+)
+def test_unusable_labels_degrade_to_per_question_calls(
+    fake_llm, replies, make_cmd, reply, asked_again
+):
+    replies["multi"] = reply
+
+    out = predict.run_predict(make_cmd(**TASK, extraction_mode="multi_question"))
+
+    calls = fake_llm.calls
+    per_question = [fake_llm.text(c) for c in calls[1:]]
+    assert all("response_format" not in c for c in calls[1:])
+    assert [q for q in QUESTIONS if any(f"Question: {q}" in p for p in per_question)] == (
+        asked_again
+    )
+    assert _answers(out["meta"]) == {"diagnosis": "Pneumonie", "age": "54"}
+    assert out["meta"]["n_llm_fallbacks"] == len(asked_again)
+    assert out["meta"]["n_llm_calls"] == 1 + len(asked_again)
+
+
+def test_multi_question_timeout_is_not_retried_per_question(fake_llm, replies, make_cmd):
+    replies["multi"] = {"answer": None, "status": "timeout", "error": "timeout"}
+
+    out = predict.run_predict(make_cmd(**TASK, extraction_mode="multi_question"))
+
+    assert len(fake_llm.calls) == 1
+    assert out["meta"]["status"] == "timeout"
+    assert {v["status"] for v in out["meta"]["raw_llm_answers"].values()} == {"timeout"}
+    assert out["result"] == []
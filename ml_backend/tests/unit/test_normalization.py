@@ -0,0 +1,49 @@
+# ml_backend/tests/unit/test_normalization.py
+
+import random
+
+import pytest
+from domain.utils.normalization import build_norm_index, norm_char
+
+
+def _reference_build_norm_index(original_text):
+    """Per-character implementation the fast path has to reproduce."""
+    norm_parts, index_map = [], []
+    for i, ch in enumerate(original_text):
+        n = norm_char(ch)
+        norm_parts.append(n)
+        index_map.extend([i] * len(n))
+    return "".join(norm_parts), index_map
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "plain ascii",
+        "line one\r\nline two\n",
+        "\n\n\n",
+        "Dia\u00adgnose:\u00a0Pneumonie",
+        "ﬁnale ﬂ Kontrolle",  # ligatures expand
+        "3×/d, 39,2 °C, ½ Tablette, ²",
+        "Ｆｕｌｌｗｉｄｔｈ ＡＢＣ",
+        "e\u0301 vs \u00e9, \u212b (angstrom sign)",
+        "emoji \U0001f600 and [brackets] ^carets- \\backslash",
+        "\u00ad\u00ad",
+    ],
+)
+def test_build_norm_index_matches_per_character_normalization(text):
+    norm_text, index_map = build_norm_index(text)
+    expected_text, expected_map = _reference_build_norm_index(text)
+
+    assert norm_text == expected_text
+    assert list(index_map) == expected_map
+
+
+def test_build_norm_index_random_mix():
+    alphabet = "ab c\n\r\u00ad\u00a0ﬁ½é\u0301Ｆ\U0001f600]^-\\"
+    rng = random.Random(42)
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        norm_text, index_map = build_norm_index(text)
+        assert (norm_text, list(index_map)) == _reference_build_norm_index(text)
@@ -0,0 +1,218 @@
+# ml_backend/tests/unit/test_predict_batch.py
+
+import threading
+import time
+
+import pytest
+from app import create_app
+from domain.errors import ExternalServiceError, NotFound
+from domain.models.predict import (
+    BatchTask,
+    LabelStudioConfig,
+    LLMConfig,
+    PredictBatchCommand,
+    QuestionsAndLabels,
+)
+from domain.predict_batch import PredictBatchScheduler
+
+COMMAND = PredictBatchCommand(
+    job_id="job-1",
+    questions_and_labels=QuestionsAndLabels(questions=["Diagnose?"], labels=["diagnosis"]),
+    llm_config=LLMConfig(
+        ollama_model="llama3",
+        ollama_base="http://ollama:11434",
+        system_prompt="Extract.",
+        llm_timeout_seconds=5,
+    ),
+    label_studio_config=LabelStudioConfig(label_studio_url="http://ls", ls_token="t"),
+)
+
+
+def _tasks(*ids):
+    return [BatchTask(task_id=str(i), filename=f"{i}.html", html="<p>x</p>") for i in ids]
+
+
+class FakePredict:
+    """Blocks every task until released; task "bad" fails like a Label Studio outage."""
+
+    def __init__(self):
+        self.started = []
+        self.release = threading.Event()
+
+    def __call__(self, cmd):
+        self.started.append(cmd.task_id)
+        self.release.wait(5)
+        if cmd.task_id == "bad":
+            raise ExternalServiceError(code="LABEL_STUDIO_WRITE_FAILED", message="down")
+        return {"model_version": "llama3", "score": 1.0, "result": [], "meta": {"t": cmd.task_id}}
+
+
+@pytest.fixture
+def fake_predict():
+    fake = FakePredict()
+    yield fake
+    fake.release.set()
+
+
+# --- scheduler ---
+
+
+def test_submit_returns_at_once_and_results_arrive_by_cursor(fake_predict):
+    scheduler = PredictBatchScheduler(workers=2, predict=fake_predict)
+
+    summary = scheduler.create(COMMAND, _tasks(1, 2, 3))
+    assert (summary["submitted"], summary["pending"]) == (3, 3)
+    assert scheduler.results(summary["batch_id"])["outcomes"] == []
+
+    fake_predict.release.set()
+    seen, cursor = [], 0
+    while len(seen) < 3:
+        out = scheduler.results(summary["batch_id"], after=cursor, wait=5)
+        seen += [o.task_id for o in out["outcomes"]]
+        cursor = out["cursor"]
+
+    assert sorted(seen) == ["1", "2", "3"]
+    assert out["pending"] == 0
+    assert scheduler.results(summary["batch_id"], after=cursor)["outcomes"] == []
+
+
+def test_outcomes_before_the_read_cursor_are_dropped(fake_predict):
+    scheduler = PredictBatchScheduler(workers=1, predict=fake_predict)
+    batch_id = scheduler.create(COMMAND, _tasks(1, 2, 3))["batch_id"]
+    fake_predict.release.set()
+    while scheduler.results(batch_id)["pending"]:
+        time.sleep(0.01)
+
+    first = scheduler.results(batch_id, after=0)
+    # a lost answer can be read again until the next cursor is confirmed
+    assert scheduler.results(batch_id, after=0)["outcomes"] == first["outcomes"]
+    out = scheduler.results(batch_id, after=2)
+    assert [o.task_id for o in out["outcomes"]] == [first["outcomes"][2].task_id]
+    assert (out["cursor"], out["pending"]) == (3, 0)
+    assert len(scheduler._batches[batch_id].outcomes) == 1
+    assert scheduler.results(batch_id, after=3)["outcomes"] == []
+    assert scheduler._batches[batch_id].outcomes == []
+
+
+def test_pool_bounds_tasks_in_progress_across_batches(fake_predict):
+    scheduler = PredictBatchScheduler(workers=2, predict=fake_predict)
+    first = scheduler.create(COMMAND, _tasks(1, 2))
+    scheduler.create(COMMAND, _tasks(3))
+
+    scheduler.results(first["batch_id"], wait=0.2)
+    assert sorted(fake_predict.started) == ["1", "2"]
+
+
+def test_tasks_can_be_added_to_an_open_batch(fake_predict):
+    scheduler = PredictBatchScheduler(workers=1, predict=fake_predict)
+    batch_id = scheduler.create(COMMAND, _tasks(1))["batch_id"]
+
+    assert scheduler.submit(batch_id, _tasks(2, 3))["submitted"] == 3
+    fake_predict.release.set()
+    out = scheduler.results(batch_id, wait=5)
+    while out["pending"]:
+        out = scheduler.results(batch_id, wait=5)
+    assert [o.response["meta"]["t"] for o in out["outcomes"]] == ["1", "2", "3"]
+
+
+def test_failing_task_is_reported_and_the_rest_go_on(fake_predict):
+    scheduler = PredictBatchScheduler(workers=1, predict=fake_predict)
+    batch_id = scheduler.create(COMMAND, _tasks("bad", 2))["batch_id"]
+
+    fake_predict.release.set()
+    outcomes = []
+    while len(outcomes) < 2:
+        outcomes += scheduler.results(batch_id, after=len(outcomes), wait=5)["outcomes"]
+
+    assert isinstance(outcomes[0].error, ExternalServiceError)
+    assert outcomes[1].response is not None
+
+
+def test_close_drops_queued_tasks(fake_predict):
+    scheduler = PredictBatchScheduler(workers=1, predict=fake_predict)
+    batch_id = scheduler.create(COMMAND, _tasks(1, 2, 3))["batch_id"]
+    scheduler.results(batch_id, wait=0.1)
+
+    assert scheduler.close(batch_id)["cancelled"] == 2
+    with pytest.raises(NotFound):
+        scheduler.results(batch_id)
+
+
+def test_finished_batches_expire(fake_predict):
+    scheduler = PredictBatchScheduler(workers=1, ttl_seconds=0.5, predict=fake_predict)
+    fake_predict.release.set()
+    batch_id = scheduler.create(COMMAND, _tasks(1))["batch_id"]
+    while scheduler.results(batch_id, wait=5)["pending"]:
+        pass
+
+    time.sleep(0.6)
+    scheduler.create(COMMAND, _tasks(2))
+    with pytest.raises(NotFound):
+        scheduler.results(batch_id)
+
+
+# --- routes ---
+
+BATCH_PAYLOAD = {
+    "job_id": "job-1",
+    "tasks": [
+        {"task_id": "1", "filename": "a.html", "html": "<p>a</p>"},
+        {"task_id": "bad", "filename": "b.html", "html": "<p>b</p>"},
+    ],
+    "questions_and_labels": {"questions": ["Diagnose?"], "labels": ["diagnosis"]},
+    "llm_config": {
+        "ollama_model": "llama3",
+        "ollama_base": "http://ollama:11434",
+        "system_prompt": "Extract.",
+        "llm_timeout_seconds": 20,
+    },
+    "label_studio_config": {"label_studio_url": "http://ls", "ls_token": "t"},
+}
+
+
+@pytest.fixture
+def client(monkeypatch, fake_predict):
+    scheduler = PredictBatchScheduler(workers=2, predict=fake_predict)
+    monkeypatch.setattr("api.routes.predict_batch.get_predict_batch_scheduler", lambda: scheduler)
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+def test_batch_round_trip(client, fake_predict):
+    res = client.post("/predict_batch", json=BATCH_PAYLOAD)
+    assert res.status_code == 202
+    batch_id = res.get_json()["batch_id"]
+
+    res = client.post(
+        f"/predict_batch/{batch_id}/tasks",
+        json={"tasks": [{"task_id": "3", "html": "<p>c</p>"}]},
+    )
+    assert res.get_json()["submitted"] == 3
+
+    fake_predict.release.set()
+    results, cursor = [], 0
+    while len(results) < 3:
+        body = client.get(f"/predict_batch/{batch_id}?after={cursor}&wait=5").get_json()
+        results += body["results"]
+        cursor = body["cursor"]
+
+    by_task = {r["task_id"]: r for r in results}
+    assert by_task["1"]["status_code"] == 200
+    assert by_task["1"]["response"]["meta"] == {"t": "1"}
+    assert by_task["bad"]["status_code"] == 502
+    assert by_task["bad"]["error"]["error"] == "LABEL_STUDIO_WRITE_FAILED"
+
+    assert client.delete(f"/predict_batch/{batch_id}").status_code == 200
+    assert client.get(f"/predict_batch/{batch_id}").status_code == 404
+
+
+def test_batch_without_tasks_returns_422(client):
+    res = client.post("/predict_batch", json={**BATCH_PAYLOAD, "tasks": []})
+    assert res.status_code == 422
+
+
+def test_unknown_batch_returns_404(client):
+    res = client.post("/predict_batch/nope/tasks", json={"tasks": [{"task_id": "1", "html": "x"}]})
+    assert res.status_code == 404
@@ -0,0 +1,65 @@
+# ml_backend/tests/unit/test_predict_concurrency.py
+
+import threading
+import time
+
+import pytest
+from domain import predict
+
+HTML = "<p>Diagnose: Pneumonie</p><p>Alter: 54</p><p>Geschlecht: w</p>"
+QUESTIONS = ["Diagnose?", "Alter?", "Geschlecht?"]
+LABELS = ["diagnosis", "age", "sex"]
+ANSWERS = {"Diagnose?": "Pneumonie", "Alter?": "54", "Geschlecht?": "w"}
+TASK = {"html": HTML, "questions": QUESTIONS, "labels": LABELS}
+
+
+@pytest.fixture
+def llm_calls(fake_llm):
+    """Answers in reverse order of submission and records peak parallelism."""
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def reply(call):
+        question = next(q for q in QUESTIONS if f"Question: {q}" in fake_llm.text(call))
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        # later questions finish first
+        time.sleep(0.01 * (len(QUESTIONS) - QUESTIONS.index(question)))
+        with lock:
+            state["active"] -= 1
+        if question == "Alter?":
+            return {"answer": "<<<NO_MATCH>>>", "status": "timeout", "error": "LLM timed out"}
+        return {"answer": ANSWERS[question], "status": "ok", "error": None}
+
+    fake_llm.reply = reply
+    return state
+
+
+def _strip_ids(result):
+    return [{k: v for k, v in r.items() if k != "id"} for r in result]
+
+
+@pytest.mark.parametrize("max_concurrency", [2, 8])
+def test_concurrent_calls_give_same_result_as_sequential(llm_calls, make_cmd, max_concurrency):
+    sequential = predict.run_predict(make_cmd(**TASK, max_concurrency=1))
+    assert llm_calls["peak"] == 1
+
+    concurrent = predict.run_predict(make_cmd(**TASK, max_concurrency=max_concurrency))
+    assert llm_calls["peak"] == min(max_concurrency, len(QUESTIONS))
+
+    assert _strip_ids(concurrent["result"]) == _strip_ids(sequential["result"])
+    assert [r["value"]["labels"] for r in concurrent["result"]] == [["diagnosis"], ["sex"]]
+    assert concurrent["meta"]["status"] == sequential["meta"]["status"] == "timeout"
+    assert concurrent["meta"]["raw_llm_answers"] == sequential["meta"]["raw_llm_answers"]
+    assert concurrent["meta"]["n_timeouts"] == 1
+
+
+def test_llm_wall_time_is_reported_next_to_summed_call_time(llm_calls, make_cmd):
+    meta = predict.run_predict(make_cmd(**TASK, max_concurrency=3))["meta"]
+
+    assert meta["n_llm_calls"] == 3
+    # ~30 ms + 20 ms + 10 ms of calls overlapping within ~30 ms
+    assert meta["task_ms_llm_wall"] < meta["task_ms_llm_total"]
+    # calls run inside llm.wall and are not counted twice
+    assert meta["task_ms_total"] < meta["task_ms_llm_wall"] + meta["task_ms_llm_total"]
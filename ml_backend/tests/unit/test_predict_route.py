@@ -42,6 +42,7 @@ def test_predict_returns_200(client, monkeypatch):
             "model_version": "llama3",
             "score": 1.0,
             "result": [],
+            "prediction_id": 42,
             "meta": {},
         },
     )
@@ -49,6 +50,7 @@ def test_predict_returns_200(client, monkeypatch):
     assert res.status_code == 200
     data = res.get_json()
     assert data["model_version"] == "llama3"
+    assert data["prediction_id"] == 42
 
 
 # --- 422 contract violations ---
@@ -94,6 +96,21 @@ def test_predict_missing_label_studio_config_returns_422(client):
     assert res.status_code == 422
 
 
+def test_predict_unknown_dom_engine_returns_422(client):
+    payload = {**VALID_PAYLOAD, "dom_engine": "webkit"}
+    res = client.post("/predict", json=payload)
+    assert res.status_code == 422
+
+
+def test_predict_unknown_extraction_mode_returns_422(client):
+    payload = {
+        **VALID_PAYLOAD,
+        "llm_config": {**VALID_PAYLOAD["llm_config"], "extraction_mode": "all_at_once"},
+    }
+    res = client.post("/predict", json=payload)
+    assert res.status_code == 422
+
+
 def test_predict_empty_body_returns_422(client):
     res = client.post("/predict", json={})
     assert res.status_code == 422
@@ -119,6 +136,19 @@ def test_predict_label_studio_unreachable_returns_502(client, monkeypatch):
     assert res.get_json()["error"] == "LABEL_STUDIO_WRITE_FAILED"
 
 
+def test_saved_prediction_id_is_returned():
+    from unittest.mock import MagicMock, patch
+
+    from infrastructure.label_studio import save_predictions_to_labelstudio
+
+    response = MagicMock(status_code=201)
+    response.json.return_value = {"id": 42, "task": 7, "result": []}
+    with patch("infrastructure.label_studio.requests.post", return_value=response):
+        prediction_id = save_predictions_to_labelstudio("http://ls", "t", "llama3", "7", [])
+
+    assert prediction_id == 42
+
+
 # --- 500 response contract violated ---
 
 
@@ -0,0 +1,175 @@
+# ml_backend/tests/unit/test_prompt_layout.py
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+from domain import predict
+from domain.utils.prompt_layout import build_llm_input
+from infrastructure.ollama import ask_llm_with_timeout
+
+DOC = "Diagnose: Pneumonie\nAlter: 54"
+
+
+def _rendered(llm_input):
+    """Text in the order the model reads it."""
+    if llm_input.get("messages"):
+        return "\n".join(m["content"] for m in llm_input["messages"])
+    return llm_input["prompt"]
+
+
+def _common_prefix(a, b):
+    return len(os.path.commonprefix([a, b]))
+
+
+# --- build_llm_input ---
+
+
+def test_question_first_is_the_former_prompt():
+    assert build_llm_input("question_first", "Extract.", DOC, "Question: Alter?") == {
+        "prompt": f"Extract.\n\nQuestion: Alter?\n\nText: {DOC}"
+    }
+
+
+def test_document_first_puts_the_question_last():
+    llm_input = build_llm_input("document_first", "Extract.", DOC, "Question: Alter?")
+
+    assert llm_input["prompt"] is None
+    assert llm_input["messages"][0] == {"role": "system", "content": "Extract."}
+    assert llm_input["messages"][-1]["content"] == f"Text: {DOC}\n\nQuestion: Alter?"
+
+
+def test_only_document_first_shares_the_document_across_questions():
+    def shared(layout):
+        a = _rendered(build_llm_input(layout, "Extract.", DOC, "Question: Diagnose?"))
+        b = _rendered(build_llm_input(layout, "Extract.", DOC, "Question: Alter?"))
+        return _common_prefix(a, b)
+
+    assert shared("document_first") > len(DOC)
+    assert shared("question_first") < len(DOC)
+
+
+def test_unknown_layout_raises():
+    with pytest.raises(ValueError):
+        build_llm_input("document_last", "Extract.", DOC, "Question: Alter?")
+
+
+# --- ask_llm_with_timeout ---
+
+
+def _response(body):
+    response = MagicMock(status_code=200)
+    response.json.return_value = body
+    return response
+
+
+def test_messages_are_sent_to_chat_and_timings_returned():
+    body = {
+        "message": {"role": "assistant", "content": " Pneumonie \n"},
+        "load_duration": 2_000_000_000,
+        "prompt_eval_count": 12,
+        "prompt_eval_duration": 3_500_000,
+        "eval_count": 4,
+        "eval_duration": 80_000_000,
+        "total_duration": 2_090_000_000,
+    }
+    messages = build_llm_input("document_first", "Extract.", DOC, "Question: Diagnose?")
+
+    with patch("infrastructure.ollama._session.post", return_value=_response(body)) as post:
+        result = ask_llm_with_timeout(
+            ollama_base="http://ollama:11434", timeout=5, model_name="llama3", **messages
+        )
+
+    assert post.call_args.args[0] == "http://ollama:11434/api/chat"
+    assert post.call_args.kwargs["json"]["messages"] == messages["messages"]
+    assert "prompt" not in post.call_args.kwargs["json"]
+    assert result["answer"] == "Pneumonie"
+    assert result["timings"] == {
+        "load_ms": 2000.0,
+        "prompt_eval_count": 12,
+        "prompt_eval_ms": 3.5,
+        "eval_count": 4,
+        "eval_ms": 80.0,
+        "ollama_total_ms": 2090.0,
+    }
+
+
+def test_prompt_is_sent_to_generate():
+    with patch(
+        "infrastructure.ollama._session.post", return_value=_response({"response": "54"})
+    ) as post:
+        result = ask_llm_with_timeout("http://ollama:11434", "Extract.", 5, "llama3")
+
+    assert post.call_args.args[0] == "http://ollama:11434/api/generate"
+    assert post.call_args.kwargs["json"]["prompt"] == "Extract."
+    assert result["answer"] == "54"
+    assert result["timings"]["prompt_eval_count"] is None
+    assert result["timings"]["prompt_eval_ms"] == 0.0
+    # no keep_alive -> Ollama's default
+    assert "keep_alive" not in post.call_args.kwargs["json"]
+
+
+def test_keep_alive_is_sent_with_the_call():
+    with patch(
+        "infrastructure.ollama._session.post", return_value=_response({"response": "54"})
+    ) as post:
+        ask_llm_with_timeout("http://ollama:11434", "Extract.", 5, "llama3", keep_alive="30m")
+
+    assert post.call_args.kwargs["json"]["keep_alive"] == "30m"
+
+
+# --- run_predict ---
+
+
+QUESTIONS = ["Diagnose?", "Nebendiagnose?", "Hauptdiagnose?"]
+
+
+@pytest.fixture
+def llm_calls(fake_llm):
+    def reply(call):
+        first = len(fake_llm.calls) == 1
+        # the first call evaluates the whole prompt, later ones only the question
+        count = 500 if first else 10
+        return {
+            "answer": "Pneumonie",
+            "status": "ok",
+            "error": None,
+            "timings": {
+                # only the first call found the model unloaded
+                "load_ms": 1500.0 if first else 5.0,
+                "prompt_eval_count": count,
+                "prompt_eval_ms": count * 2.0,
+                "eval_count": 3,
+                "eval_ms": 60.0,
+            },
+        }
+
+    fake_llm.reply = reply
+    return fake_llm.calls
+
+
+def test_prompt_eval_is_recorded_per_call_and_summed(llm_calls, make_cmd):
+    out = predict.run_predict(make_cmd(questions=QUESTIONS, prompt_layout="document_first"))
+    meta = out["meta"]
+
+    assert meta["prompt_layout"] == "document_first"
+    assert all(c["messages"][0]["content"] == "Extract." for c in llm_calls)
+    calls = [e for e in meta["performance"]["events"] if e["name"] == "llm.call"]
+    assert [e["tags"]["prompt_eval_count"] for e in calls] == [500, 10, 10]
+    assert meta["n_llm_prompt_eval_tokens"] == 520
+    assert meta["task_ms_llm_prompt_eval"] == 1040.0
+    assert meta["task_ms_llm_load"] == 1510.0
+    assert (meta["n_llm_eval_tokens"], meta["task_ms_llm_eval"]) == (9, 180.0)
+
+
+def test_request_can_select_the_former_layout(llm_calls, make_cmd):
+    out = predict.run_predict(make_cmd(questions=QUESTIONS, prompt_layout="question_first"))
+
+    assert out["meta"]["prompt_layout"] == "question_first"
+    assert llm_calls[0]["prompt"] == "Extract.\n\nQuestion: Diagnose?\n\nText: Diagnose: Pneumonie"
+
+
+def test_every_call_holds_the_model_for_keep_alive(llm_calls, make_cmd):
+    predict.run_predict(make_cmd(questions=QUESTIONS, keep_alive=-1))
+
+    assert [c["keep_alive"] for c in llm_calls] == [-1, -1, -1]
@@ -0,0 +1,122 @@
+# ml_backend/tests/unit/test_retrieval.py
+
+import pytest
+from domain import predict
+from domain.utils.retrieval import (
+    GAP_MARKER,
+    Bm25Index,
+    passages_text,
+    select_passages,
+    tokenize,
+)
+
+BLOCKS = [
+    "Entlassungsbrief",
+    "Patient: Max Mustermann",
+    "Alter",
+    "54 Jahre",
+    "Hauptdiagnose",
+    "Ambulant erworbene Pneumonie",
+    "Therapie",
+    "Ceftriaxon 2 g i.v. über 7 Tage",
+    "Verlauf",
+    "Der Patient wurde nach 7 Tagen entlassen.",
+]
+
+
+def test_tokenize_casefolds_and_drops_single_letters():
+    assert tokenize("Ceftriaxon 2 g i.v.") == ["ceftriaxon", "2"]
+
+
+def test_rare_terms_rank_first():
+    index = Bm25Index(BLOCKS)
+    ranked = index.search("Welche Therapie bekam der Patient?")
+
+    assert ranked[0][0] == 6  # "therapie" occurs once, "patient" twice
+    assert {i for i, _ in ranked} == {1, 6, 9}
+    assert index.search("Röntgen Thorax") == []
+
+
+def test_passages_come_with_their_neighbours_in_document_order():
+    index = Bm25Index(BLOCKS)
+
+    passages = select_passages(index, ["Hauptdiagnose?"], top_k=1, max_tokens=1000)
+
+    assert passages == [3, 4, 5]
+    assert (
+        passages_text(BLOCKS, passages) == "54 Jahre\nHauptdiagnose\nAmbulant erworbene Pneumonie"
+    )
+
+
+def test_left_out_blocks_are_marked():
+    assert passages_text(BLOCKS, [2, 3, 6, 7]) == f"Alter\n54 Jahre\n{GAP_MARKER}\nTherapie\n" + (
+        "Ceftriaxon 2 g i.v. über 7 Tage"
+    )
+
+
+def test_passages_that_do_not_fit_the_budget_are_skipped():
+    index = Bm25Index(BLOCKS)
+
+    # 30 tokens = 90 characters: after the "Therapie" window (blocks 5-7) the "Verlauf"
+    # window no longer fits, but block 8 as neighbour of the third hit still does
+    passages = select_passages(index, ["Verlauf Therapie Tage"], top_k=3, max_tokens=30)
+
+    assert passages == [5, 6, 7, 8]
+
+
+def test_every_query_gets_its_best_passage_first():
+    index = Bm25Index(BLOCKS)
+
+    passages = select_passages(index, ["Alter?", "Therapie?"], top_k=1, max_tokens=1000)
+
+    assert passages == [1, 2, 3, 5, 6, 7]
+
+
+# --- run_predict ---
+
+
+TASK = {"html": "".join(f"<p>{b}</p>" for b in BLOCKS), "retrieval_top_k": 1}
+
+
+@pytest.fixture
+def llm_calls(fake_llm):
+    fake_llm.reply = lambda call: {"answer": "54 Jahre", "status": "ok", "error": None}
+    return fake_llm.calls
+
+
+def _text(call):
+    return call["messages"][-1]["content"]
+
+
+def test_question_is_asked_about_its_passages_only(llm_calls, make_cmd):
+    out = predict.run_predict(
+        make_cmd(**TASK, questions=["Wie ist das Alter des Patienten?"], context_mode="retrieval")
+    )
+    meta = out["meta"]
+
+    assert "54 Jahre" in _text(llm_calls[0])
+    assert "Pneumonie" not in _text(llm_calls[0])
+    assert meta["retrieval_top_k"] == 1
+    assert meta["raw_llm_answers"]["L0"]["passages"] == [1, 2, 3]
+    assert out["result"][0]["value"]["text"] == "54 Jahre"
+    call = next(e for e in meta["performance"]["events"] if e["name"] == "llm.call")
+    assert call["tags"]["passages"] == 3
+    assert any(e["name"] == "retrieval.index" for e in meta["performance"]["events"])
+
+
+def test_question_without_matching_terms_sees_the_full_text(llm_calls, make_cmd):
+    out = predict.run_predict(
+        make_cmd(**TASK, questions=["How old is he?"], context_mode="retrieval")
+    )
+
+    assert "Pneumonie" in _text(llm_calls[0])
+    assert out["meta"]["raw_llm_answers"]["L0"]["passages"] is None
+
+
+def test_full_mode_does_not_rank(llm_calls, make_cmd):
+    out = predict.run_predict(
+        make_cmd(**TASK, questions=["Wie ist das Alter?"], context_mode="full")
+    )
+
+    assert "Pneumonie" in _text(llm_calls[0])
+    assert out["meta"]["retrieval_top_k"] is None
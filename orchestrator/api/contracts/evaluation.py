@@ -53,6 +53,10 @@ class ComparisonEntry(BaseModel):
     comparison_prelabelling_run_id: int
     comparison_project: str | None = None
     model: str | None = None
+    extraction_mode: str | None = None  # per_question | multi_question
+    context_mode: str | None = None  # full | chunked | retrieval
+    retrieval_top_k: int | None = None
+    model_load_ms: float | None = None  # model warm-up before the run's first task
     run_at_raw: str | None = None
     metrics: dict
 
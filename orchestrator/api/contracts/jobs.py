@@ -1,5 +1,7 @@
 # orchestrator/api/contracts/jobs.py
 
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -15,9 +17,29 @@ class JobStatusResponse(BaseModel):
     model: str | None = None
     created_at: str | None = None
     error: str | None = None
+    worker: str | None = None  # id of the worker process that took the job
+    attempts: str | None = None  # starts so far, > 1 after a worker died mid-job
+    log_count: str | None = None  # log lines written so far, see /prelabel/logs
+    priority: str | None = None
+    # while PENDING: jobs a worker takes before this one, and when one is expected to
+    # (epoch seconds; an upper bound, every job ahead is assumed to use its full turn)
+    queue_position: int | None = None
+    estimated_start_at: str | None = None
     result: dict | None = None
 
 
+class JobLogsRequest(BaseModel):
+    after: int = Field(default=0, ge=0)  # cursor of the previous read; 0 from the start
+    limit: int = Field(default=200, ge=1, le=1000)
+
+
+class JobLogsResponse(BaseModel):
+    job_id: str
+    lines: list[str]
+    cursor: int  # pass as `after` to read on from here
+    dropped: int  # lines after the given cursor that were already trimmed
+
+
 class QuestionsAndLabels(BaseModel):
     questions: list[str] = Field(..., min_length=1)
     labels: list[str] = Field(..., min_length=1)
@@ -28,6 +50,13 @@ class EnqueueJobRequest(BaseModel):
     model: str = Field(..., min_length=1)
     system_prompt: str = Field(..., min_length=1)
     questions_and_labels: QuestionsAndLabels
+    extraction_mode: Literal["per_question", "multi_question"] = "per_question"
+    use_llm_cache: bool = True  # False: re-ask the model instead of reusing cached answers
+    # retrieval: only the best-ranked text blocks per question are sent to the LLM
+    context_mode: Literal["full", "chunked", "retrieval"] = "full"
+    retrieval_top_k: int = Field(default=8, ge=1)  # passages per question in retrieval mode
+    # interactive (e.g. evaluation runs) is always taken before bulk
+    priority: Literal["interactive", "bulk"] = "bulk"
 
 
 class EnqueueJobResponse(BaseModel):
@@ -36,6 +65,15 @@ class EnqueueJobResponse(BaseModel):
     cancel_url: str
 
 
+class ResumeJobResponse(EnqueueJobResponse):
+    checkpointed_tasks: int  # tasks the run finished before; the worker skips them
+
+
+class CheckpointResponse(BaseModel):
+    job_id: str
+    task_ids: list[int]  # Label Studio tasks with a recorded result in this run
+
+
 class CancelJobResponse(BaseModel):
     job_id: str
     status: str
@@ -67,7 +105,23 @@ class TaskPrelabellingMetaRequest(BaseModel):
     n_timeouts: int
     avg_llm_call_ms: float
     median_llm_call_ms: float
+    # as reported by Ollama, summed over the task's LLM calls (0 from older workers)
+    task_ms_llm_load: float = 0.0
+    task_ms_llm_prompt_eval: float = 0.0
+    n_llm_prompt_eval_tokens: int = 0
+    task_ms_llm_eval: float = 0.0
+    n_llm_eval_tokens: int = 0
 
 
 class TaskPrelabellingMetaResponse(BaseModel):
     status: str
+
+
+class ModelLoadRequest(BaseModel):
+    job_id: str = Field(..., min_length=1)
+    model: str = Field(..., min_length=1)
+    load_ms: float = Field(..., ge=0)  # warm-up before the job's first task
+
+
+class ModelLoadResponse(BaseModel):
+    status: str
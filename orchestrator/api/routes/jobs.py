@@ -3,15 +3,23 @@ from domain.errors import InternalError, Unauthorized, ValidationFailed
 from domain.jobs import (
     cancel_prelabel_job,
     enqueue_prelabel_job,
+    get_checkpoint,
+    get_job_logs,
     get_job_status,
+    handle_model_load,
     handle_prelabel_callback,
     handle_task_prelabelling_meta,
+    resume_prelabel_job,
 )
 from domain.models.jobs import (
     CancelJobCommand,
+    CheckpointCommand,
     EnqueueJobCommand,
+    JobLogsCommand,
     JobStatusCommand,
+    ModelLoadCommand,
     PrelabelCallbackCommand,
+    ResumeJobCommand,
     TaskPrelabellingMetaCommand,
 )
 from flask import jsonify, request
@@ -25,12 +33,18 @@ from pydantic import ValidationError
 from api.contracts.errors import ErrorResponse
 from api.contracts.jobs import (
     CancelJobResponse,
+    CheckpointResponse,
     EnqueueJobRequest,
     EnqueueJobResponse,
+    JobLogsRequest,
+    JobLogsResponse,
     JobStatusRequest,
     JobStatusResponse,
+    ModelLoadRequest,
+    ModelLoadResponse,
     PrelabelCallbackRequest,
     PrelabelCallbackResponse,
+    ResumeJobResponse,
     TaskPrelabellingMetaRequest,
     TaskPrelabellingMetaResponse,
 )
@@ -68,6 +82,36 @@ def register(app, spec, session_factory):
             )
         return jsonify(validated.model_dump()), 200
 
+    @app.route("/prelabel/logs/<job_id>", methods=["GET"])
+    @spec.validate(
+        query=JobLogsRequest,
+        resp=Response(
+            HTTP_200=JobLogsResponse,
+            HTTP_500=ErrorResponse,
+        ),
+        tags=["jobs"],
+    )
+    def prelabel_logs_route(job_id):
+        try:
+            contract = JobLogsRequest.model_validate(dict(request.args or {}))
+        except ValidationError as e:
+            raise ValidationFailed(
+                code="VALIDATION_FAILED",
+                message="Invalid query parameters.",
+                meta={"details": e.errors()},
+            )
+        cmd = JobLogsCommand.from_contract(job_id=job_id, contract=contract)
+        result = get_job_logs(cmd)
+        try:
+            validated = JobLogsResponse.model_validate(result)
+        except ValidationError as e:
+            raise InternalError(
+                code="RESPONSE_CONTRACT_VIOLATED",
+                message="Internal response did not match expected schema.",
+                meta={"details": e.errors()},
+            )
+        return jsonify(validated.model_dump()), 200
+
     @app.route("/prelabel_project", methods=["POST"])
     @spec.validate(
         body=Request(EnqueueJobRequest),
@@ -112,6 +156,74 @@ def register(app, spec, session_factory):
             )
         return jsonify(validated.model_dump()), 200
 
+    @app.route("/prelabel/resume/<job_id>", methods=["POST"])
+    @spec.validate(
+        resp=Response(
+            HTTP_200=ResumeJobResponse,
+            HTTP_400=ErrorResponse,  # invalid job_id
+            HTTP_401=ErrorResponse,  # missing token
+            HTTP_404=ErrorResponse,  # unknown run or model
+            HTTP_409=ErrorResponse,  # run done or still active
+            HTTP_500=ErrorResponse,
+        ),
+        tags=["jobs"],
+    )
+    def prelabel_resume_route(job_id):
+        token = extract_token(request)
+        if not token:
+            raise Unauthorized(
+                code="TOKEN_REQUIRED",
+                message="Authorization token is required.",
+            )
+        cmd = ResumeJobCommand.from_contract(job_id=job_id, token=token)
+        db = session_factory()
+        try:
+            run_repo = PrelabellingRunRepository(db)
+            model_repo = ModelRepository(db)
+            result = resume_prelabel_job(cmd, run_repo=run_repo, model_repo=model_repo)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        try:
+            validated = ResumeJobResponse.model_validate(result)
+        except ValidationError as e:
+            raise InternalError(
+                code="RESPONSE_CONTRACT_VIOLATED",
+                message="Internal response did not match expected schema.",
+                meta={"details": e.errors()},
+            )
+        return jsonify(validated.model_dump()), 200
+
+    @app.route("/prelabel/checkpoint/<job_id>", methods=["GET"])
+    @spec.validate(
+        resp=Response(
+            HTTP_200=CheckpointResponse,
+            HTTP_400=ErrorResponse,
+            HTTP_404=ErrorResponse,
+            HTTP_500=ErrorResponse,
+        ),
+        tags=["jobs"],
+    )
+    def prelabel_checkpoint_route(job_id):
+        cmd = CheckpointCommand.from_contract(job_id=job_id)
+        db = session_factory()
+        try:
+            result = get_checkpoint(cmd, run_repo=PrelabellingRunRepository(db))
+        finally:
+            db.close()
+        try:
+            validated = CheckpointResponse.model_validate(result)
+        except ValidationError as e:
+            raise InternalError(
+                code="RESPONSE_CONTRACT_VIOLATED",
+                message="Internal response did not match expected schema.",
+                meta={"details": e.errors()},
+            )
+        return jsonify(validated.model_dump()), 200
+
     @app.route("/prelabel/cancel/<job_id>", methods=["POST"])
     @spec.validate(
         resp=Response(
@@ -201,3 +313,36 @@ def register(app, spec, session_factory):
                 meta={"details": e.errors()},
             )
         return jsonify(validated.model_dump()), 200
+
+    @app.route("/prelabel/model-load", methods=["POST"])
+    @spec.validate(
+        body=Request(ModelLoadRequest),
+        resp=Response(
+            HTTP_200=ModelLoadResponse,
+            HTTP_404=ErrorResponse,
+            HTTP_500=ErrorResponse,
+        ),
+        tags=["jobs"],
+    )
+    def prelabel_model_load():
+        contract = ModelLoadRequest.model_validate(request.get_json(silent=True) or {})
+        cmd = ModelLoadCommand.from_contract(contract)
+        db = session_factory()
+        try:
+            run_repo = PrelabellingRunRepository(db)
+            result = handle_model_load(cmd, run_repo=run_repo)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        try:
+            validated = ModelLoadResponse.model_validate(result)
+        except ValidationError as e:
+            raise InternalError(
+                code="RESPONSE_CONTRACT_VIOLATED",
+                message="Internal response did not match expected schema.",
+                meta={"details": e.errors()},
+            )
+        return jsonify(validated.model_dump()), 200
@@ -165,6 +165,16 @@ class PrelabellingRun(Base):
     model_id = Column(Integer, ForeignKey("models.id"), nullable=False)
     system_prompt = Column(Text, nullable=True)
     llm_timeout_seconds = Column(Integer, nullable=True)
+    # per_question | multi_question (all questions in one LLM call)
+    extraction_mode = Column(Text, nullable=False, server_default="per_question")
+    # full | chunked (text split to fit num_ctx, questions asked per chunk)
+    # | retrieval (only the retrieval_top_k best-ranked text blocks per question)
+    context_mode = Column(Text, nullable=False, server_default="full")
+    retrieval_top_k = Column(Integer, nullable=True)  # set for context_mode=retrieval only
+    # False: the run re-asked the model instead of reusing cached answers
+    use_llm_cache = Column(Boolean, nullable=False, server_default=text("true"))
+    # worker warm-up before the first task; NULL when the preload failed or had no tasks
+    model_load_ms = Column(Float, nullable=True)
     status = Column(Text, nullable=False, default="pending")  # pending | running | done | failed
     error = Column(Text, nullable=True)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
@@ -190,6 +200,13 @@ class TaskPrelabellingMeta(Base):
     n_timeouts = Column(Integer, nullable=True)
     avg_llm_call_ms = Column(Float, nullable=True)
     median_llm_call_ms = Column(Float, nullable=True)
+    # Ollama's own timings summed over the task's calls: model (re)load, prompt evaluation,
+    # generation; NULL for tasks recorded before they were captured
+    task_ms_llm_load = Column(Float, nullable=True)
+    task_ms_llm_prompt_eval = Column(Float, nullable=True)
+    n_llm_prompt_eval_tokens = Column(Integer, nullable=True)
+    task_ms_llm_eval = Column(Float, nullable=True)
+    n_llm_eval_tokens = Column(Integer, nullable=True)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
 
     __table_args__ = (
@@ -398,12 +398,24 @@ def list_evaluated_projects(project_repo, run_repo, eval_repo) -> list[str]:
     return eval_repo.list_projects_with_evaluations()
 
 
-def _entry_to_dict(evaluation, model_name: str | None, run_project: str | None) -> dict:
+def _entry_to_dict(
+    evaluation,
+    model_name: str | None,
+    run_project: str | None,
+    extraction_mode: str | None = None,
+    context_mode: str | None = None,
+    retrieval_top_k: int | None = None,
+    model_load_ms: float | None = None,
+) -> dict:
     return {
         "groundtruth_project": evaluation.groundtruth_project,
         "comparison_prelabelling_run_id": evaluation.comparison_prelabelling_run_id,
         "comparison_project": run_project,
         "model": model_name,
+        "extraction_mode": extraction_mode,
+        "context_mode": context_mode,
+        "retrieval_top_k": retrieval_top_k,
+        "model_load_ms": model_load_ms,
         "run_at_raw": evaluation.run_at.isoformat() if evaluation.run_at else None,
         "metrics": {
             "micro": evaluation.metrics_micro,
@@ -441,6 +453,14 @@ def get_comparison_view(
         run = run_repo.get_run(e.comparison_prelabelling_run_id)
         model = model_repo.get_by_id(run.model_id) if run else None
         entries.append(
-            _entry_to_dict(e, model.archived_name if model else None, run.project if run else None)
+            _entry_to_dict(
+                e,
+                model.archived_name if model else None,
+                run.project if run else None,
+                run.extraction_mode if run else None,
+                run.context_mode if run else None,
+                run.retrieval_top_k if run else None,
+                run.model_load_ms if run else None,
+            )
         )
     return {"entries": entries}
@@ -66,6 +66,10 @@ def get_regression_view(
                 e,
                 entry_model.archived_name if entry_model else None,
                 entry_run.project if entry_run else None,
+                entry_run.extraction_mode if entry_run else None,
+                entry_run.context_mode if entry_run else None,
+                entry_run.retrieval_top_k if entry_run else None,
+                entry_run.model_load_ms if entry_run else None,
             )
         )
     return {"entries": entries}
@@ -205,6 +209,10 @@ def get_drift_view(
                     e,
                     entry_model.archived_name if entry_model else None,
                     entry_run.project if entry_run else None,
+                    entry_run.extraction_mode if entry_run else None,
+                    entry_run.context_mode if entry_run else None,
+                    entry_run.retrieval_top_k if entry_run else None,
+                    entry_run.model_load_ms if entry_run else None,
                 ),
                 "groundtruth_project": name,
             }
@@ -2,9 +2,10 @@
 from __future__ import annotations
 
 import json
+import math
 import os
 import time
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import redis
 from infrastructure.interfaces.repository import (
@@ -13,12 +14,16 @@ from infrastructure.interfaces.repository import (
     ProjectRepositoryInterface,
 )
 
-from domain.errors import NotFound
+from domain.errors import InvalidState, NotFound
 from domain.models.jobs import (
     CancelJobCommand,
+    CheckpointCommand,
     EnqueueJobCommand,
+    JobLogsCommand,
     JobStatusCommand,
+    ModelLoadCommand,
     PrelabelCallbackCommand,
+    ResumeJobCommand,
     TaskPrelabellingMetaCommand,
 )
 
@@ -26,10 +31,18 @@ REDIS_HOST = os.getenv("REDIS_HOST", "job_queue")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
 
-QUEUE = "prelabel_jobs"
+# one queue per priority class, highest first (see worker/infrastructure/scheduling.py)
+PRIORITY_QUEUES = {"interactive": "prelabel_jobs:interactive", "bulk": "prelabel_jobs"}
+WORKERS = "prelabel_workers"
+PROCESSING = "prelabel_jobs:processing:"  # + worker id
+STATS = "prelabel_stats"  # the workers' seconds per task and turn length
 STATUS = "status:"
 RESULT = "result:"
 LOGS = "logs:"
+# the worker running the job subscribes and aborts its work at once
+CANCEL_CHANNEL = "prelabel_cancel"
+# queued, taken by a worker or about to stop: not resumable yet
+ACTIVE_STATES = ("PENDING", "RUNNING", "CANCEL_REQUESTED")
 
 
 def _status_key(job_id: str) -> str:
@@ -44,6 +57,47 @@ def _logs_key(job_id: str) -> str:
     return f"{LOGS}{job_id}"
 
 
+def _payload_job_id(raw: str) -> str | None:
+    try:
+        return str(json.loads(raw)["job_id"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _queue_estimate(job_id: str) -> Dict[str, Any]:
+    """
+    Position of a queued job across the priority queues and when a worker is
+    expected to take it: the first idle worker takes the next job at once, and
+    every further job ahead is assumed to run a full turn (slice_tasks tasks at
+    the workers' recent seconds per task), shared among the workers.
+    """
+    pipe = r.pipeline()
+    for queue in PRIORITY_QUEUES.values():
+        pipe.lrange(queue, 0, -1)
+    pipe.smembers(WORKERS)
+    pipe.hgetall(STATS)
+    *queues, workers, stats = pipe.execute()
+    ahead = [_payload_job_id(raw) for queue in queues for raw in queue]
+    if job_id not in ahead:
+        return {}  # taken by a worker in the meantime
+    position = ahead.index(job_id)
+    out: Dict[str, Any] = {"queue_position": position}
+
+    task_seconds = float((stats or {}).get("task_seconds") or 0)
+    slice_tasks = int((stats or {}).get("slice_tasks") or 0)
+    if not workers or not task_seconds or not slice_tasks:
+        # nothing measured yet, or jobs are not sliced and a turn has no known length
+        return out
+    pipe = r.pipeline()
+    for worker_id in workers:
+        pipe.llen(f"{PROCESSING}{worker_id}")
+    idle = sum(1 for n in pipe.execute() if not n)
+    turns = max(0, position - idle + 1)
+    wait = math.ceil(turns / len(workers)) * slice_tasks * task_seconds
+    out["estimated_start_at"] = str(time.time() + wait)
+    return out
+
+
 def get_job_status(cmd: JobStatusCommand):
     job_id = cmd.job_id
     h = r.hgetall(_status_key(job_id)) or {}
@@ -51,6 +105,8 @@ def get_job_status(cmd: JobStatusCommand):
         return {"job_id": job_id, "state": "NOT_FOUND"}
     res = r.get(_result_key(job_id))
     out: Dict[str, Any] = {"job_id": job_id, **h}
+    if h.get("state") == "PENDING":
+        out.update(_queue_estimate(job_id))
     if res:
         try:
             out["result"] = json.loads(res)
@@ -59,6 +115,29 @@ def get_job_status(cmd: JobStatusCommand):
     return out
 
 
+def get_job_logs(cmd: JobLogsCommand) -> Dict[str, Any]:
+    """
+    Log lines by position: line n is the n-th line the job ever wrote. The
+    worker trims old lines, so a cursor behind the oldest kept line skips
+    ahead and reports how many lines were dropped.
+    """
+    pipe = r.pipeline()
+    pipe.hget(_status_key(cmd.job_id), "log_count")
+    pipe.llen(_logs_key(cmd.job_id))
+    log_count, kept = pipe.execute()
+    # jobs from before log_count was kept never trimmed their list
+    total = int(log_count) if log_count is not None else kept
+    first = total - kept  # position of the oldest kept line
+    start = min(max(cmd.after, first), total)
+    lines = r.lrange(_logs_key(cmd.job_id), start - first, start - first + cmd.limit - 1)
+    return {
+        "job_id": cmd.job_id,
+        "lines": lines,
+        "cursor": start + len(lines),
+        "dropped": max(0, first - cmd.after),
+    }
+
+
 def enqueue_prelabel_job(
     cmd: EnqueueJobCommand,
     run_repo: PrelabellingRunRepositoryInterface,
@@ -88,6 +167,10 @@ def enqueue_prelabel_job(
             model_id=model.id,
             system_prompt=cmd.system_prompt,
             questions_and_labels=qal,
+            extraction_mode=cmd.extraction_mode,
+            context_mode=cmd.context_mode,
+            retrieval_top_k=cmd.retrieval_top_k if cmd.context_mode == "retrieval" else None,
+            use_llm_cache=cmd.use_llm_cache,
         )
     )
 
@@ -98,6 +181,7 @@ def enqueue_prelabel_job(
             "progress": "0",
             "project_name": cmd.project_name,
             "model": cmd.model,
+            "priority": cmd.priority,
             "created_at": str(time.time()),
             "error": "",
         },
@@ -112,8 +196,15 @@ def enqueue_prelabel_job(
         "system_prompt": cmd.system_prompt,
         "questions_and_labels": cmd.questions_and_labels,
         "token": cmd.token,
+        "extraction_mode": cmd.extraction_mode,
+        # ml_backend keys cached LLM answers by the weights, not by the tag
+        "model_digest": model.digest,
+        "use_llm_cache": cmd.use_llm_cache,
+        "context_mode": cmd.context_mode,
+        "retrieval_top_k": cmd.retrieval_top_k,
+        "priority": cmd.priority,
     }
-    r.rpush(QUEUE, json.dumps(payload))
+    r.rpush(PRIORITY_QUEUES[cmd.priority], json.dumps(payload))
 
     return {
         "job_id": job_id,
@@ -122,9 +213,124 @@ def enqueue_prelabel_job(
     }
 
 
+def resume_prelabel_job(
+    cmd: ResumeJobCommand,
+    run_repo: PrelabellingRunRepositoryInterface,
+    model_repo: ModelRepositoryInterface,
+) -> Dict[str, Any]:
+    """
+    Queues a stopped run again under the same id, with the model, prompt, modes and
+    QAL stored on the run. The worker skips the tasks checkpointed for the run
+    (their task_prelabelling_metas rows) and goes on with the rest.
+    """
+    run = run_repo.get_run(cmd.job_id)
+    if not run:
+        raise NotFound(
+            code="RUN_NOT_FOUND",
+            message=f"No prelabelling run with id {cmd.job_id}.",
+        )
+    if run.status == "done":
+        raise InvalidState(code="RUN_ALREADY_DONE", message="Run is done, nothing to resume.")
+    model = model_repo.get_by_id(run.model_id)
+    if not model:
+        raise NotFound(code="MODEL_NOT_FOUND", message="The run's model is no longer known.")
+    checkpointed = run_repo.get_checkpointed_task_ids(cmd.job_id)
+
+    job_id = str(cmd.job_id)
+    qal = run.questions_and_labels or {}
+    payload = {
+        "job_id": job_id,
+        "project_name": run.project,
+        "model": model.archived_name,
+        "system_prompt": run.system_prompt,
+        "questions_and_labels": {
+            "questions": qal.get("questions", []),
+            "labels": qal.get("labels", []),
+        },
+        "token": cmd.token,
+        "extraction_mode": run.extraction_mode,
+        "model_digest": model.digest,
+        "use_llm_cache": run.use_llm_cache,
+        "context_mode": run.context_mode,
+        "retrieval_top_k": run.retrieval_top_k or 8,
+        "resume": True,
+    }
+
+    with r.pipeline() as pipe:
+        # a second resume (or a worker picking the job up) in between aborts this one
+        pipe.watch(_status_key(job_id))
+        if pipe.hget(_status_key(job_id), "state") in ACTIVE_STATES:
+            raise InvalidState(code="RUN_ACTIVE", message="Run is still queued or running.")
+        # the class it was enqueued with, unless its status expired meanwhile
+        priority = pipe.hget(_status_key(job_id), "priority")
+        if priority not in PRIORITY_QUEUES:
+            priority = "bulk"
+        payload["priority"] = priority
+        pipe.multi()
+        # keys of a finished job expire; the resumed job keeps them again
+        pipe.persist(_status_key(job_id))
+        pipe.persist(_logs_key(job_id))
+        pipe.hset(
+            _status_key(job_id),
+            mapping={
+                "state": "PENDING",
+                "progress": "0",
+                "project_name": run.project,
+                "model": model.archived_name,
+                "resumed_at": str(time.time()),
+                "error": "",
+                # a fresh budget of PRELABEL_MAX_ATTEMPTS starts
+                "attempts": "0",
+            },
+        )
+        pipe.delete(_result_key(job_id))
+        pipe.rpush(PRIORITY_QUEUES[priority], json.dumps(payload))
+        try:
+            pipe.execute()
+        except redis.WatchError:
+            raise InvalidState(code="RUN_ACTIVE", message="Run was resumed concurrently.")
+
+    run_repo.set_run_status(cmd.job_id, "pending")
+    return {
+        "job_id": job_id,
+        "status_url": f"/prelabel/status/{job_id}",
+        "cancel_url": f"/prelabel/cancel/{job_id}",
+        "checkpointed_tasks": len(checkpointed),
+    }
+
+
+def get_checkpoint(
+    cmd: CheckpointCommand,
+    run_repo: PrelabellingRunRepositoryInterface,
+) -> Dict[str, Any]:
+    if not run_repo.get_run(cmd.job_id):
+        raise NotFound(
+            code="RUN_NOT_FOUND",
+            message=f"No prelabelling run with id {cmd.job_id}.",
+        )
+    return {"job_id": str(cmd.job_id), "task_ids": run_repo.get_checkpointed_task_ids(cmd.job_id)}
+
+
 def cancel_prelabel_job(cmd: CancelJobCommand) -> Dict[str, Any]:
     job_id = cmd.job_id
-    r.hset(_status_key(job_id), "state", "CANCEL_REQUESTED")
+    key = _status_key(job_id)
+    with r.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(key)
+                # unknown or expired: nothing runs the job, and a write would
+                # recreate the status without its TTL
+                if not pipe.exists(key):
+                    break
+                pipe.multi()
+                # the state stays the record a worker reads if it missed the message
+                pipe.hset(key, "state", "CANCEL_REQUESTED")
+                pipe.publish(CANCEL_CHANNEL, job_id)
+                pipe.execute()
+                break
+            except redis.WatchError:
+                # the worker wrote the status in between
+                continue
     return {"job_id": job_id, "status": "cancel_requested"}
 
 
@@ -146,6 +352,14 @@ def handle_prelabel_callback(
     return {"status": "ok"}
 
 
+def task_meta_values(cmd: TaskPrelabellingMetaCommand) -> Dict[str, Any]:
+    """The columns of the task's task_prelabelling_metas row."""
+    values = cmd.model_dump()
+    values["prelabelling_run_id"] = values.pop("job_id")
+    values["label_studio_task_id"] = values.pop("task_id")
+    return values
+
+
 def handle_task_prelabelling_meta(
     cmd: TaskPrelabellingMetaCommand,
     run_repo: PrelabellingRunRepositoryInterface,
@@ -156,21 +370,67 @@ def handle_task_prelabelling_meta(
             code="RUN_NOT_FOUND",
             message=f"No prelabelling run with id {cmd.job_id}.",
         )
-    run_repo.save_task_prelabelling_meta(
-        prelabelling_run_id=cmd.job_id,
-        label_studio_task_id=cmd.task_id,
-        filename=cmd.filename,
-        predictions=cmd.predictions,
-        raw_llm_answers=cmd.raw_llm_answers,
-        dom_match_diagnostics=cmd.dom_match_diagnostics,
-        dom_match_by_label=cmd.dom_match_by_label,
-        task_ms_total=cmd.task_ms_total,
-        task_ms_llm_total=cmd.task_ms_llm_total,
-        task_ms_dom_extract=cmd.task_ms_dom_extract,
-        task_ms_dom_match=cmd.task_ms_dom_match,
-        n_llm_calls=cmd.n_llm_calls,
-        n_timeouts=cmd.n_timeouts,
-        avg_llm_call_ms=cmd.avg_llm_call_ms,
-        median_llm_call_ms=cmd.median_llm_call_ms,
-    )
+    run_repo.save_task_prelabelling_meta(**task_meta_values(cmd))
     return {"status": "ok"}
+
+
+def handle_model_load(
+    cmd: ModelLoadCommand,
+    run_repo: PrelabellingRunRepositoryInterface,
+) -> dict:
+    run = run_repo.get_run(cmd.job_id)
+    if not run:
+        raise NotFound(
+            code="RUN_NOT_FOUND",
+            message=f"No prelabelling run with id {cmd.job_id}.",
+        )
+    run_repo.set_model_load_ms(cmd.job_id, cmd.load_ms)
+    return {"status": "ok"}
+
+
+def apply_prelabel_events(
+    cmds: List[Any],
+    run_repo: PrelabellingRunRepositoryInterface,
+    project_repo: ProjectRepositoryInterface,
+    eval_repo,
+) -> Dict[str, int]:
+    """
+    Applies a batch of worker events in stream order, inside the caller's
+    transaction. Consecutive task metas are written as one multi-row upsert,
+    before any later event of the batch, so a run is only marked done once all
+    its metas are stored. Task metas and model loads of unknown runs are skipped.
+    Every event may arrive twice (a batch committed but not acknowledged), so
+    each one is applied idempotently.
+    """
+    rows: List[Dict[str, Any]] = []
+    known: Dict[int, bool] = {}
+    counts = {"stored": 0, "skipped": 0}
+
+    def _run_exists(job_id: int) -> bool:
+        if job_id not in known:
+            known[job_id] = run_repo.get_run(job_id) is not None
+        if not known[job_id]:
+            counts["skipped"] += 1
+        return known[job_id]
+
+    def _flush() -> None:
+        if rows:
+            run_repo.save_task_prelabelling_metas(rows)
+            counts["stored"] += len(rows)
+            rows.clear()
+
+    for cmd in cmds:
+        if isinstance(cmd, TaskPrelabellingMetaCommand):
+            if _run_exists(cmd.job_id):
+                rows.append(task_meta_values(cmd))
+            continue
+        _flush()
+        if isinstance(cmd, ModelLoadCommand):
+            if _run_exists(cmd.job_id):
+                run_repo.set_model_load_ms(cmd.job_id, cmd.load_ms)
+        elif isinstance(cmd, PrelabelCallbackCommand):
+            handle_prelabel_callback(
+                cmd, run_repo=run_repo, project_repo=project_repo, eval_repo=eval_repo
+            )
+    _flush()
+    return counts
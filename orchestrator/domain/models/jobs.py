@@ -20,12 +20,34 @@ class JobStatusCommand(BaseModel):
             )
 
 
+class JobLogsCommand(BaseModel):
+    job_id: str
+    after: int = 0
+    limit: int = 200
+
+    @classmethod
+    def from_contract(cls, job_id: str, contract):
+        try:
+            return cls(job_id=job_id, after=contract.after, limit=contract.limit)
+        except ValidationError as e:
+            raise ValidationFailed(
+                code="INVALID_COMMAND",
+                message="Invalid command payload.",
+                details=e.errors(),
+            )
+
+
 class EnqueueJobCommand(BaseModel):
     project_name: str
     model: str
     system_prompt: str
     questions_and_labels: dict
     token: str
+    extraction_mode: str = "per_question"
+    use_llm_cache: bool = True
+    context_mode: str = "full"
+    retrieval_top_k: int = 8
+    priority: str = "bulk"
 
     @classmethod
     def from_contract(cls, contract, token: str):
@@ -36,6 +58,11 @@ class EnqueueJobCommand(BaseModel):
                 system_prompt=contract.system_prompt,
                 questions_and_labels=contract.questions_and_labels.model_dump(),
                 token=token,
+                extraction_mode=contract.extraction_mode,
+                use_llm_cache=contract.use_llm_cache,
+                context_mode=contract.context_mode,
+                retrieval_top_k=contract.retrieval_top_k,
+                priority=contract.priority,
             )
         except ValidationError as e:
             raise ValidationFailed(
@@ -60,6 +87,37 @@ class CancelJobCommand(BaseModel):
             )
 
 
+class ResumeJobCommand(BaseModel):
+    job_id: int
+    token: str
+
+    @classmethod
+    def from_contract(cls, job_id: str, token: str):
+        try:
+            return cls(job_id=job_id, token=token)
+        except ValidationError as e:
+            raise ValidationFailed(
+                code="INVALID_COMMAND",
+                message="Invalid command payload.",
+                details=e.errors(),
+            )
+
+
+class CheckpointCommand(BaseModel):
+    job_id: int
+
+    @classmethod
+    def from_contract(cls, job_id: str):
+        try:
+            return cls(job_id=job_id)
+        except ValidationError as e:
+            raise ValidationFailed(
+                code="INVALID_COMMAND",
+                message="Invalid command payload.",
+                details=e.errors(),
+            )
+
+
 class PrelabelCallbackCommand(BaseModel):
     job_id: str
     status: str
@@ -97,6 +155,11 @@ class TaskPrelabellingMetaCommand(BaseModel):
     n_timeouts: int
     avg_llm_call_ms: float
     median_llm_call_ms: float
+    task_ms_llm_load: float = 0.0
+    task_ms_llm_prompt_eval: float = 0.0
+    n_llm_prompt_eval_tokens: int = 0
+    task_ms_llm_eval: float = 0.0
+    n_llm_eval_tokens: int = 0
 
     @classmethod
     def from_contract(cls, contract):
@@ -117,6 +180,32 @@ class TaskPrelabellingMetaCommand(BaseModel):
                 n_timeouts=contract.n_timeouts,
                 avg_llm_call_ms=contract.avg_llm_call_ms,
                 median_llm_call_ms=contract.median_llm_call_ms,
+                task_ms_llm_load=contract.task_ms_llm_load,
+                task_ms_llm_prompt_eval=contract.task_ms_llm_prompt_eval,
+                n_llm_prompt_eval_tokens=contract.n_llm_prompt_eval_tokens,
+                task_ms_llm_eval=contract.task_ms_llm_eval,
+                n_llm_eval_tokens=contract.n_llm_eval_tokens,
+            )
+        except ValidationError as e:
+            raise ValidationFailed(
+                code="INVALID_COMMAND",
+                message="Invalid command payload.",
+                details=e.errors(),
+            )
+
+
+class ModelLoadCommand(BaseModel):
+    job_id: int
+    model: str
+    load_ms: float
+
+    @classmethod
+    def from_contract(cls, contract):
+        try:
+            return cls(
+                job_id=int(contract.job_id),
+                model=contract.model,
+                load_ms=contract.load_ms,
             )
         except ValidationError as e:
             raise ValidationFailed(
@@ -16,6 +16,10 @@ def _p95(xs: List[float]) -> float:
     return float(s[i])
 
 
+def _per_second(count: float, ms: float) -> float:
+    return count / (ms / 1000.0) if ms else 0.0
+
+
 def compute_metrics_from_rows(
     gt_rows: List[dict],
     pred_rows: List[dict],
@@ -67,6 +71,14 @@ def compute_metrics_from_rows(
     perf_task_ms_llm_total: List[float] = []
     perf_task_ms_dom_extract: List[float] = []
     perf_task_ms_dom_match: List[float] = []
+    # Ollama timings (absent for tasks recorded before they were captured)
+    perf_task_ms_llm_load: List[float] = []
+    perf_ollama_sums = {
+        "task_ms_llm_prompt_eval": 0.0,
+        "n_llm_prompt_eval_tokens": 0.0,
+        "task_ms_llm_eval": 0.0,
+        "n_llm_eval_tokens": 0.0,
+    }
     n_tasks_with_perf = 0
 
     for lab in all_labels:
@@ -98,6 +110,11 @@ def compute_metrics_from_rows(
                 if isinstance(req.get("task_ms_dom_match"), (int, float)):
                     perf_task_ms_dom_match.append(float(req["task_ms_dom_match"]))
                     has_any_perf = True
+                if isinstance(req.get("task_ms_llm_load"), (int, float)):
+                    perf_task_ms_llm_load.append(float(req["task_ms_llm_load"]))
+                for key in perf_ollama_sums:
+                    if isinstance(req.get(key), (int, float)):
+                        perf_ollama_sums[key] += float(req[key])
                 if has_any_perf:
                     n_tasks_with_perf += 1
                 task_metrics_by_fn[fnm]["_perf_collected"] = True
@@ -187,6 +204,23 @@ def compute_metrics_from_rows(
         "task_ms_dom_extract_avg": _avg(perf_task_ms_dom_extract),
         "task_ms_dom_match_sum": sum(perf_task_ms_dom_match),
         "task_ms_dom_match_avg": _avg(perf_task_ms_dom_match),
+        # model (re)load vs. long prompts vs. slow generation
+        "task_ms_llm_load_sum": sum(perf_task_ms_llm_load),
+        "task_ms_llm_load_max": max(perf_task_ms_llm_load, default=0.0),
+        "llm_load_share": (
+            sum(perf_task_ms_llm_load) / sum(perf_task_ms_llm_total)
+            if sum(perf_task_ms_llm_total)
+            else 0.0
+        ),
+        "n_llm_prompt_eval_tokens_sum": int(perf_ollama_sums["n_llm_prompt_eval_tokens"]),
+        "prompt_eval_tokens_per_s": _per_second(
+            perf_ollama_sums["n_llm_prompt_eval_tokens"],
+            perf_ollama_sums["task_ms_llm_prompt_eval"],
+        ),
+        "n_llm_eval_tokens_sum": int(perf_ollama_sums["n_llm_eval_tokens"]),
+        "eval_tokens_per_s": _per_second(
+            perf_ollama_sums["n_llm_eval_tokens"], perf_ollama_sums["task_ms_llm_eval"]
+        ),
     }
 
     # remove internal guard flags from output
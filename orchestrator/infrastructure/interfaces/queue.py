@@ -10,3 +10,14 @@ class QueueInterface(ABC):
         project: str,
         pdf_keys: list[str],
     ) -> None: ...
+
+
+class EventStreamInterface(ABC):
+    @abstractmethod
+    def read(self, count: int, block_ms: int) -> list[tuple[str, dict]]: ...
+
+    @abstractmethod
+    def ack(self, entry_ids: list[str]) -> None: ...
+
+    @abstractmethod
+    def dead_letter(self, entry_id: str, fields: dict) -> None: ...
@@ -121,6 +121,10 @@ class PrelabellingRunRepositoryInterface(ABC):
         model_id: int,
         system_prompt: str,
         questions_and_labels: dict,
+        extraction_mode: str = "per_question",
+        context_mode: str = "full",
+        retrieval_top_k: int | None = None,
+        use_llm_cache: bool = True,
     ) -> int: ...
 
     @abstractmethod
@@ -129,6 +133,9 @@ class PrelabellingRunRepositoryInterface(ABC):
     @abstractmethod
     def set_run_status(self, job_id: int, status: str, error: str | None = None) -> None: ...
 
+    @abstractmethod
+    def set_model_load_ms(self, job_id: int, model_load_ms: float) -> None: ...
+
     @abstractmethod
     def get_latest_run(self, project: str): ...
 
@@ -153,8 +160,19 @@ class PrelabellingRunRepositoryInterface(ABC):
         n_timeouts: int,
         avg_llm_call_ms: float,
         median_llm_call_ms: float,
+        task_ms_llm_load: float = 0.0,
+        task_ms_llm_prompt_eval: float = 0.0,
+        n_llm_prompt_eval_tokens: int = 0,
+        task_ms_llm_eval: float = 0.0,
+        n_llm_eval_tokens: int = 0,
     ) -> None: ...
 
+    @abstractmethod
+    def save_task_prelabelling_metas(self, rows: list[dict]) -> None: ...
+
+    @abstractmethod
+    def get_checkpointed_task_ids(self, prelabelling_run_id: int) -> list[int]: ...
+
     @abstractmethod
     def build_pred_rows_for_run(self, prelabelling_run_id: int) -> list: ...
 
@@ -0,0 +1,84 @@
+# orchestrator/infrastructure/queue/event_stream.py
+import redis
+from infrastructure.interfaces.queue import EventStreamInterface
+
+
+class RedisEventStream(EventStreamInterface):
+    """
+    A Redis Stream read through a consumer group. Entries stay pending for this
+    consumer until ack() (after they were committed), which also deletes them, so
+    the stream only holds what is not stored yet. After a restart or a failed
+    batch the consumer's own pending entries are read again first (backlog), and
+    entries another consumer left pending longer than claim_idle_ms are claimed.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        stream: str,
+        group: str,
+        consumer: str,
+        claim_idle_ms: int = 60000,
+    ):
+        self._r = client
+        self._stream = stream
+        self._group = group
+        self._consumer = consumer
+        self._claim_idle_ms = claim_idle_ms
+        self._dead_stream = f"{stream}:dead"
+        self.backlog = True
+
+    def ensure_group(self) -> None:
+        try:
+            self._r.xgroup_create(self._stream, self._group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _entries(self, entries) -> list[tuple[str, dict]]:
+        # entries deleted while pending come back without fields; they were stored already
+        gone = [entry_id for entry_id, fields in entries if not fields]
+        if gone:
+            self._r.xack(self._stream, self._group, *gone)
+        return [(entry_id, fields) for entry_id, fields in entries if fields]
+
+    def _read_group(self, start: str, count: int, block_ms: int | None):
+        resp = self._r.xreadgroup(
+            self._group, self._consumer, {self._stream: start}, count=count, block=block_ms
+        )
+        return self._entries([entry for _, entries in resp or [] for entry in entries])
+
+    def read(self, count: int, block_ms: int) -> list[tuple[str, dict]]:
+        if self.backlog:
+            entries = self._read_group("0", count, None)
+            if entries:
+                return entries
+            self.backlog = False
+        claimed = self._r.xautoclaim(
+            self._stream,
+            self._group,
+            self._consumer,
+            min_idle_time=self._claim_idle_ms,
+            start_id="0-0",
+            count=count,
+        )
+        entries = self._entries(claimed[1])
+        if entries:
+            return entries
+        return self._read_group(">", count, block_ms)
+
+    def ack(self, entry_ids: list[str]) -> None:
+        if not entry_ids:
+            return
+        pipe = self._r.pipeline()
+        pipe.xack(self._stream, self._group, *entry_ids)
+        pipe.xdel(self._stream, *entry_ids)
+        pipe.execute()
+
+    def dead_letter(self, entry_id: str, fields: dict) -> None:
+        """Moves an entry that keeps failing aside, to <stream>:dead, instead of retrying it."""
+        pipe = self._r.pipeline()
+        pipe.xadd(self._dead_stream, {**fields, "source_id": entry_id})
+        pipe.xack(self._stream, self._group, entry_id)
+        pipe.xdel(self._stream, entry_id)
+        pipe.execute()
@@ -2,8 +2,12 @@
 
 from db.models import PrelabellingRun, TaskPrelabellingMeta
 from infrastructure.interfaces.repository import PrelabellingRunRepositoryInterface
+from sqlalchemy.dialects.postgresql import insert
 from utils.hashing import compute_labels_hash, compute_questions_hash, compute_system_prompt_hash
 
+# uq_task_prelabelling_meta_run_task: one row per task and run
+KEY_COLUMNS = ("prelabelling_run_id", "label_studio_task_id")
+
 
 class PrelabellingRunRepository(PrelabellingRunRepositoryInterface):
     def __init__(self, db):
@@ -16,6 +20,10 @@ class PrelabellingRunRepository(PrelabellingRunRepositoryInterface):
         model_id: int,
         system_prompt: str,
         questions_and_labels: dict,
+        extraction_mode: str = "per_question",
+        context_mode: str = "full",
+        retrieval_top_k: int | None = None,
+        use_llm_cache: bool = True,
     ) -> int:
         run = PrelabellingRun(
             project=project,
@@ -26,6 +34,10 @@ class PrelabellingRunRepository(PrelabellingRunRepositoryInterface):
             labels_hash=compute_labels_hash(questions_and_labels.get("labels", [])),
             questions_hash=compute_questions_hash(questions_and_labels.get("questions", [])),
             system_prompt_hash=compute_system_prompt_hash(system_prompt),
+            extraction_mode=extraction_mode,
+            context_mode=context_mode,
+            retrieval_top_k=retrieval_top_k,
+            use_llm_cache=use_llm_cache,
             status="pending",
         )
         self._db.add(run)
@@ -44,6 +56,12 @@ class PrelabellingRunRepository(PrelabellingRunRepositoryInterface):
                 run.error = error
             self._db.flush()
 
+    def set_model_load_ms(self, job_id: int, model_load_ms: float) -> None:
+        run = self._db.query(PrelabellingRun).filter(PrelabellingRun.id == job_id).first()
+        if run:
+            run.model_load_ms = model_load_ms
+            self._db.flush()
+
     def get_latest_run(self, project: str):
         return (
             self._db.query(PrelabellingRun)
@@ -76,8 +94,13 @@ class PrelabellingRunRepository(PrelabellingRunRepositoryInterface):
         n_timeouts: int,
         avg_llm_call_ms: float,
         median_llm_call_ms: float,
+        task_ms_llm_load: float = 0.0,
+        task_ms_llm_prompt_eval: float = 0.0,
+        n_llm_prompt_eval_tokens: int = 0,
+        task_ms_llm_eval: float = 0.0,
+        n_llm_eval_tokens: int = 0,
     ) -> None:
-        meta = TaskPrelabellingMeta(
+        values = dict(
             prelabelling_run_id=prelabelling_run_id,
             label_studio_task_id=label_studio_task_id,
             filename=filename,
@@ -93,10 +116,39 @@ class PrelabellingRunRepository(PrelabellingRunRepositoryInterface):
             n_timeouts=n_timeouts,
             avg_llm_call_ms=avg_llm_call_ms,
             median_llm_call_ms=median_llm_call_ms,
+            task_ms_llm_load=task_ms_llm_load,
+            task_ms_llm_prompt_eval=task_ms_llm_prompt_eval,
+            n_llm_prompt_eval_tokens=n_llm_prompt_eval_tokens,
+            task_ms_llm_eval=task_ms_llm_eval,
+            n_llm_eval_tokens=n_llm_eval_tokens,
         )
-        self._db.add(meta)
+        self.save_task_prelabelling_metas([values])
+
+    def save_task_prelabelling_metas(self, rows: list[dict]) -> None:
+        """
+        One multi-row upsert; a task finished again after a restart or resume
+        replaces its row. Postgres refuses to update one row twice in a statement,
+        so of several rows for the same task only the last one is written.
+        """
+        latest = {tuple(row[k] for k in KEY_COLUMNS): row for row in rows}
+        if not latest:
+            return
+        stmt = insert(TaskPrelabellingMeta).values(list(latest.values()))
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_task_prelabelling_meta_run_task",
+            set_={k: stmt.excluded[k] for k in next(iter(latest.values())) if k not in KEY_COLUMNS},
+        )
+        self._db.execute(stmt)
         self._db.flush()
 
+    def get_checkpointed_task_ids(self, prelabelling_run_id: int) -> list[int]:
+        rows = (
+            self._db.query(TaskPrelabellingMeta.label_studio_task_id)
+            .filter(TaskPrelabellingMeta.prelabelling_run_id == prelabelling_run_id)
+            .all()
+        )
+        return [row[0] for row in rows]
+
     def build_pred_rows_for_run(self, prelabelling_run_id: int) -> list:
         metas = self.get_task_prelabelling_metas(prelabelling_run_id)
         rows = []
@@ -117,6 +169,11 @@ class PrelabellingRunRepository(PrelabellingRunRepositoryInterface):
                                 "task_ms_llm_total": m.task_ms_llm_total,
                                 "task_ms_dom_extract": m.task_ms_dom_extract,
                                 "task_ms_dom_match": m.task_ms_dom_match,
+                                "task_ms_llm_load": m.task_ms_llm_load,
+                                "task_ms_llm_prompt_eval": m.task_ms_llm_prompt_eval,
+                                "n_llm_prompt_eval_tokens": m.n_llm_prompt_eval_tokens,
+                                "task_ms_llm_eval": m.task_ms_llm_eval,
+                                "n_llm_eval_tokens": m.n_llm_eval_tokens,
                             }
                         },
                     },
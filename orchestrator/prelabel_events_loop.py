@@ -0,0 +1,186 @@
+# orchestrator/prelabel_events_loop.py
+import json
+import os
+import socket
+import time
+
+import redis
+from api.contracts.jobs import (
+    ModelLoadRequest,
+    PrelabelCallbackRequest,
+    TaskPrelabellingMetaRequest,
+)
+from domain.errors import ValidationFailed
+from domain.jobs import apply_prelabel_events
+from domain.models.jobs import (
+    ModelLoadCommand,
+    PrelabelCallbackCommand,
+    TaskPrelabellingMetaCommand,
+)
+from infrastructure.queue.event_stream import RedisEventStream
+from infrastructure.repository.evaluation_repository import EvaluationRepository
+from infrastructure.repository.prelabelling_run_repository import PrelabellingRunRepository
+from infrastructure.repository.project_repository import ProjectRepository
+from pydantic import ValidationError
+from sqlalchemy import create_engine
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.orm import sessionmaker
+from utils.logging_utils import safe_logger
+
+# the stream the workers publish to (see worker/infrastructure/events.py)
+EVENTS_STREAM = "prelabel_events"
+EVENTS_GROUP = "orchestrator"
+# entries stored per transaction
+BATCH_SIZE = max(1, int(os.getenv("PRELABEL_EVENTS_BATCH_SIZE", "200")))
+BLOCK_MS = int(os.getenv("PRELABEL_EVENTS_BLOCK_MS", "1000"))
+# entries another consumer left pending this long are taken over (it is assumed dead)
+CLAIM_IDLE_MS = int(os.getenv("PRELABEL_EVENTS_CLAIM_IDLE_MS", "60000"))
+# failed commits of one entry before it is moved to the dead-letter stream
+MAX_ATTEMPTS = max(1, int(os.getenv("PRELABEL_EVENTS_MAX_ATTEMPTS", "5")))
+RETRY_SECONDS = float(os.getenv("PRELABEL_EVENTS_RETRY_SECONDS", "2"))
+
+# event type -> request contract and command, as for the HTTP callbacks
+EVENT_TYPES = {
+    "task_meta": (TaskPrelabellingMetaRequest, TaskPrelabellingMetaCommand),
+    "model_load": (ModelLoadRequest, ModelLoadCommand),
+    "job_status": (PrelabelCallbackRequest, PrelabelCallbackCommand),
+}
+
+
+def _command(fields: dict):
+    """The entry's command, or None for an entry that can never be stored."""
+    try:
+        contract_cls, command_cls = EVENT_TYPES[fields.get("type")]
+        contract = contract_cls.model_validate(json.loads(fields.get("data") or ""))
+        return command_cls.from_contract(contract)
+    except (KeyError, ValueError, ValidationError, ValidationFailed):
+        return None
+
+
+class PrelabelEventConsumer:
+    """
+    Stores the workers' events batch by batch: all entries of a read in one
+    transaction, acknowledged (and deleted) only after the commit. A batch that
+    fails is rolled back and read again. While Postgres is unreachable the batch
+    is retried as is; any other failure retries the entries one at a time, so
+    one bad entry does not hold back the rest, and an entry that still fails
+    after MAX_ATTEMPTS goes to the dead-letter stream.
+    """
+
+    def __init__(self, stream: RedisEventStream, session_factory):
+        self._stream = stream
+        self._session_factory = session_factory
+        self._failures: dict[str, int] = {}  # entry id -> failed commits
+        self._singly = False
+
+    def consume_once(self) -> int:
+        """Reads and stores one batch; the number of entries acknowledged."""
+        # single reads end with the backlog they were meant for
+        if self._singly and not self._stream.backlog:
+            self._singly = False
+        entries = self._stream.read(count=1 if self._singly else BATCH_SIZE, block_ms=BLOCK_MS)
+        if not entries:
+            return 0
+
+        cmds = []
+        invalid = []
+        for entry_id, fields in entries:
+            cmd = _command(fields)
+            if cmd is None:
+                invalid.append(entry_id)
+            else:
+                cmds.append(cmd)
+        if invalid:
+            safe_logger.error("prelabel_events_invalid | count=%s", len(invalid))
+
+        db = self._session_factory()
+        try:
+            counts = apply_prelabel_events(
+                cmds,
+                run_repo=PrelabellingRunRepository(db),
+                project_repo=ProjectRepository(db),
+                eval_repo=EvaluationRepository(db),
+            )
+            db.commit()
+        except (OperationalError, InterfaceError):
+            db.rollback()
+            safe_logger.error("prelabel_events_db_unavailable | entries=%s", len(entries))
+            self._retry()
+            return 0
+        except Exception:
+            db.rollback()
+            safe_logger.error("prelabel_events_batch_failed | entries=%s", len(entries))
+            self._failed(entries)
+            self._retry()
+            return 0
+        finally:
+            db.close()
+
+        self._stream.ack([entry_id for entry_id, _ in entries])
+        for entry_id, _ in entries:
+            self._failures.pop(entry_id, None)
+        if counts["skipped"]:
+            safe_logger.warning("prelabel_events_unknown_run | skipped=%s", counts["skipped"])
+        return len(entries)
+
+    def _retry(self) -> None:
+        # the batch is still pending for this consumer and is read again first
+        self._stream.backlog = True
+        time.sleep(RETRY_SECONDS)
+
+    def _failed(self, entries: list) -> None:
+        if not self._singly:
+            self._singly = True
+            return
+        entry_id, fields = entries[0]
+        self._failures[entry_id] = self._failures.get(entry_id, 0) + 1
+        if self._failures[entry_id] >= MAX_ATTEMPTS:
+            self._stream.dead_letter(entry_id, fields)
+            self._failures.pop(entry_id)
+            safe_logger.error(
+                "prelabel_event_dead_lettered | entry_id=%s | type=%s",
+                entry_id,
+                fields.get("type"),
+            )
+
+
+def main():
+    database_url = (
+        f"postgresql://{os.getenv('POSTGRES_XTRACTYL_USER', 'xtractyl')}:"
+        f"{os.getenv('POSTGRES_XTRACTYL_PASSWORD', 'yourpassword')}@"
+        f"{os.getenv('POSTGRES_XTRACTYL_CONTAINER_NAME', 'postgres_xtractyl')}:5432/"
+        f"{os.getenv('POSTGRES_XTRACTYL_DB', 'xtractyl')}"
+    )
+    session_factory = sessionmaker(bind=create_engine(database_url))
+    client = redis.Redis(
+        host=os.getenv("REDIS_HOST", "job_queue"),
+        port=int(os.getenv("REDIS_PORT", "6379")),
+        decode_responses=True,
+    )
+    stream = RedisEventStream(
+        client,
+        EVENTS_STREAM,
+        EVENTS_GROUP,
+        consumer=socket.gethostname(),
+        claim_idle_ms=CLAIM_IDLE_MS,
+    )
+    consumer = PrelabelEventConsumer(stream, session_factory)
+
+    safe_logger.info("prelabel_events_service_starting")
+    ready = False
+    while True:
+        try:
+            if not ready:
+                stream.ensure_group()
+                ready = True
+            consumer.consume_once()
+        except redis.RedisError:
+            # unacknowledged entries stay pending and are read again once Redis is back
+            ready = False
+            stream.backlog = True
+            safe_logger.error("prelabel_events_redis_unavailable")
+            time.sleep(RETRY_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# orchestrator/tests/unit/test_calculate_metrics.py
+
+from domain.utils.calculate_metrics import compute_metrics_from_rows
+
+
+def _pred(filename, **request):
+    return {
+        "filename": filename,
+        "labels": {"diagnosis": "Pneumonie"},
+        "meta": {"performance": {"request": request}},
+    }
+
+
+def test_performance_separates_model_load_prompt_and_generation():
+    gt = [{"filename": f, "labels": {"diagnosis": "Pneumonie"}} for f in ("a", "b")]
+    pred = [
+        # first task found the model unloaded
+        _pred(
+            "a",
+            task_ms_total=4000.0,
+            task_ms_llm_total=3000.0,
+            task_ms_llm_load=2000.0,
+            task_ms_llm_prompt_eval=500.0,
+            n_llm_prompt_eval_tokens=1000,
+            task_ms_llm_eval=400.0,
+            n_llm_eval_tokens=20,
+        ),
+        _pred(
+            "b",
+            task_ms_total=1000.0,
+            task_ms_llm_total=1000.0,
+            task_ms_llm_load=0.0,
+            task_ms_llm_prompt_eval=500.0,
+            n_llm_prompt_eval_tokens=1000,
+            task_ms_llm_eval=600.0,
+            n_llm_eval_tokens=30,
+        ),
+    ]
+
+    perf = compute_metrics_from_rows(gt, pred)["performance"]
+
+    assert perf["task_ms_llm_load_sum"] == 2000.0
+    assert perf["task_ms_llm_load_max"] == 2000.0
+    assert perf["llm_load_share"] == 0.5
+    assert perf["n_llm_prompt_eval_tokens_sum"] == 2000
+    assert perf["prompt_eval_tokens_per_s"] == 2000.0
+    assert perf["n_llm_eval_tokens_sum"] == 50
+    assert perf["eval_tokens_per_s"] == 50.0
+
+
+def test_rows_without_ollama_timings_report_zero():
+    gt = [{"filename": "a", "labels": {"diagnosis": "Pneumonie"}}]
+    pred = [_pred("a", task_ms_total=10.0, task_ms_llm_total=5.0, task_ms_llm_load=None)]
+
+    perf = compute_metrics_from_rows(gt, pred)["performance"]
+
+    assert perf["n_tasks_with_perf"] == 1
+    assert perf["task_ms_llm_load_max"] == 0.0
+    assert perf["eval_tokens_per_s"] == 0.0
@@ -1,5 +1,8 @@
 # orchestrator/tests/unit/test_jobs_route.py
 
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
 import pytest
 from app import create_app
 
@@ -27,6 +30,15 @@ def test_prelabel_status_returns_200(client, monkeypatch):
     assert data["state"] == "RUNNING"
 
 
+def test_prelabel_status_reports_worker_and_attempts(client, monkeypatch):
+    monkeypatch.setattr(
+        "api.routes.jobs.get_job_status",
+        lambda cmd: {"job_id": "123", "state": "RUNNING", "worker": "w1-0", "attempts": "2"},
+    )
+    data = client.get("/prelabel/status/123").get_json()
+    assert (data["worker"], data["attempts"]) == ("w1-0", "2")
+
+
 def test_prelabel_status_contract_violated_returns_500(client, monkeypatch):
     monkeypatch.setattr(
         "api.routes.jobs.get_job_status",
@@ -38,6 +50,110 @@ def test_prelabel_status_contract_violated_returns_500(client, monkeypatch):
     assert data["error"] == "RESPONSE_CONTRACT_VIOLATED"
 
 
+def _queued(*job_ids):
+    import json
+
+    return [json.dumps({"job_id": j, "token": "t"}) for j in job_ids]
+
+
+def test_queued_job_reports_position_and_estimated_start(monkeypatch):
+    from domain import jobs
+    from domain.models.jobs import JobStatusCommand
+
+    mock_r = MagicMock()
+    mock_r.hgetall.return_value = {"state": "PENDING", "priority": "bulk"}
+    mock_r.get.return_value = None
+    mock_r.pipeline.return_value.execute.side_effect = [
+        # interactive, bulk, workers, stats
+        [
+            _queued("5"),
+            _queued("7", "9"),
+            {"w1", "w2"},
+            {"task_seconds": "2.0", "slice_tasks": "50"},
+        ],
+        [1, 1],  # both workers busy
+    ]
+    monkeypatch.setattr(jobs, "r", mock_r)
+    monkeypatch.setattr(jobs.time, "time", lambda: 1000.0)
+
+    out = jobs.get_job_status(JobStatusCommand(job_id="9"))
+
+    # 3 turns ahead shared by 2 workers: 2 rounds of 50 tasks at 2s
+    assert out["queue_position"] == 2
+    assert out["estimated_start_at"] == "1200.0"
+
+
+def test_no_start_estimate_before_throughput_is_known(monkeypatch):
+    from domain import jobs
+
+    mock_r = MagicMock()
+    mock_r.pipeline.return_value.execute.return_value = [_queued("5"), [], {"w1"}, {}]
+    monkeypatch.setattr(jobs, "r", mock_r)
+
+    assert jobs._queue_estimate("5") == {"queue_position": 0}
+    assert jobs._queue_estimate("6") == {}
+
+
+# --- prelabel/logs ---
+
+
+class FakeLogs:
+    """log_count and the trimmed logs list of one job, as the worker leaves them."""
+
+    def __init__(self, total, kept):
+        self.log_count = str(total)
+        self.lines = [f"line {i}" for i in range(total - kept, total)]
+
+    def pipeline(self):
+        pipe = MagicMock()
+        pipe.execute.return_value = [self.log_count, len(self.lines)]
+        return pipe
+
+    def lrange(self, key, start, end):
+        return self.lines[start : end + 1]
+
+
+def test_logs_are_read_from_the_cursor(monkeypatch):
+    from domain import jobs
+    from domain.models.jobs import JobLogsCommand
+
+    monkeypatch.setattr(jobs, "r", FakeLogs(total=10, kept=10))
+    out = jobs.get_job_logs(JobLogsCommand(job_id="1", after=4, limit=3))
+    assert (out["lines"], out["cursor"], out["dropped"]) == (["line 4", "line 5", "line 6"], 7, 0)
+
+    out = jobs.get_job_logs(JobLogsCommand(job_id="1", after=10))
+    assert (out["lines"], out["cursor"]) == ([], 10)
+
+
+def test_trimmed_lines_are_skipped_and_counted(monkeypatch):
+    from domain import jobs
+    from domain.models.jobs import JobLogsCommand
+
+    monkeypatch.setattr(jobs, "r", FakeLogs(total=10, kept=4))
+    out = jobs.get_job_logs(JobLogsCommand(job_id="1", after=2))
+    assert out["lines"] == ["line 6", "line 7", "line 8", "line 9"]
+    assert (out["cursor"], out["dropped"]) == (10, 4)
+
+
+def test_prelabel_logs_passes_the_cursor(client, monkeypatch):
+    seen = []
+
+    def fake_logs(cmd):
+        seen.append(cmd)
+        return {"job_id": cmd.job_id, "lines": ["[INFO] x"], "cursor": 6, "dropped": 0}
+
+    monkeypatch.setattr("api.routes.jobs.get_job_logs", fake_logs)
+    res = client.get("/prelabel/logs/123?after=5&limit=10")
+    assert res.status_code == 200
+    assert res.get_json()["cursor"] == 6
+    assert (seen[0].after, seen[0].limit) == (5, 10)
+
+
+def test_prelabel_logs_limit_out_of_range_returns_422(client):
+    res = client.get("/prelabel/logs/123?limit=0")
+    assert res.status_code == 422
+
+
 # --- prelabel_project ---
 
 
@@ -65,10 +181,183 @@ def test_prelabel_project_missing_fields_returns_422(client):
     assert res.status_code == 422
 
 
+def test_prelabel_project_unknown_extraction_mode_returns_422(client):
+    res = client.post(
+        "/prelabel_project",
+        headers={"Authorization": "Bearer dummy"},
+        json={
+            "project_name": "test",
+            "model": "llama3.1:8b",
+            "system_prompt": "test",
+            "questions_and_labels": {"questions": ["Q1"], "labels": ["L1"]},
+            "extraction_mode": "all_at_once",
+        },
+    )
+    assert res.status_code == 422
+
+
+def test_prelabel_project_retrieval_top_k_below_one_returns_422(client):
+    res = client.post(
+        "/prelabel_project",
+        headers={"Authorization": "Bearer dummy"},
+        json={
+            "project_name": "test",
+            "model": "llama3.1:8b",
+            "system_prompt": "test",
+            "questions_and_labels": {"questions": ["Q1"], "labels": ["L1"]},
+            "context_mode": "retrieval",
+            "retrieval_top_k": 0,
+        },
+    )
+    assert res.status_code == 422
+
+
+def test_prelabel_project_unknown_priority_returns_422(client):
+    res = client.post(
+        "/prelabel_project",
+        headers={"Authorization": "Bearer dummy"},
+        json={
+            "project_name": "test",
+            "model": "llama3.1:8b",
+            "system_prompt": "test",
+            "questions_and_labels": {"questions": ["Q1"], "labels": ["L1"]},
+            "priority": "urgent",
+        },
+    )
+    assert res.status_code == 422
+
+
 # test_prelabel_project_returns_200 removed
 # pending DB migration, test update otherwise had to include DB workflow and legacy testing
 
 
+# --- prelabel/resume ---
+
+
+class FakeRunRepo:
+    def __init__(self, status="failed", checkpointed=(1, 2), use_llm_cache=True):
+        self.run = SimpleNamespace(
+            id=7,
+            project="notes",
+            model_id=3,
+            system_prompt="Extract.",
+            questions_and_labels={"questions": ["Diagnose?"], "labels": ["diagnosis"]},
+            extraction_mode="multi_question",
+            context_mode="retrieval",
+            retrieval_top_k=5,
+            use_llm_cache=use_llm_cache,
+            status=status,
+        )
+        self.checkpointed = list(checkpointed)
+        self.statuses = []
+
+    def get_run(self, job_id):
+        return self.run if job_id == 7 else None
+
+    def get_checkpointed_task_ids(self, prelabelling_run_id):
+        return self.checkpointed
+
+    def set_run_status(self, job_id, status, error=None):
+        self.statuses.append(status)
+
+
+class FakeModelRepo:
+    def get_by_id(self, model_id):
+        return SimpleNamespace(id=model_id, archived_name="llama3.1:8b", digest="sha256:abc")
+
+
+@pytest.fixture
+def resume_redis(monkeypatch):
+    from domain import jobs
+
+    mock_r = MagicMock()
+    pipe = mock_r.pipeline.return_value.__enter__.return_value
+    pipe.hget.return_value = "FAILED"
+    monkeypatch.setattr(jobs, "r", mock_r)
+    return pipe
+
+
+def test_resume_queues_the_run_with_its_stored_configuration(resume_redis):
+    import json
+
+    from domain.jobs import resume_prelabel_job
+    from domain.models.jobs import ResumeJobCommand
+
+    run_repo = FakeRunRepo()
+    out = resume_prelabel_job(
+        ResumeJobCommand(job_id=7, token="t"), run_repo=run_repo, model_repo=FakeModelRepo()
+    )
+
+    assert out["checkpointed_tasks"] == 2
+    queue, raw = resume_redis.rpush.call_args.args
+    payload = json.loads(raw)
+    assert queue == "prelabel_jobs"
+    assert payload["job_id"] == "7" and payload["resume"] is True
+    assert (payload["model"], payload["model_digest"]) == ("llama3.1:8b", "sha256:abc")
+    assert (payload["extraction_mode"], payload["context_mode"]) == ("multi_question", "retrieval")
+    assert payload["questions_and_labels"] == {"questions": ["Diagnose?"], "labels": ["diagnosis"]}
+    mapping = resume_redis.hset.call_args.kwargs["mapping"]
+    assert (mapping["state"], mapping["attempts"]) == ("PENDING", "0")
+    resume_redis.persist.assert_any_call("status:7")
+    assert run_repo.statuses == ["pending"]
+
+
+def test_run_started_without_the_llm_cache_resumes_without_it(resume_redis):
+    import json
+
+    from domain.jobs import resume_prelabel_job
+    from domain.models.jobs import ResumeJobCommand
+
+    resume_prelabel_job(
+        ResumeJobCommand(job_id=7, token="t"),
+        run_repo=FakeRunRepo(use_llm_cache=False),
+        model_repo=FakeModelRepo(),
+    )
+
+    _, raw = resume_redis.rpush.call_args.args
+    assert json.loads(raw)["use_llm_cache"] is False
+
+
+@pytest.mark.parametrize(
+    "status, state, code",
+    [("done", None, "RUN_ALREADY_DONE"), ("failed", "RUNNING", "RUN_ACTIVE")],
+)
+def test_done_or_active_runs_are_not_resumed(resume_redis, status, state, code):
+    from domain.errors import InvalidState
+    from domain.jobs import resume_prelabel_job
+    from domain.models.jobs import ResumeJobCommand
+
+    resume_redis.hget.return_value = state
+    with pytest.raises(InvalidState) as err:
+        resume_prelabel_job(
+            ResumeJobCommand(job_id=7, token="t"),
+            run_repo=FakeRunRepo(status=status),
+            model_repo=FakeModelRepo(),
+        )
+
+    assert err.value.code == code
+    resume_redis.rpush.assert_not_called()
+
+
+def test_prelabel_resume_missing_token_returns_401(client):
+    assert client.post("/prelabel/resume/7").status_code == 401
+
+
+def test_prelabel_resume_invalid_job_id_returns_400(client):
+    res = client.post("/prelabel/resume/abc", headers={"Authorization": "Bearer dummy"})
+    assert res.status_code == 400
+
+
+def test_prelabel_checkpoint_returns_task_ids(client, monkeypatch):
+    monkeypatch.setattr(
+        "api.routes.jobs.get_checkpoint",
+        lambda cmd, run_repo: {"job_id": str(cmd.job_id), "task_ids": [4, 9]},
+    )
+    res = client.get("/prelabel/checkpoint/7")
+    assert res.status_code == 200
+    assert res.get_json() == {"job_id": "7", "task_ids": [4, 9]}
+
+
 # --- prelabel/cancel ---
 
 
@@ -83,6 +372,37 @@ def test_prelabel_cancel_returns_200(client, monkeypatch):
     assert data["status"] == "cancel_requested"
 
 
+def test_cancel_is_recorded_and_published(monkeypatch):
+    from domain import jobs
+    from domain.models.jobs import CancelJobCommand
+
+    mock_r = MagicMock()
+    pipe = mock_r.pipeline.return_value.__enter__.return_value
+    pipe.exists.return_value = 1
+    monkeypatch.setattr(jobs, "r", mock_r)
+    jobs.cancel_prelabel_job(CancelJobCommand(job_id="7"))
+
+    pipe.watch.assert_called_once_with("status:7")
+    pipe.hset.assert_called_once_with("status:7", "state", "CANCEL_REQUESTED")
+    pipe.publish.assert_called_once_with("prelabel_cancel", "7")
+    pipe.execute.assert_called_once()
+
+
+def test_cancel_of_an_expired_job_does_not_recreate_its_status(monkeypatch):
+    from domain import jobs
+    from domain.models.jobs import CancelJobCommand
+
+    mock_r = MagicMock()
+    pipe = mock_r.pipeline.return_value.__enter__.return_value
+    pipe.exists.return_value = 0
+    monkeypatch.setattr(jobs, "r", mock_r)
+    out = jobs.cancel_prelabel_job(CancelJobCommand(job_id="7"))
+
+    assert out == {"job_id": "7", "status": "cancel_requested"}
+    pipe.hset.assert_not_called()
+    pipe.publish.assert_not_called()
+
+
 def test_prelabel_cancel_contract_violated_returns_500(client, monkeypatch):
     monkeypatch.setattr(
         "api.routes.jobs.cancel_prelabel_job",
@@ -92,3 +412,162 @@ def test_prelabel_cancel_contract_violated_returns_500(client, monkeypatch):
     assert res.status_code == 500
     data = res.get_json()
     assert data["error"] == "RESPONSE_CONTRACT_VIOLATED"
+
+
+# --- prelabel/model-load ---
+
+
+def test_prelabel_model_load_negative_time_returns_422(client):
+    res = client.post(
+        "/prelabel/model-load",
+        json={"job_id": "1", "model": "llama3.1:8b", "load_ms": -1},
+    )
+    assert res.status_code == 422
+
+
+def test_prelabel_model_load_missing_model_returns_422(client):
+    res = client.post("/prelabel/model-load", json={"job_id": "1", "load_ms": 1200.5})
+    assert res.status_code == 422
+
+
+# --- prelabel_events ---
+
+
+def _meta(job_id, task_id):
+    import json
+
+    return {
+        "type": "task_meta",
+        "data": json.dumps(
+            {
+                "job_id": str(job_id),
+                "task_id": task_id,
+                "filename": f"{task_id}.html",
+                "predictions": [],
+                "raw_llm_answers": {},
+                "dom_match_diagnostics": [],
+                "dom_match_by_label": {},
+                "task_ms_total": 1.0,
+                "task_ms_llm_total": 1.0,
+                "task_ms_dom_extract": 0.0,
+                "task_ms_dom_match": 0.0,
+                "n_llm_calls": 1,
+                "n_timeouts": 0,
+                "avg_llm_call_ms": 1.0,
+                "median_llm_call_ms": 1.0,
+            }
+        ),
+    }
+
+
+def _status(job_id, status):
+    import json
+
+    return {"type": "job_status", "data": json.dumps({"job_id": str(job_id), "status": status})}
+
+
+class FakeEventRepo:
+    def __init__(self, runs):
+        self.runs = runs
+        self.writes = []
+
+    def get_run(self, job_id):
+        return {"id": job_id} if job_id in self.runs else None
+
+    def save_task_prelabelling_metas(self, rows):
+        self.writes.append(
+            ("metas", [(r["prelabelling_run_id"], r["label_studio_task_id"]) for r in rows])
+        )
+
+    def set_run_status(self, job_id, status, error):
+        self.writes.append(("status", job_id, status))
+
+
+class FakeEventStream:
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.backlog = True
+        self.acked = []
+        self.dead = []
+
+    def read(self, count, block_ms):
+        return self.entries[:count]
+
+    def ack(self, entry_ids):
+        self.acked.extend(entry_ids)
+        self.entries = [e for e in self.entries if e[0] not in entry_ids]
+        if not self.entries:
+            self.backlog = False
+
+    def dead_letter(self, entry_id, fields):
+        self.dead.append(entry_id)
+        self.ack([entry_id])
+
+
+def _consumer(monkeypatch, entries, repo):
+    import prelabel_events_loop
+
+    monkeypatch.setattr(prelabel_events_loop, "PrelabellingRunRepository", lambda db: repo)
+    monkeypatch.setattr(prelabel_events_loop, "ProjectRepository", lambda db: MagicMock())
+    monkeypatch.setattr(prelabel_events_loop, "EvaluationRepository", lambda db: MagicMock())
+    monkeypatch.setattr(prelabel_events_loop, "RETRY_SECONDS", 0)
+    session = MagicMock()
+    stream = FakeEventStream(entries)
+    return prelabel_events_loop.PrelabelEventConsumer(stream, lambda: session), stream, session
+
+
+def test_events_are_stored_in_one_transaction_metas_first(monkeypatch):
+    repo = FakeEventRepo(runs={1})
+    entries = [
+        ("1-0", _meta(1, 10)),
+        ("2-0", _meta(1, 11)),
+        ("3-0", _meta(2, 12)),  # run does not exist
+        ("4-0", _status(1, "failed")),
+        ("5-0", {"type": "unknown", "data": "{}"}),
+    ]
+    consumer, stream, session = _consumer(monkeypatch, entries, repo)
+
+    assert consumer.consume_once() == 5
+
+    assert repo.writes == [("metas", [(1, 10), (1, 11)]), ("status", 1, "failed")]
+    session.commit.assert_called_once()
+    assert stream.acked == ["1-0", "2-0", "3-0", "4-0", "5-0"]
+
+
+def test_events_are_not_acknowledged_while_the_database_is_down(monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    repo = FakeEventRepo(runs={1})
+    consumer, stream, session = _consumer(monkeypatch, [("1-0", _meta(1, 10))], repo)
+    session.commit.side_effect = OperationalError("commit", {}, Exception("down"))
+
+    for _ in range(10):
+        assert consumer.consume_once() == 0
+
+    session.rollback.assert_called()
+    assert (stream.acked, stream.dead) == ([], [])
+
+
+def test_failing_event_is_dead_lettered_and_the_rest_stored(monkeypatch):
+    import prelabel_events_loop
+
+    monkeypatch.setattr(prelabel_events_loop, "MAX_ATTEMPTS", 2)
+    repo = FakeEventRepo(runs={1, 2})
+    consumer, stream, session = _consumer(
+        monkeypatch, [("1-0", _status(2, "failed")), ("2-0", _status(1, "failed"))], repo
+    )
+
+    def _commit():
+        if any(w[1] == 2 for w in repo.writes):
+            repo.writes.clear()
+            raise RuntimeError("constraint")
+
+    session.commit.side_effect = _commit
+
+    assert consumer.consume_once() == 0  # whole batch fails, switch to single entries
+    assert consumer.consume_once() == 0
+    assert consumer.consume_once() == 0  # second failure of 1-0
+    assert stream.dead == ["1-0"]
+    assert consumer.consume_once() == 1
+    assert stream.acked == ["1-0", "2-0"]
+    assert repo.writes == [("status", 1, "failed")]
@@ -2,12 +2,27 @@
 from __future__ import annotations
 
 import json
+import multiprocessing
 import os
+import socket
+from typing import Callable, List, Optional
 
 import redis
-import requests
 from contracts.jobs import JobPayload
+from domain.errors import DomainError
 from domain.prelabel_project import prelabel_project
+from infrastructure.cancellation import CancelListener
+from infrastructure.events import publish_event
+from infrastructure.job_queue import ReliableQueue
+from infrastructure.ml_backend import cancel_job_predictions, clear_job_cancel
+from infrastructure.scheduling import (
+    PRIORITY_QUEUES,
+    QUEUES,
+    jobs_waiting,
+    record_throughput,
+    slice_tasks,
+)
+from infrastructure.telemetry import TelemetryWriter, append_logs, expire_job
 from pydantic import ValidationError
 from utils.logging_utils import dev_logger, safe_logger
 
@@ -17,14 +32,16 @@ r = redis.Redis(
     decode_responses=True,
 )
 
-QUEUE = "prelabel_jobs"
 STATUS = "status:"
 RESULT = "result:"
 LOGS = "logs:"
 
-ORCHESTRATOR_URL = (
-    f"http://{os.getenv('ORCH_CONTAINER_NAME', 'orchestrator')}:{os.getenv('ORCH_PORT', '5001')}"
-)
+# worker processes started by this container, each with its own processing list
+PRELABEL_WORKER_PROCESSES = max(1, int(os.getenv("PRELABEL_WORKER_PROCESSES", "1")))
+# stable across restarts of the same container, so a restarted worker takes back its own jobs
+WORKER_ID = os.getenv("WORKER_ID") or socket.gethostname()
+# a job is requeued each time its worker dies; after this many starts it is failed instead
+PRELABEL_MAX_ATTEMPTS = max(1, int(os.getenv("PRELABEL_MAX_ATTEMPTS", "3")))
 
 
 def _status_key(job_id: str) -> str:
@@ -48,7 +65,14 @@ def _get_state(job_id: str) -> str | None:
 
 
 def _add_log(job_id: str, line: str) -> None:
-    r.rpush(_logs_key(job_id), line)
+    pipe = r.pipeline()
+    append_logs(pipe, _status_key(job_id), _logs_key(job_id), [line])
+    pipe.execute()
+
+
+def _retire(job_id: str) -> None:
+    # terminal state reached: status, logs and result expire instead of piling up
+    expire_job(r, _status_key(job_id), _logs_key(job_id), _result_key(job_id))
 
 
 def _cancelled(job_id: str) -> bool:
@@ -58,33 +82,104 @@ def _cancelled(job_id: str) -> bool:
 def _mark_cancelled(job_id: str) -> None:
     _set_status(job_id, state="CANCELLED")
     _add_log(job_id, "[INFO] Job cancelled.")
+    _retire(job_id)
+
+
+def _forward_cancel(job_id: str) -> None:
+    # ml_backend aborts the job's LLM calls at once instead of finishing its tasks
+    try:
+        aborted = cancel_job_predictions(job_id=job_id)
+    except DomainError as e:
+        _add_log(job_id, f"[WARN] Could not forward the cancel to ml_backend ({e.code}).")
+        return
+    _add_log(job_id, f"[INFO] Cancel received. {aborted} LLM calls aborted.")
+
+
+# pushes cancel requests for the running job; started per worker process in run_worker
+cancel_listener = CancelListener(r, on_cancel=_forward_cancel)
 
 
 def _send_callback(job_id: str, status: str, error: str | None = None) -> None:
+    # the orchestrator stores it after the job's task metas: they were published first
     try:
-        requests.post(
-            f"{ORCHESTRATOR_URL}/prelabel/callback",
-            json={"job_id": job_id, "status": status, "error": error},
-            timeout=10,
-        )
-    except requests.RequestException as e:
+        publish_event("job_status", {"job_id": job_id, "status": status, "error": error}, r)
+    except DomainError as e:
         safe_logger.error("prelabel_callback_failed | job_id=%s", job_id)
         if dev_logger:
             dev_logger.exception("prelabel_callback_failed_dev | error=%s", str(e))
 
 
-def handle_job(job: JobPayload) -> None:
+def _record_throughput(tasks: int, wall_seconds: float) -> None:
+    try:
+        record_throughput(r, tasks, wall_seconds)
+    except redis.RedisError:
+        pass  # only feeds the start estimates of queued jobs
+
+
+def handle_job(
+    job: JobPayload,
+    give_way: Optional[Callable[[List[int]], bool]] = None,
+) -> None:
+    """
+    Runs one turn of the job. With give_way, the job stops after its slice of
+    tasks while other jobs wait, and give_way requeues it (with the task ids
+    that failed so far); without, the job runs to the end.
+    """
     job_id = job.job_id
     _set_status(job_id, state="RUNNING")
     _add_log(job_id, "[INFO] Worker picked up job.")
 
+    if job.resume:
+        # ml_backend keeps refusing the tasks of a job cancelled before it was resumed
+        try:
+            clear_job_cancel(job_id=job_id)
+        except DomainError as e:
+            _add_log(job_id, f"[WARN] Could not clear the job's cancel in ml_backend ({e.code}).")
+
+    # per-task logs, progress and cancel checks share one pipelined round-trip per flush
+    telemetry = TelemetryWriter(r, _status_key(job_id), _logs_key(job_id))
+    cancel = cancel_listener.watch(job_id)
+
+    def _cancel_requested() -> bool:
+        if cancel.is_set():
+            return True
+        # fallback for a cancel published while the listener was disconnected
+        if telemetry.state() == "CANCEL_REQUESTED":
+            cancel_listener.cancel(job_id)
+            return True
+        return False
+
+    # failed task ids of the turn, once the job decided to give way
+    gave_way: List[List[int]] = []
+
+    def _give_way(failed: List[int]) -> bool:
+        try:
+            if not jobs_waiting(r, job.priority):
+                return False
+        except redis.RedisError:
+            return False
+        gave_way.append(failed)
+        return True
+
     try:
-        logs = prelabel_project(
-            job,
-            log_cb=lambda line: _add_log(job_id, line),
-            progress_cb=lambda pct: _set_status(job_id, progress=str(pct)),
-            cancel_cb=lambda: _cancelled(job_id),
-        )
+        try:
+            logs = prelabel_project(
+                job,
+                log_cb=telemetry.log,
+                progress_cb=lambda pct: telemetry.status(progress=str(pct)),
+                cancel_cb=_cancel_requested,
+                slice_tasks=slice_tasks(job.project_name) if give_way else 0,
+                yield_cb=_give_way,
+                throughput_cb=_record_throughput,
+            )
+        finally:
+            telemetry.flush()
+            cancel_listener.unwatch(job_id)
+
+        # give_way declines only for a cancel that arrived meanwhile, handled below
+        if gave_way and give_way(gave_way[0]):
+            _add_log(job_id, "[INFO] Requeued behind the waiting jobs.")
+            return
 
         if _cancelled(job_id):
             _mark_cancelled(job_id)
@@ -99,31 +194,116 @@ def handle_job(job: JobPayload) -> None:
             _send_callback(job.job_id, "done")
 
         _add_log(job_id, "[INFO] Job finished.")
+        _retire(job_id)
 
     except Exception as e:
         _set_status(job_id, state="FAILED", error=str(e))
+        _retire(job_id)
         _send_callback(job.job_id, "failed", error=str(e))
         safe_logger.error("job_failed | job_id=%s", job_id)
         if dev_logger:
             dev_logger.exception("job_failed_dev | job_id=%s", job_id)
 
 
-def main() -> None:
-    safe_logger.info("worker_starting")
-    while True:
-        item = r.blpop(QUEUE, timeout=5)
-        if not item:
+def _job_id(raw: str) -> str | None:
+    try:
+        return str(json.loads(raw)["job_id"])
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return None
+
+
+def _requeued(raws: List[str]) -> None:
+    for raw in raws:
+        job_id = _job_id(raw)
+        if job_id is None:
             continue
-        _, raw = item
+        _set_status(job_id, state="PENDING")
+        _add_log(job_id, "[WARN] Worker stopped before the job finished. Job requeued.")
+        safe_logger.warning("job_requeued | job_id=%s", job_id)
+
+
+def _requeue_turn(queue: ReliableQueue, raw: str, job: JobPayload, failed: List[int]) -> bool:
+    """
+    Moves the job from the processing list to the tail of its class in one
+    transaction; its next turn goes on from the checkpoint. False (nothing
+    moved) if the job was cancelled meanwhile.
+    """
+    key = _status_key(job.job_id)
+    requeued = job.model_copy(update={"skip_task_ids": failed}).model_dump_json()
+    with r.pipeline() as pipe:
+        while True:
+            try:
+                # a cancel written after the job's last check must not be overwritten
+                pipe.watch(key)
+                if pipe.hget(key, "state") == "CANCEL_REQUESTED":
+                    return False
+                pipe.multi()
+                pipe.lrem(queue.processing_key, 1, raw)
+                pipe.rpush(PRIORITY_QUEUES[job.priority], requeued)
+                pipe.hset(key, mapping={"state": "PENDING"})
+                # a turn given up is not an attempt that failed
+                pipe.hincrby(key, "attempts", -1)
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                continue
+
+
+def process_job(queue: ReliableQueue, raw: str) -> None:
+    """Runs one job taken from the queue; it leaves the processing list whatever the outcome."""
+    try:
         try:
-            payload = json.loads(raw)
-            job = JobPayload.model_validate(payload)
+            job = JobPayload.model_validate(json.loads(raw))
         except (json.JSONDecodeError, ValidationError) as e:
             safe_logger.error("invalid_payload")
             if dev_logger:
                 dev_logger.exception("invalid_payload_dev | error=%s", str(e))
-            continue
-        handle_job(job)
+            return
+
+        job_id = job.job_id
+        attempts = r.hincrby(_status_key(job_id), "attempts", 1)
+        if attempts > PRELABEL_MAX_ATTEMPTS:
+            error = f"Worker stopped during all {PRELABEL_MAX_ATTEMPTS} attempts of this job."
+            _set_status(job_id, state="FAILED", error=error)
+            _add_log(job_id, f"[ERROR] {error}")
+            _retire(job_id)
+            _send_callback(job_id, "failed", error=error)
+            return
+        if _cancelled(job_id):
+            # cancelled while it waited in the queue
+            _mark_cancelled(job_id)
+            _send_callback(job_id, "cancelled")
+            return
+        _set_status(job_id, worker=queue.worker_id)
+        handle_job(job, give_way=lambda failed: _requeue_turn(queue, raw, job, failed))
+    finally:
+        queue.ack(raw)
+
+
+def run_worker(worker_id: str) -> None:
+    queue = ReliableQueue(r, QUEUES, worker_id)
+    _requeued(queue.register())
+    queue.start_heartbeat(on_reaped=_requeued)
+    cancel_listener.start()
+    safe_logger.info("worker_starting | worker_id=%s", worker_id)
+    while True:
+        raw = queue.take(timeout=5)
+        if raw:
+            process_job(queue, raw)
+
+
+def main() -> None:
+    if PRELABEL_WORKER_PROCESSES == 1:
+        run_worker(WORKER_ID)
+        return
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(f"{WORKER_ID}-{i}",), name=f"worker-{i}")
+        for i in range(PRELABEL_WORKER_PROCESSES)
+    ]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
 
 
 if __name__ == "__main__":
@@ -1,4 +1,6 @@
 # worker/contracts/jobs.py
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -14,3 +16,12 @@ class JobPayload(BaseModel):
     system_prompt: str = Field(..., min_length=1)
     token: str = Field(..., min_length=1)
     questions_and_labels: QuestionsAndLabels
+    extraction_mode: Literal["per_question", "multi_question"] = "per_question"
+    model_digest: str | None = None
+    use_llm_cache: bool = True
+    context_mode: Literal["full", "chunked", "retrieval"] = "full"
+    retrieval_top_k: int = Field(default=8, ge=1)
+    resume: bool = False  # queued again by /prelabel/resume after the run stopped
+    priority: Literal["interactive", "bulk"] = "bulk"
+    # tasks that failed or were skipped in an earlier turn of this job; not tried again
+    skip_task_ids: list[int] = Field(default_factory=list)
@@ -1,21 +1,48 @@
 # worker/domain/prelabel_project.py
 from __future__ import annotations
 
+import os
 import time
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 from contracts.jobs import JobPayload
 from infrastructure.label_studio import (
-    get_tasks_without_predictions,
+    get_task_ids_with_predictions,
+    get_task_ids_without_predictions,
+    iter_tasks,
     resolve_project_id,
-    wait_until_prediction_saved,
 )
-from infrastructure.ml_backend import send_predict
-from infrastructure.orchestrator import send_task_meta
+from infrastructure.ml_backend import (
+    add_predict_batch_tasks,
+    close_predict_batch,
+    fetch_predict_batch_results,
+    open_predict_batch,
+)
+from infrastructure.ollama import LLM_KEEP_ALIVE, preload_model
+from infrastructure.orchestrator import (
+    get_checkpointed_task_ids,
+    send_model_load,
+    send_task_meta,
+)
+
+from domain.errors import DomainError, ExternalServiceError
+
+# tasks queued at ml_backend at once; keep >= PREDICT_BATCH_WORKERS so its pool never idles
+PRELABEL_MAX_IN_FLIGHT = max(1, int(os.getenv("PRELABEL_MAX_IN_FLIGHT", "4")))
+# long-poll for finished tasks; a cancel ends it early, as ml_backend aborts the tasks
+RESULT_WAIT_SECONDS = 5.0
+# also check predictions ml_backend acknowledged with their Label Studio id (one paged pass
+# at the end of the job); answers without an id are always checked
+PRELABEL_VERIFY_SAVED = os.getenv("PRELABEL_VERIFY_SAVED", "0") == "1"
 
 LogCB = Optional[Callable[[str], None]]
 ProgressCB = Optional[Callable[[int], None]]
 CancelCB = Optional[Callable[[], bool]]
+# True if the job gives way to waiting jobs; gets the list of failed task ids, which
+# still grows while the tasks in flight finish (read it once prelabel_project returned)
+YieldCB = Optional[Callable[[List[int]], bool]]
+# tasks finished and wall seconds of this turn
+ThroughputCB = Optional[Callable[[int, float], None]]
 
 
 def prelabel_project(
@@ -23,7 +50,16 @@ def prelabel_project(
     log_cb: LogCB = None,
     progress_cb: ProgressCB = None,
     cancel_cb: CancelCB = None,
+    slice_tasks: int = 0,
+    yield_cb: YieldCB = None,
+    throughput_cb: ThroughputCB = None,
 ) -> List[str]:
+    """
+    Prelabels the project's open tasks. With slice_tasks, yield_cb is asked after
+    that many finished tasks (and after every further result) whether the job
+    gives way; if so, no further task is queued, the tasks in flight finish and
+    the caller requeues the job, which goes on from the run's checkpoint.
+    """
     logs: List[str] = []
 
     def _log(line: str) -> None:
@@ -46,53 +82,194 @@ def prelabel_project(
     project_id = resolve_project_id(job.token, job.project_name)
     _log(f"[INFO] Using project '{job.project_name}' (id={project_id}).")
 
-    tasks = get_tasks_without_predictions(project_id, job.token)
-    total = len(tasks)
-    _log(f"[INFO] Found {total} tasks without predictions.")
+    # ids only: the documents are fetched one by one, shortly before they are queued
+    task_ids = get_task_ids_without_predictions(project_id, job.token)
+    _log(f"[INFO] Found {len(task_ids)} tasks without predictions.")
+
+    # tasks this run finished before a restart or a resume count as done and are not redone
+    try:
+        checkpointed = get_checkpointed_task_ids(job=job)
+    except ExternalServiceError as e:
+        _log(f"[WARN] Could not read the run's checkpoint ({e.code}). Continuing without.")
+        checkpointed = set()
+    if checkpointed:
+        task_ids = [i for i in task_ids if i not in checkpointed]
+        _log(f"[INFO] Resuming: {len(checkpointed)} tasks already done by this run.")
+    # failed or without HTML in an earlier turn: counted as done, like before slicing
+    skip = set(job.skip_task_ids)
+    skipped = [i for i in task_ids if i in skip]
+    if skipped:
+        task_ids = [i for i in task_ids if i not in skip]
+        _log(f"[INFO] Not retrying {len(skipped)} tasks that failed in an earlier turn.")
+    failed: List[int] = list(skipped)
+    total = len(task_ids) + len(checkpointed) + len(skipped)
+
+    if task_ids:
+        # load the weights before the first task so its latency (and timeout) is not
+        # skewed by the load; every /predict call renews keep_alive for the job
+        try:
+            load_ms = preload_model(job.model)
+        except ExternalServiceError as e:
+            _log(f"[WARN] Could not preload model '{job.model}' ({e.code}). Continuing.")
+        else:
+            _log(
+                f"[TIME] Model '{job.model}' loaded in {round(load_ms / 1000, 2)}s "
+                f"(keep_alive={LLM_KEEP_ALIVE})."
+            )
+            send_model_load(load_ms=load_ms, job=job)
 
     total_time = 0.0
     durations: List[float] = []
-    done = 0
+    done = len(checkpointed) + len(skipped)
+    turn_done = 0
+    giving_way = False
+    job_start = time.time()
 
-    _progress(0 if total > 0 else 100)
+    _progress(int(done / total * 100) if total else 100)
 
-    for t in tasks:
-        if cancel_cb and cancel_cb():
-            _log("[INFO] Cancel observed. Stopping.")
-            break
+    def _task_done() -> None:
+        nonlocal done, turn_done
+        done += 1
+        turn_done += 1
+        _progress(int(done / total * 100) if total else 100)
 
-        task_id = t["id"]
-        html = (t.get("data") or {}).get("html")
-        filename = (t.get("data") or {}).get("name", "")
-        if not html:
-            _log(f"[WARN] Task {task_id} has no HTML. Skipping.")
-            done += 1
-            _progress(int(done / total * 100) if total else 100)
-            continue
-
-        start = time.time()
-        resp = send_predict(task_id=task_id, html=html, filename=filename, job=job)
-        if resp.status_code != 200:
-            _log(f"[WARN] /predict returned {resp.status_code} for task {task_id}. Continuing.")
-        if resp.status_code == 200:
-            body = resp.json()
-            meta = body.get("meta", {})
+    remaining = iter_tasks(task_ids, job.token)
+    # task id (as ml_backend reports it) -> (queued at, task)
+    in_flight: Dict[str, Tuple[float, dict]] = {}
+
+    def _queue_next(n: int) -> List[dict]:
+        """Up to n further tasks for ml_backend; tasks without HTML are skipped on the way."""
+        batch: List[dict] = []
+        if n <= 0:
+            return batch
+        for t in remaining:
+            data = t.get("data") or {}
+            if not data.get("html"):
+                _log(f"[WARN] Task {t['id']} has no HTML. Skipping.")
+                failed.append(t["id"])
+                _task_done()
+                continue
+            batch.append({"id": t["id"], "filename": data.get("name", ""), "html": data["html"]})
+            in_flight[str(t["id"])] = (time.time(), t)
+            if len(batch) == n:
+                break
+        return batch
+
+    # tasks whose prediction is checked in Label Studio after the last task
+    to_verify: List[int] = []
+    # metas Redis did not take; sent again after the last task, as a resume skips the
+    # task (its prediction is in Label Studio) and would never send them
+    unsent_metas: List[Tuple[int, dict]] = []
+
+    def _send_meta(task_id: int, meta: dict) -> bool:
+        try:
             send_task_meta(task_id=task_id, meta=meta, job=job)
-        ok = wait_until_prediction_saved(task_id, job.token)
+        except ExternalServiceError as e:
+            _log(f"[WARN] Could not record the meta of task {task_id} ({e.code}).")
+            return False
+        return True
+
+    def _finish(result: dict) -> None:
+        nonlocal total_time
+        start, t = in_flight.pop(result["task_id"])
+        task_id = t["id"]
+        if result["status_code"] != 200:
+            _log(
+                f"[WARN] /predict returned {result['status_code']} for task {task_id}. Continuing."
+            )
+            status = "failed"
+            failed.append(task_id)
+        else:
+            response = result.get("response") or {}
+            meta = response.get("meta", {})
+            if not _send_meta(task_id, meta):
+                unsent_metas.append((task_id, meta))
+            # ml_backend writes the prediction before it answers; its id is the acknowledgement
+            prediction_id = response.get("prediction_id")
+            if prediction_id is None or PRELABEL_VERIFY_SAVED:
+                to_verify.append(task_id)
+            status = "ok" if prediction_id is None else f"ok, prediction {prediction_id}"
+        # queued -> answered: with more tasks in flight than ml_backend workers this
+        # includes the time the task waited for a free worker
         dt = time.time() - start
         durations.append(dt)
         total_time += dt
-        status = "ok" if ok else "timeout"
         _log(f"[TIME] Task {task_id} finished in {round(dt, 2)}s ({status}).")
+        _task_done()
 
-        done += 1
-        _progress(int(done / total * 100) if total else 100)
+    # ml_backend predicts the queued tasks on its own pool; the worker keeps
+    # PRELABEL_MAX_IN_FLIGHT of them queued and handles each one as it finishes
+    batch_id = None
+    cursor = 0
+    try:
+        first = _queue_next(PRELABEL_MAX_IN_FLIGHT)
+        if first:
+            batch_id = open_predict_batch(tasks=first, job=job)["batch_id"]
+        while in_flight:
+            if cancel_cb and cancel_cb():
+                _log("[INFO] Cancel observed. Stopping.")
+                break
+            out = fetch_predict_batch_results(
+                batch_id=batch_id, after=cursor, wait=RESULT_WAIT_SECONDS
+            )
+            cursor = out["cursor"]
+            if (
+                not giving_way
+                and slice_tasks
+                and turn_done >= slice_tasks
+                and yield_cb
+                and yield_cb(failed)
+            ):
+                giving_way = True
+                _log(f"[INFO] Giving way to waiting jobs after {turn_done} tasks.")
+            # refill the window before the bookkeeping so ml_backend never runs dry;
+            # after a cancel nothing new is queued, the loop stops at the next check
+            stop = giving_way or (cancel_cb and cancel_cb())
+            refill = [] if stop else _queue_next(len(out["results"]))
+            if refill:
+                add_predict_batch_tasks(batch_id=batch_id, tasks=refill)
+            for result in out["results"]:
+                _finish(result)
+    finally:
+        remaining.close()
+        if batch_id:
+            try:
+                # drops the tasks still queued after a cancel or an error
+                close_predict_batch(batch_id=batch_id)
+            except DomainError:
+                pass
+
+    if unsent_metas:
+        lost = [task_id for task_id, meta in unsent_metas if not _send_meta(task_id, meta)]
+        if lost:
+            _log(f"[ERROR] Metas of tasks {sorted(lost)} are lost; their predictions are saved.")
+        else:
+            _log(f"[INFO] Recorded {len(unsent_metas)} metas on the second try.")
+
+    if to_verify:
+        try:
+            missing = set(to_verify) - get_task_ids_with_predictions(project_id, job.token)
+        except ExternalServiceError as e:
+            _log(f"[WARN] Could not verify saved predictions ({e.code}).")
+        else:
+            if missing:
+                _log(
+                    f"[WARN] {len(missing)} of {len(to_verify)} predictions are missing in "
+                    f"Label Studio: tasks {sorted(missing)}."
+                )
+            else:
+                _log(f"[INFO] Verified {len(to_verify)} predictions in Label Studio.")
 
     if durations:
         avg = total_time / len(durations)
+        wall = time.time() - job_start
         _log(
-            f"[SUMMARY] Processed: {len(durations)} tasks | Total: {round(total_time, 2)}s | Avg: {round(avg, 2)}s"
+            f"[SUMMARY] Processed: {len(durations)} tasks | Total: {round(total_time, 2)}s | "
+            f"Avg: {round(avg, 2)}s | Wall: {round(wall, 2)}s | "
+            f"In flight: {PRELABEL_MAX_IN_FLIGHT}"
         )
+        if throughput_cb:
+            throughput_cb(len(durations), wall)
 
     _log(f"[JOB] job_id={job.job_id}")
     return logs
@@ -0,0 +1,76 @@
+# worker/infrastructure/cancellation.py
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Optional
+
+import redis
+
+# the orchestrator publishes the job id here when a job is cancelled
+CANCEL_CHANNEL = "prelabel_cancel"
+# wait before subscribing again after the connection to Redis was lost
+CANCEL_RESUBSCRIBE_SECONDS = 2.0
+
+
+class CancelListener:
+    """
+    Cancel requests pushed over Redis pub/sub for the jobs this process runs.
+    A job's event is set as soon as the message arrives and on_cancel is called
+    once per job (to abort its work elsewhere). Pub/sub does not keep messages
+    while the subscriber is disconnected, so the job's state in the status hash
+    stays the fallback; cancel() is also how that fallback reports a cancel.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        on_cancel: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self._r = client
+        self._on_cancel = on_cancel
+        self._watched: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def watch(self, job_id: str) -> threading.Event:
+        with self._lock:
+            return self._watched.setdefault(job_id, threading.Event())
+
+    def unwatch(self, job_id: str) -> None:
+        with self._lock:
+            self._watched.pop(job_id, None)
+
+    def cancel(self, job_id: str) -> bool:
+        """Sets the job's event; False if the job is not watched or was cancelled already."""
+        with self._lock:
+            event = self._watched.get(job_id)
+            if event is None or event.is_set():
+                return False
+            event.set()
+        if self._on_cancel:
+            self._on_cancel(job_id)
+        return True
+
+    def _listen(self, stop: threading.Event) -> None:
+        pubsub = self._r.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(CANCEL_CHANNEL)
+            while not stop.is_set():
+                message = pubsub.get_message(timeout=1.0)
+                if message and message.get("type") == "message":
+                    self.cancel(str(message["data"]))
+        finally:
+            pubsub.close()
+
+    def start(self) -> threading.Event:
+        """Listens on a daemon thread; set the returned event to stop."""
+        stop = threading.Event()
+
+        def _run() -> None:
+            while not stop.is_set():
+                try:
+                    self._listen(stop)
+                except redis.RedisError:
+                    stop.wait(CANCEL_RESUBSCRIBE_SECONDS)
+
+        threading.Thread(target=_run, name="cancel-listener", daemon=True).start()
+        return stop
@@ -0,0 +1,39 @@
+# worker/infrastructure/events.py
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import redis
+from domain.errors import ExternalServiceError
+
+# worker -> orchestrator events (task metas, model loads, job outcomes); the orchestrator's
+# consumer group stores them in Postgres and deletes each entry once it is committed
+EVENTS_STREAM = "prelabel_events"
+EVENTS_PUBLISH_RETRIES = max(1, int(os.getenv("EVENTS_PUBLISH_RETRIES", "3")))
+EVENTS_PUBLISH_RETRY_DELAY_SECONDS = float(os.getenv("EVENTS_PUBLISH_RETRY_DELAY_SECONDS", "0.5"))
+
+# the job queue's Redis; connects on first use
+events_client = redis.Redis(
+    host=os.getenv("REDIS_HOST", "job_queue"),
+    port=int(os.getenv("REDIS_PORT", "6379")),
+    decode_responses=True,
+)
+
+
+def publish_event(kind: str, data: dict, client: redis.Redis | None = None) -> str:
+    """Appends one event to the stream; its id once Redis has it, else ExternalServiceError."""
+    fields = {"type": kind, "data": json.dumps(data)}
+    last_error = None
+    for attempt in range(EVENTS_PUBLISH_RETRIES):
+        try:
+            return (client or events_client).xadd(EVENTS_STREAM, fields)
+        except redis.RedisError as e:
+            last_error = e
+            if attempt < EVENTS_PUBLISH_RETRIES - 1:
+                time.sleep(EVENTS_PUBLISH_RETRY_DELAY_SECONDS)
+    raise ExternalServiceError(
+        code="EVENT_BUS_UNAVAILABLE",
+        message=f"Could not publish the {kind} event.",
+    ) from last_error
@@ -0,0 +1,152 @@
+# worker/infrastructure/job_queue.py
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+
+import redis
+
+from infrastructure.scheduling import PRIORITY_QUEUES
+
+# a worker whose heartbeat is older than this is considered dead and its jobs are requeued
+WORKER_HEARTBEAT_TTL = int(os.getenv("WORKER_HEARTBEAT_TTL", "30"))
+WORKER_HEARTBEAT_INTERVAL = max(1, WORKER_HEARTBEAT_TTL // 3)
+
+WORKERS = "prelabel_workers"  # set of worker ids that may hold jobs
+PROCESSING = "prelabel_jobs:processing:"  # + worker id: jobs taken and not yet finished
+HEARTBEAT = "worker:heartbeat:"  # + worker id: expires WORKER_HEARTBEAT_TTL after the last beat
+# an idle worker blocks on the first queue this long before it looks at the others again
+TAKE_POLL_SECONDS = 1.0
+
+
+def _priority_queue(raw: str) -> str:
+    # unreadable payloads go to bulk; the worker that takes them drops them
+    try:
+        priority = json.loads(raw).get("priority")
+    except (json.JSONDecodeError, AttributeError):
+        priority = None
+    return PRIORITY_QUEUES.get(priority, PRIORITY_QUEUES["bulk"])
+
+
+class ReliableQueue:
+    """
+    Reliable-queue protocol on Redis lists: a job is moved atomically (LMOVE)
+    from a queue to the worker's own processing list and only removed from
+    there once it is finished. The queues are priority classes, highest first;
+    a job is taken from a queue only while all queues before it are empty.
+    Workers beat a heartbeat key; any worker's reaper puts the jobs of a worker
+    whose heartbeat expired back at the head of their priority's queue (they had
+    started already), so a crashed worker loses nothing and several workers
+    (on one or many machines) can consume the same queues.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        queues: List[str],
+        worker_id: str,
+        heartbeat_ttl: int = WORKER_HEARTBEAT_TTL,
+    ) -> None:
+        self._r = client
+        self._queues = list(queues)
+        self.worker_id = worker_id
+        self._ttl = heartbeat_ttl
+        self.processing_key = f"{PROCESSING}{worker_id}"
+
+    def register(self) -> List[str]:
+        """
+        Announces the worker. Jobs left in its processing list by an earlier
+        process with the same id (a restart) go back to the queue and are returned.
+        """
+        self.heartbeat()
+        return self._requeue(self.processing_key)
+
+    def heartbeat(self) -> None:
+        # re-announces the worker too: a beat missed for a whole TTL got it reaped
+        pipe = self._r.pipeline()
+        pipe.set(f"{HEARTBEAT}{self.worker_id}", "1", ex=self._ttl)
+        pipe.sadd(WORKERS, self.worker_id)
+        pipe.execute()
+
+    def take(self, timeout: int = 5) -> Optional[str]:
+        """
+        The next job by priority, moved into this worker's processing list; None
+        after timeout. Redis can only block on one list, so an idle worker blocks
+        on the first queue in short rounds and checks the others in between.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            for queue in self._queues:
+                raw = self._r.lmove(queue, self.processing_key, "LEFT", "RIGHT")
+                if raw is not None:
+                    return raw
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return None
+            raw = self._r.blmove(
+                self._queues[0], self.processing_key, min(TAKE_POLL_SECONDS, left), "LEFT", "RIGHT"
+            )
+            if raw is not None:
+                return raw
+
+    def ack(self, raw: str) -> None:
+        """The job is finished (in whatever state): it leaves the processing list."""
+        self._r.lrem(self.processing_key, 1, raw)
+
+    def reap(self) -> List[str]:
+        """Requeues the jobs of every registered worker whose heartbeat expired."""
+        requeued: List[str] = []
+        for worker_id in self._r.smembers(WORKERS):
+            heartbeat_key = f"{HEARTBEAT}{worker_id}"
+            if worker_id == self.worker_id or self._r.exists(heartbeat_key):
+                continue
+            # a worker that beats again is announced again by its next heartbeat
+            self._r.srem(WORKERS, worker_id)
+            requeued += self._requeue(f"{PROCESSING}{worker_id}", heartbeat_key)
+        return requeued
+
+    def _requeue(self, processing_key: str, heartbeat_key: Optional[str] = None) -> List[str]:
+        # each job goes back to the head of its own class, in one transaction per job: if
+        # two reapers race, each job moves exactly once; with heartbeat_key, a worker that
+        # beats again meanwhile keeps the jobs left
+        requeued: List[str] = []
+        with self._r.pipeline() as pipe:
+            while True:
+                if heartbeat_key and self._r.exists(heartbeat_key):
+                    return requeued
+                try:
+                    pipe.watch(processing_key)
+                    raw = pipe.lindex(processing_key, -1)
+                    if raw is None:
+                        pipe.unwatch()
+                        return requeued
+                    pipe.multi()
+                    pipe.lmove(processing_key, _priority_queue(raw), "RIGHT", "LEFT")
+                    pipe.execute()
+                except redis.WatchError:
+                    continue
+                requeued.append(raw)
+
+    def start_heartbeat(self, on_reaped=None) -> threading.Event:
+        """
+        Beats (and reaps) every WORKER_HEARTBEAT_INTERVAL on a daemon thread, also
+        while a long job runs; set the returned event to stop.
+        """
+        stop = threading.Event()
+
+        def _beat() -> None:
+            while not stop.wait(WORKER_HEARTBEAT_INTERVAL):
+                try:
+                    self.heartbeat()
+                    requeued = self.reap()
+                    if requeued and on_reaped:
+                        on_reaped(requeued)
+                except redis.RedisError:
+                    # the next beat retries; a missed one only matters after the whole TTL
+                    pass
+
+        threading.Thread(target=_beat, name=f"heartbeat-{self.worker_id}", daemon=True).start()
+        return stop
@@ -2,8 +2,10 @@
 from __future__ import annotations
 
 import os
-import time
-from typing import Any, Dict, List, Optional
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Set
 
 import requests
 from domain.errors import ExternalServiceError, NotFound
@@ -14,9 +16,10 @@ LS_PORT = int(os.getenv("LS_PORT", "8080"))
 LS_BASE = os.getenv("LS_BASE", f"http://{LS_HOST}:{LS_PORT}")
 
 HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
-POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "2"))
-POLL_TIMEOUT = float(os.getenv("POLL_TIMEOUT", "900"))
 PAGE_SIZE = int(os.getenv("LS_PAGE_SIZE", "100"))
+# documents fetched ahead of the task that is queued next, and threads fetching them
+TASK_PREFETCH = max(1, int(os.getenv("LS_TASK_PREFETCH", "8")))
+TASK_FETCH_THREADS = 4
 
 
 def _ls_headers(token: str) -> Dict[str, str]:
@@ -65,21 +68,19 @@ def resolve_project_id(token: str, project_name: str) -> int:
     )
 
 
-def get_tasks_without_predictions(
-    project_id: int, token: str, limit: Optional[int] = None
-) -> List[Dict[str, Any]]:
-    tasks: List[Dict[str, Any]] = []
+def _task_pages(
+    project_id: int, token: str, fields: str, include: str = "predictions"
+) -> Iterator[List[Dict[str, Any]]]:
+    """The project's tasks page by page (PAGE_SIZE per request), with the given fields only."""
     page = 1
-    seen = 0
-
     while True:
         url = f"{LS_BASE}/api/projects/{project_id}/tasks"
         headers = _ls_headers(token)
         params = {
             "page": page,
             "page_size": PAGE_SIZE,
-            "include": "predictions",
-            "fields": "id,data,predictions",
+            "include": include,
+            "fields": fields,
         }
         try:
             resp = requests.get(url, headers=headers, params=params, timeout=HTTP_TIMEOUT)
@@ -120,33 +121,44 @@ def get_tasks_without_predictions(
             has_more = False
 
         if not batch:
-            break
-
-        for t in batch:
-            preds = (t or {}).get("predictions") or []
-            if len(preds) == 0:
-                tasks.append(t)
-                seen += 1
-                if limit is not None and seen >= limit:
-                    return tasks
-
+            return
+        yield batch
         if not has_more:
-            break
+            return
         page += 1
 
-    return tasks
-
 
 def _task_has_predictions(task: Dict[str, Any]) -> bool:
+    task = task or {}
+    if task.get("total_predictions") is not None:
+        return task["total_predictions"] > 0
     return len(task.get("predictions") or []) > 0
 
 
+def get_task_ids_without_predictions(project_id: int, token: str) -> List[int]:
+    """
+    Ids of the project's tasks without a prediction, in project order. Only ids and
+    prediction counts are transferred; the documents are fetched with iter_tasks.
+    """
+    return [
+        int(t["id"])
+        for batch in _task_pages(
+            project_id, token, fields="id,total_predictions", include="total_predictions"
+        )
+        for t in batch
+        if not _task_has_predictions(t)
+    ]
+
+
 def _fetch_task(task_id: int, token: str) -> Dict[str, Any]:
     url = f"{LS_BASE}/api/tasks/{task_id}"
-    headers = _ls_headers(token)
-    params = {"include": "predictions", "fields": "id,data,predictions"}
     try:
-        resp = requests.get(url, headers=headers, params=params, timeout=HTTP_TIMEOUT)
+        resp = requests.get(
+            url, headers=_ls_headers(token), params={"fields": "id,data"}, timeout=HTTP_TIMEOUT
+        )
+        if resp.status_code == 404:
+            # deleted since it was listed: handled like a task without HTML
+            return {"id": task_id, "data": {}}
         resp.raise_for_status()
         return resp.json()
     except HTTPError as e:
@@ -167,19 +179,38 @@ def _fetch_task(task_id: int, token: str) -> Dict[str, Any]:
         )
 
 
-def wait_until_prediction_saved(
-    task_id: int,
-    token: str,
-    timeout_s: float = POLL_TIMEOUT,
-    poll_every_s: float = POLL_INTERVAL,
-) -> bool:
-    deadline = time.time() + timeout_s
-    while time.time() < deadline:
-        try:
-            t = _fetch_task(task_id, token)
-            if _task_has_predictions(t):
-                return True
-        except requests.RequestException:
-            pass
-        time.sleep(poll_every_s)
-    return False
+def iter_tasks(
+    task_ids: Iterable[int], token: str, prefetch: int = TASK_PREFETCH
+) -> Iterator[Dict[str, Any]]:
+    """
+    The tasks (id, data) in the order of task_ids, each fetched shortly before it is
+    needed: at most `prefetch` are fetched ahead, so memory does not grow with the project.
+    """
+    ids = iter(task_ids)
+    ahead: Deque[Future] = deque()
+    pool = ThreadPoolExecutor(
+        max_workers=max(1, min(prefetch, TASK_FETCH_THREADS)), thread_name_prefix="ls-fetch"
+    )
+    try:
+        for task_id in islice(ids, max(1, prefetch)):
+            ahead.append(pool.submit(_fetch_task, task_id, token))
+        while ahead:
+            task = ahead.popleft().result()
+            for task_id in islice(ids, 1):
+                ahead.append(pool.submit(_fetch_task, task_id, token))
+            yield task
+    finally:
+        # the caller stopped early (cancel, error): drop what was fetched ahead
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def get_task_ids_with_predictions(project_id: int, token: str) -> Set[int]:
+    """Ids of the project's tasks that have a prediction: one request per page, no task data."""
+    return {
+        int(t["id"])
+        for batch in _task_pages(
+            project_id, token, fields="id,total_predictions", include="total_predictions"
+        )
+        for t in batch
+        if _task_has_predictions(t)
+    }
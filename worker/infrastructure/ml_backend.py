@@ -5,51 +5,109 @@ import os
 
 import requests
 from contracts.jobs import JobPayload
-from domain.errors import ExternalServiceError
+from domain.errors import ExternalServiceError, NotFound
 
 from infrastructure.label_studio import LS_BASE
+from infrastructure.ollama import LLM_KEEP_ALIVE, OLLAMA_BASE
 
 ML_HOST = os.getenv("ML_BACKEND_HOST", "ml_backend")
 ML_PORT = int(os.getenv("ML_BACKEND_PORT", "6789"))
 ML_BASE = os.getenv("ML_BACKEND_BASE", f"http://{ML_HOST}:{ML_PORT}")
-OLLAMA_BASE = os.getenv("OLLAMA_BASE", "http://ollama:11434")
 
 
 LLM_TIMEOUT = int(os.getenv("LLM_TIMEOUT", "20"))
-LLM_OVERHEAD = int(os.getenv("LLM_OVERHEAD", "5"))
-UPLOAD_MARGIN = int(os.getenv("UPLOAD_MARGIN", "30"))
 LLM_NUM_CTX = int(os.getenv("LLM_NUM_CTX", "4096"))
+# questions of one task sent to Ollama at once, keep <= OLLAMA_NUM_PARALLEL
+LLM_MAX_CONCURRENCY = max(1, int(os.getenv("LLM_MAX_CONCURRENCY", "1")))
+# document tokens per chunk for context_mode=chunked (ml_backend caps it to LLM_NUM_CTX - 1024)
+LLM_CHUNK_TOKENS = int(os.getenv("LLM_CHUNK_TOKENS", "3072"))
+# /predict_batch calls only queue or read results, they never wait for a prediction
+BATCH_HTTP_TIMEOUT = float(os.getenv("ML_BACKEND_BATCH_HTTP_TIMEOUT", "60"))
+CANCEL_HTTP_TIMEOUT = 10.0
 
 
-def send_predict(*, task_id: int, html: str, filename: str, job: JobPayload) -> requests.Response:
-    url = f"{ML_BASE}/predict"
-
-    q_count = max(1, len(job.questions_and_labels.questions))
-    request_timeout = q_count * (LLM_TIMEOUT + LLM_OVERHEAD) + UPLOAD_MARGIN
-
-    payload = {
-        "job_id": job.job_id,
-        "task_id": str(task_id),
-        "filename": filename,
-        "html": html,
-        "questions_and_labels": job.questions_and_labels.model_dump(),
-        "llm_config": {
-            "ollama_model": job.model,
-            "ollama_base": OLLAMA_BASE,
-            "system_prompt": job.system_prompt,
-            "llm_timeout_seconds": LLM_TIMEOUT,
-            "num_ctx": LLM_NUM_CTX,
-        },
-        "label_studio_config": {
-            "label_studio_url": LS_BASE,
-            "ls_token": job.token,
-        },
+def _llm_config(job: JobPayload) -> dict:
+    return {
+        "ollama_model": job.model,
+        "ollama_base": OLLAMA_BASE,
+        "system_prompt": job.system_prompt,
+        "llm_timeout_seconds": LLM_TIMEOUT,
+        "num_ctx": LLM_NUM_CTX,
+        "max_concurrency": LLM_MAX_CONCURRENCY,
+        "extraction_mode": job.extraction_mode,
+        "model_digest": job.model_digest,
+        "use_llm_cache": job.use_llm_cache,
+        "context_mode": job.context_mode,
+        "chunk_tokens": LLM_CHUNK_TOKENS,
+        "retrieval_top_k": job.retrieval_top_k,
+        "keep_alive": LLM_KEEP_ALIVE,
     }
 
+
+def _batch_call(method: str, path: str, *, timeout: float = BATCH_HTTP_TIMEOUT, **kwargs) -> dict:
     try:
-        return requests.post(url, json=payload, timeout=request_timeout)
+        resp = requests.request(method, f"{ML_BASE}{path}", timeout=timeout, **kwargs)
     except requests.RequestException:
         raise ExternalServiceError(
             code="ML_BACKEND_UNAVAILABLE",
             message="ML backend is unavailable.",
         )
+    if resp.status_code == 404:
+        raise NotFound(code="PREDICT_BATCH_NOT_FOUND", message="ML backend batch expired.")
+    if resp.status_code not in (200, 202):
+        raise ExternalServiceError(
+            code="ML_BACKEND_BATCH_REJECTED",
+            message=f"ML backend answered {resp.status_code} for {method} {path}.",
+        )
+    return resp.json()
+
+
+def _batch_task(task: dict) -> dict:
+    return {"task_id": str(task["id"]), "filename": task["filename"], "html": task["html"]}
+
+
+def open_predict_batch(*, tasks: list[dict], job: JobPayload) -> dict:
+    """Queues tasks ({"id", "filename", "html"}) for prediction; returns at once with batch_id."""
+    payload = {
+        "job_id": job.job_id,
+        "tasks": [_batch_task(t) for t in tasks],
+        "questions_and_labels": job.questions_and_labels.model_dump(),
+        "llm_config": _llm_config(job),
+        "label_studio_config": {"label_studio_url": LS_BASE, "ls_token": job.token},
+    }
+    return _batch_call("POST", "/predict_batch", json=payload)
+
+
+def add_predict_batch_tasks(*, batch_id: str, tasks: list[dict]) -> dict:
+    return _batch_call(
+        "POST",
+        f"/predict_batch/{batch_id}/tasks",
+        json={"tasks": [_batch_task(t) for t in tasks]},
+    )
+
+
+def fetch_predict_batch_results(*, batch_id: str, after: int, wait: float = 10.0) -> dict:
+    """Results finished after the cursor `after`, waiting up to `wait` seconds for one."""
+    return _batch_call(
+        "GET",
+        f"/predict_batch/{batch_id}",
+        params={"after": after, "wait": wait},
+        timeout=wait + BATCH_HTTP_TIMEOUT,
+    )
+
+
+def close_predict_batch(*, batch_id: str) -> dict:
+    return _batch_call("DELETE", f"/predict_batch/{batch_id}")
+
+
+def cancel_job_predictions(*, job_id: str) -> int:
+    """
+    Aborts the job's LLM calls waiting for Ollama and makes ml_backend refuse the
+    job's further tasks; returns the number of calls aborted.
+    """
+    return _batch_call("POST", f"/cancel/{job_id}", timeout=CANCEL_HTTP_TIMEOUT)["aborted"]
+
+
+def clear_job_cancel(*, job_id: str) -> None:
+    """Lets ml_backend run the tasks of a job again that was cancelled and is resumed."""
+    _batch_call("DELETE", f"/cancel/{job_id}", timeout=CANCEL_HTTP_TIMEOUT)
@@ -0,0 +1,58 @@
+# worker/infrastructure/ollama.py
+from __future__ import annotations
+
+import os
+import time
+
+import requests
+from domain.errors import ExternalServiceError
+
+OLLAMA_BASE = os.getenv("OLLAMA_BASE", "http://ollama:11434")
+# loading large weights from disk can take minutes
+LLM_PRELOAD_TIMEOUT = float(os.getenv("LLM_PRELOAD_TIMEOUT", "300"))
+
+
+def _keep_alive(raw: str) -> int | str:
+    # Ollama takes a duration ("30m") or seconds; "-1" keeps the model loaded until unloaded
+    try:
+        return int(raw)
+    except ValueError:
+        return raw
+
+
+# how long the job's model stays loaded after the warm-up and after every call of the job
+LLM_KEEP_ALIVE = _keep_alive(os.getenv("LLM_KEEP_ALIVE", "30m"))
+
+
+def preload_model(model: str) -> float:
+    """
+    Loads the model into Ollama without generating anything and returns the
+    milliseconds until it was ready (near zero when it was loaded already).
+    """
+    start = time.perf_counter()
+    try:
+        resp = requests.post(
+            f"{OLLAMA_BASE}/api/generate",
+            # no prompt: Ollama only loads the model and applies keep_alive
+            json={"model": model, "keep_alive": LLM_KEEP_ALIVE, "stream": False},
+            timeout=LLM_PRELOAD_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        raise ExternalServiceError(
+            code="OLLAMA_UNAVAILABLE",
+            message="Could not reach Ollama to load the model.",
+            meta={"model": model, "error": str(e)},
+        )
+    if resp.status_code == 404:
+        raise ExternalServiceError(
+            code="OLLAMA_MODEL_MISSING",
+            message="Model is not available in Ollama.",
+            meta={"model": model},
+        )
+    if not resp.ok:
+        raise ExternalServiceError(
+            code="OLLAMA_PRELOAD_FAILED",
+            message="Ollama could not load the model.",
+            meta={"model": model, "status_code": resp.status_code},
+        )
+    return (time.perf_counter() - start) * 1000
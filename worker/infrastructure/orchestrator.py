@@ -5,14 +5,21 @@ import os
 
 import requests
 from contracts.jobs import JobPayload
+from domain.errors import ExternalServiceError
 from utils.logging_utils import dev_logger, safe_logger
 
+from infrastructure.events import publish_event
+
 ORCH_HOST = os.getenv("ORCH_CONTAINER_NAME", "orchestrator")
 ORCH_PORT = os.getenv("ORCH_PORT", "5001")
 ORCHESTRATOR_URL = f"http://{ORCH_HOST}:{ORCH_PORT}"
 
 
 def send_task_meta(*, task_id: int, meta: dict, job: JobPayload) -> None:
+    """
+    Publishes the task's meta for task_prelabelling_metas. Raises ExternalServiceError
+    if Redis does not take it, so a meta is never dropped silently.
+    """
     payload = {
         "job_id": job.job_id,
         "task_id": task_id,
@@ -29,25 +36,38 @@ def send_task_meta(*, task_id: int, meta: dict, job: JobPayload) -> None:
         "n_timeouts": meta.get("n_timeouts", 0),
         "avg_llm_call_ms": meta.get("avg_llm_call_ms", 0.0),
         "median_llm_call_ms": meta.get("median_llm_call_ms", 0.0),
+        "task_ms_llm_load": meta.get("task_ms_llm_load", 0.0),
+        "task_ms_llm_prompt_eval": meta.get("task_ms_llm_prompt_eval", 0.0),
+        "n_llm_prompt_eval_tokens": meta.get("n_llm_prompt_eval_tokens", 0),
+        "task_ms_llm_eval": meta.get("task_ms_llm_eval", 0.0),
+        "n_llm_eval_tokens": meta.get("n_llm_eval_tokens", 0),
     }
     if dev_logger:
         dev_logger.info("send_task_meta_payload | task_id=%s | payload=%s", task_id, payload)
+    publish_event("task_meta", payload)
+
+
+def send_model_load(*, load_ms: float, job: JobPayload) -> None:
+    """Records on the run how long the model took to load before the first task."""
     try:
-        resp = requests.post(
-            f"{ORCHESTRATOR_URL}/prelabel/task-meta",
-            json=payload,
-            timeout=10,
+        publish_event("model_load", {"job_id": job.job_id, "model": job.model, "load_ms": load_ms})
+    except ExternalServiceError:
+        # only a timing; the job goes on without it
+        safe_logger.error("send_model_load_failed | job_id=%s", job.job_id)
+
+
+def get_checkpointed_task_ids(*, job: JobPayload) -> set[int]:
+    """Tasks this run already finished (their meta is recorded), e.g. before a restart."""
+    try:
+        resp = requests.get(f"{ORCHESTRATOR_URL}/prelabel/checkpoint/{job.job_id}", timeout=10)
+    except requests.RequestException:
+        raise ExternalServiceError(
+            code="ORCHESTRATOR_UNAVAILABLE",
+            message="Orchestrator is unavailable.",
+        )
+    if resp.status_code != 200:
+        raise ExternalServiceError(
+            code="CHECKPOINT_READ_FAILED",
+            message=f"Orchestrator answered {resp.status_code} for the run's checkpoint.",
         )
-        if resp.status_code != 200:
-            safe_logger.error(
-                "send_task_meta_rejected | job_id=%s | task_id=%s | status=%s",
-                job.job_id,
-                task_id,
-                resp.status_code,
-            )
-            if dev_logger:
-                dev_logger.error("send_task_meta_rejected_dev | body=%s", resp.text)
-    except requests.RequestException as e:
-        safe_logger.error("send_task_meta_failed | job_id=%s | task_id=%s", job.job_id, task_id)
-        if dev_logger:
-            dev_logger.exception("send_task_meta_failed_dev | error=%s", str(e))
+    return set(resp.json().get("task_ids") or [])
@@ -0,0 +1,76 @@
+# worker/infrastructure/scheduling.py
+from __future__ import annotations
+
+import os
+import time
+from typing import Dict, List
+
+import redis
+
+# one queue per priority class, highest first; workers always take from the first non-empty one
+PRIORITY_QUEUES: Dict[str, str] = {
+    "interactive": "prelabel_jobs:interactive",
+    "bulk": "prelabel_jobs",
+}
+QUEUES: List[str] = list(PRIORITY_QUEUES.values())
+
+# tasks a job runs per turn before it gives way to jobs waiting in its own or a higher
+# class (it is requeued at the tail and goes on from its checkpoint); 0 disables slicing
+PRELABEL_SLICE_TASKS = max(0, int(os.getenv("PRELABEL_SLICE_TASKS", "50")))
+# "project=weight,..." : a project's turns are weight times PRELABEL_SLICE_TASKS tasks long
+PRELABEL_PROJECT_WEIGHTS = os.getenv("PRELABEL_PROJECT_WEIGHTS", "")
+
+# throughput of the workers, read by the orchestrator to estimate when a queued job starts
+STATS = "prelabel_stats"
+# weight of the latest turn in the moving average of seconds per task
+STATS_SMOOTHING = 0.3
+
+
+def _parse_weights(raw: str) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    for item in raw.split(","):
+        name, sep, value = item.rpartition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            weights[name.strip()] = max(0.0, float(value))
+        except ValueError:
+            continue
+    return weights
+
+
+_weights = _parse_weights(PRELABEL_PROJECT_WEIGHTS)
+
+
+def slice_tasks(project_name: str) -> int:
+    """Length of one turn of the project's jobs in tasks; 0 means the job never gives way."""
+    if not PRELABEL_SLICE_TASKS:
+        return 0
+    return max(1, round(PRELABEL_SLICE_TASKS * _weights.get(project_name, 1.0)))
+
+
+def jobs_waiting(client: redis.Redis, priority: str) -> bool:
+    """Whether a job waits in the given class or a higher one."""
+    queues = QUEUES[: QUEUES.index(PRIORITY_QUEUES[priority]) + 1]
+    pipe = client.pipeline(transaction=False)
+    for queue in queues:
+        pipe.llen(queue)
+    return any(pipe.execute())
+
+
+def record_throughput(client: redis.Redis, tasks: int, wall_seconds: float) -> None:
+    """Folds one turn into the moving average of wall seconds per finished task."""
+    if tasks <= 0:
+        return
+    seconds = wall_seconds / tasks
+    previous = client.hget(STATS, "task_seconds")
+    if previous is not None:
+        seconds = STATS_SMOOTHING * seconds + (1 - STATS_SMOOTHING) * float(previous)
+    client.hset(
+        STATS,
+        mapping={
+            "task_seconds": str(round(seconds, 3)),
+            "slice_tasks": str(PRELABEL_SLICE_TASKS),
+            "updated_at": str(time.time()),
+        },
+    )
@@ -0,0 +1,105 @@
+# worker/infrastructure/telemetry.py
+from __future__ import annotations
+
+import os
+import time
+from typing import Dict, List, Optional
+
+import redis
+
+# buffered log lines and status fields are written at most this often...
+TELEMETRY_FLUSH_SECONDS = float(os.getenv("TELEMETRY_FLUSH_SECONDS", "1.0"))
+# ...or as soon as this many lines are buffered
+TELEMETRY_MAX_BUFFERED = int(os.getenv("TELEMETRY_MAX_BUFFERED", "50"))
+# newest lines kept per job; older ones are trimmed (log readers see them as dropped)
+JOB_LOG_MAX_LINES = int(os.getenv("JOB_LOG_MAX_LINES", "2000"))
+# status, logs and result of a finished job expire after this long
+JOB_STATE_TTL_SECONDS = int(os.getenv("JOB_STATE_TTL_SECONDS", "604800"))
+
+PROGRESS_PREFIX = "[PROGRESS]"
+
+
+def append_logs(pipe, status_key: str, logs_key: str, lines: List[str]) -> None:
+    """
+    Queues lines on a pipeline. log_count in the status hash counts every line
+    ever written, so readers can address lines by position although old ones are trimmed.
+    """
+    if not lines:
+        return
+    pipe.rpush(logs_key, *lines)
+    pipe.hincrby(status_key, "log_count", len(lines))
+    pipe.ltrim(logs_key, -JOB_LOG_MAX_LINES, -1)
+
+
+class TelemetryWriter:
+    """
+    Buffers a running job's log lines and status fields and writes them in one
+    pipelined round-trip per flush (every TELEMETRY_FLUSH_SECONDS or
+    TELEMETRY_MAX_BUFFERED lines). Repeated status fields are coalesced (the
+    last value wins), consecutive [PROGRESS] lines within a flush too. The
+    job's state is read back in the same round-trip, so cancel checks cost no
+    extra command.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        status_key: str,
+        logs_key: str,
+        flush_seconds: float = TELEMETRY_FLUSH_SECONDS,
+        max_buffered: int = TELEMETRY_MAX_BUFFERED,
+    ) -> None:
+        self._r = client
+        self._status_key = status_key
+        self._logs_key = logs_key
+        self._flush_seconds = flush_seconds
+        self._max_buffered = max_buffered
+        self._lines: List[str] = []
+        self._status: Dict[str, str] = {}
+        self._state: Optional[str] = None
+        self._flushed_at = float("-inf")
+
+    def log(self, line: str) -> None:
+        if (
+            line.startswith(PROGRESS_PREFIX)
+            and self._lines
+            and self._lines[-1].startswith(PROGRESS_PREFIX)
+        ):
+            self._lines[-1] = line
+        else:
+            self._lines.append(line)
+        self._maybe_flush()
+
+    def status(self, **fields: str) -> None:
+        self._status.update(fields)
+        self._maybe_flush()
+
+    def state(self) -> Optional[str]:
+        """The job's state as of the last flush; flushes first if that is too old."""
+        self._maybe_flush()
+        return self._state
+
+    def _maybe_flush(self) -> None:
+        if (
+            len(self._lines) >= self._max_buffered
+            or time.monotonic() - self._flushed_at >= self._flush_seconds
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        pipe = self._r.pipeline()
+        append_logs(pipe, self._status_key, self._logs_key, self._lines)
+        if self._status:
+            pipe.hset(self._status_key, mapping=self._status)
+        pipe.hget(self._status_key, "state")
+        self._state = pipe.execute()[-1]
+        self._lines, self._status = [], {}
+        self._flushed_at = time.monotonic()
+
+
+def expire_job(client: redis.Redis, *keys: str) -> None:
+    """Lets a finished job's keys expire after JOB_STATE_TTL_SECONDS."""
+    pipe = client.pipeline()
+    for key in keys:
+        pipe.expire(key, JOB_STATE_TTL_SECONDS)
+    pipe.execute()
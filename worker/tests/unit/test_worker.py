@@ -1,4 +1,5 @@
 # worker/tests/unit/test_worker.py
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -38,6 +39,16 @@ def test_job_payload_valid(valid_payload):
     assert job.questions_and_labels.questions == ["Q1"]
 
 
+def test_job_payload_defaults_to_per_question_mode(valid_job):
+    assert valid_job.extraction_mode == "per_question"
+
+
+def test_job_payload_unknown_extraction_mode_raises(valid_payload):
+    valid_payload["extraction_mode"] = "all_at_once"
+    with pytest.raises(ValidationError):
+        JobPayload.model_validate(valid_payload)
+
+
 def test_job_payload_missing_token_raises(valid_payload):
     del valid_payload["token"]
     with pytest.raises(ValidationError):
@@ -76,6 +87,23 @@ def test_handle_job_sets_running_and_succeeded(valid_job):
     assert any("SUCCEEDED" in c for c in calls)
 
 
+def test_resumed_job_clears_its_cancel_in_ml_backend(valid_job):
+    import app as worker_app
+
+    mock_r = MagicMock()
+    mock_r.hget.return_value = "RUNNING"
+
+    with (
+        patch.object(worker_app, "r", mock_r),
+        patch.object(worker_app, "clear_job_cancel") as clear,
+        patch("app.prelabel_project", return_value=[]),
+    ):
+        worker_app.handle_job(valid_job.model_copy(update={"resume": True}))
+        worker_app.handle_job(valid_job)
+
+    clear.assert_called_once_with(job_id="123")
+
+
 def test_handle_job_sets_failed_on_exception(valid_job):
     import app as worker_app
 
@@ -151,3 +179,1119 @@ def test_resolve_project_id_returns_id():
     with patch("infrastructure.label_studio.requests.get", return_value=mock_response):
         project_id = resolve_project_id("good_token", "my_project")
     assert project_id == 42
+
+
+# --- predict_batch client ---
+
+
+def _response(status_code, body):
+    resp = MagicMock(status_code=status_code)
+    resp.json.return_value = body
+    return resp
+
+
+def test_open_predict_batch_sends_shared_config_once(valid_job):
+    import infrastructure.ml_backend as ml
+
+    tasks = [
+        {"id": 1, "filename": "a.html", "html": "<p>a</p>"},
+        {"id": 2, "filename": "b.html", "html": "<p>b</p>"},
+    ]
+    body = {"batch_id": "b1", "job_id": "123", "submitted": 2, "pending": 2}
+    with patch(
+        "infrastructure.ml_backend.requests.request", return_value=_response(202, body)
+    ) as req:
+        assert ml.open_predict_batch(tasks=tasks, job=valid_job) == body
+
+    method, url = req.call_args.args
+    sent = req.call_args.kwargs["json"]
+    assert (method, url) == ("POST", f"{ml.ML_BASE}/predict_batch")
+    assert [t["task_id"] for t in sent["tasks"]] == ["1", "2"]
+    assert sent["llm_config"]["ollama_model"] == valid_job.model
+    assert sent["llm_config"]["use_llm_cache"] is True
+    # queuing never waits for a prediction
+    assert req.call_args.kwargs["timeout"] == ml.BATCH_HTTP_TIMEOUT
+
+
+def test_batch_config_carries_the_job_modes(valid_payload):
+    import infrastructure.ml_backend as ml
+
+    job = JobPayload.model_validate(
+        {
+            **valid_payload,
+            "extraction_mode": "multi_question",
+            "model_digest": "sha256:abc",
+            "use_llm_cache": False,
+            "context_mode": "retrieval",
+            "retrieval_top_k": 3,
+        }
+    )
+    with patch.object(ml, "LLM_MAX_CONCURRENCY", 2), patch.object(ml, "LLM_KEEP_ALIVE", "1h"):
+        config = ml._llm_config(job)
+
+    assert (config["extraction_mode"], config["model_digest"]) == ("multi_question", "sha256:abc")
+    assert (config["context_mode"], config["retrieval_top_k"]) == ("retrieval", 3)
+    assert (config["use_llm_cache"], config["max_concurrency"]) == (False, 2)
+    # every call renews how long Ollama keeps the model loaded
+    assert config["keep_alive"] == "1h"
+
+
+def test_fetch_predict_batch_results_waits_longer_than_the_long_poll():
+    import infrastructure.ml_backend as ml
+
+    body = {"batch_id": "b1", "job_id": "123", "submitted": 1, "pending": 0, "cursor": 1}
+    with patch(
+        "infrastructure.ml_backend.requests.request", return_value=_response(200, body)
+    ) as req:
+        ml.fetch_predict_batch_results(batch_id="b1", after=0, wait=10)
+
+    assert req.call_args.kwargs["params"] == {"after": 0, "wait": 10}
+    assert req.call_args.kwargs["timeout"] > 10
+
+
+def test_expired_predict_batch_raises_not_found():
+    import infrastructure.ml_backend as ml
+
+    with patch("infrastructure.ml_backend.requests.request", return_value=_response(404, {})):
+        with pytest.raises(NotFound):
+            ml.fetch_predict_batch_results(batch_id="gone", after=0)
+
+
+# --- model warm-up ---
+
+
+def test_preload_model_loads_without_prompt_and_applies_keep_alive():
+    import infrastructure.ollama as ollama
+
+    with (
+        patch.object(ollama, "LLM_KEEP_ALIVE", -1),
+        patch("infrastructure.ollama.requests.post", return_value=_response(200, {})) as post,
+    ):
+        load_ms = ollama.preload_model("llama3.1:8b")
+
+    assert load_ms >= 0
+    assert post.call_args.args[0] == f"{ollama.OLLAMA_BASE}/api/generate"
+    assert post.call_args.kwargs["json"] == {
+        "model": "llama3.1:8b",
+        "keep_alive": -1,
+        "stream": False,
+    }
+
+
+def test_preload_missing_model_raises():
+    import infrastructure.ollama as ollama
+
+    with patch("infrastructure.ollama.requests.post", return_value=_response(404, {})):
+        with pytest.raises(ExternalServiceError) as exc:
+            ollama.preload_model("nope")
+    assert exc.value.code == "OLLAMA_MODEL_MISSING"
+
+
+def test_keep_alive_accepts_durations_and_seconds():
+    from infrastructure.ollama import _keep_alive
+
+    assert _keep_alive("30m") == "30m"
+    assert _keep_alive("-1") == -1
+
+
+class FakeBatchClient:
+    """ml_backend's /predict_batch: finishes up to `per_read` queued tasks per result read."""
+
+    def __init__(self, per_read=1, failing=(), unacknowledged=(), idle_reads=0):
+        self.per_read = per_read
+        self.idle_reads = idle_reads
+        self.failing = set(failing)
+        self.unacknowledged = set(unacknowledged)
+        self.queued = []
+        self.finished = []
+        self.max_in_flight = 0
+        self.closed = False
+        self.events = []
+
+    def _queue(self, tasks):
+        self.queued += [str(t["id"]) for t in tasks]
+        self.max_in_flight = max(self.max_in_flight, len(self.queued))
+
+    def open(self, *, tasks, job):
+        self.events.append("open")
+        self._queue(tasks)
+        return {"batch_id": "b1"}
+
+    def add(self, *, batch_id, tasks):
+        self._queue(tasks)
+        return {}
+
+    def fetch(self, *, batch_id, after, wait):
+        if self.idle_reads:
+            # long poll ended without a finished task
+            self.idle_reads -= 1
+            return {"cursor": len(self.finished), "results": []}
+        # finish the most recent first: results come in completion order
+        done, self.queued = self.queued[-self.per_read :], self.queued[: -self.per_read]
+        for task_id in done:
+            if task_id in self.failing:
+                self.finished.append({"task_id": task_id, "status_code": 502, "response": None})
+            else:
+                prediction_id = None if task_id in self.unacknowledged else 100 + int(task_id)
+                response = {"meta": {"task": task_id}, "prediction_id": prediction_id}
+                self.finished.append({"task_id": task_id, "status_code": 200, "response": response})
+        return {"cursor": len(self.finished), "results": self.finished[after:]}
+
+    def close(self, *, batch_id):
+        self.closed = True
+        return {}
+
+
+def iter_list(items):
+    yield from items
+
+
+@pytest.fixture
+def run_tasks():
+    import domain.prelabel_project as prelabel
+
+    def _run(job, tasks, batch, in_label_studio=None, checkpointed=None, send_meta=None, **kwargs):
+        with (
+            patch.object(prelabel, "resolve_project_id", return_value=1),
+            patch.object(
+                prelabel,
+                "get_task_ids_without_predictions",
+                return_value=[t["id"] for t in tasks],
+            ),
+            patch.object(
+                prelabel,
+                "iter_tasks",
+                side_effect=lambda ids, token: iter_list([t for t in tasks if t["id"] in ids]),
+            ),
+            patch.object(prelabel, "open_predict_batch", side_effect=batch.open),
+            patch.object(prelabel, "add_predict_batch_tasks", side_effect=batch.add),
+            patch.object(prelabel, "fetch_predict_batch_results", side_effect=batch.fetch),
+            patch.object(prelabel, "close_predict_batch", side_effect=batch.close),
+            patch.object(prelabel, "send_task_meta", side_effect=send_meta) as send_task_meta,
+            patch.object(
+                prelabel, "get_task_ids_with_predictions", return_value=in_label_studio or set()
+            ) as verify,
+            patch.object(prelabel, "send_model_load") as send_model_load,
+            patch.object(
+                prelabel, "get_checkpointed_task_ids", return_value=set(checkpointed or ())
+            ),
+        ):
+            if "preload_model" not in kwargs:
+                kwargs["preload_model"] = MagicMock(return_value=10.0)
+            with patch.object(prelabel, "preload_model", kwargs.pop("preload_model")):
+                logs = prelabel.prelabel_project(job, **kwargs)
+        _run.verify = verify
+        return logs, send_task_meta, send_model_load
+
+    return _run
+
+
+def _tasks(n):
+    return [{"id": i, "data": {"html": "<p>x</p>", "name": f"{i}.html"}} for i in range(1, n + 1)]
+
+
+def test_model_is_loaded_before_the_first_task_and_reported(valid_job, run_tasks):
+    batch = FakeBatchClient()
+    preload = MagicMock(side_effect=lambda m: batch.events.append("load") or 1500.0)
+
+    logs, _, send_model_load = run_tasks(valid_job, _tasks(1), batch, preload_model=preload)
+
+    assert batch.events == ["load", "open"]
+    assert any(line.startswith("[TIME] Model 'llama3.1:8b' loaded in 1.5s") for line in logs)
+    assert send_model_load.call_args.kwargs["load_ms"] == 1500.0
+
+
+def test_failed_preload_does_not_stop_the_job(valid_job, run_tasks):
+    error = ExternalServiceError(code="OLLAMA_UNAVAILABLE", message="down")
+
+    logs, _, send_model_load = run_tasks(
+        valid_job, _tasks(1), FakeBatchClient(), preload_model=MagicMock(side_effect=error)
+    )
+
+    assert any("[WARN] Could not preload model" in line for line in logs)
+    assert any(line.startswith("[TIME] Task 1 finished") for line in logs)
+    send_model_load.assert_not_called()
+
+
+# --- pipelined prelabelling ---
+
+
+def test_window_keeps_max_in_flight_tasks_queued(valid_job, run_tasks):
+    import domain.prelabel_project as prelabel
+
+    batch = FakeBatchClient(per_read=2)
+    with patch.object(prelabel, "PRELABEL_MAX_IN_FLIGHT", 3):
+        logs, send_task_meta, _ = run_tasks(valid_job, _tasks(10), batch)
+
+    assert batch.max_in_flight == 3
+    assert sorted(int(r["task_id"]) for r in batch.finished) == list(range(1, 11))
+    assert sorted(c.kwargs["task_id"] for c in send_task_meta.call_args_list) == list(range(1, 11))
+    assert batch.closed
+
+
+def test_reads_without_finished_tasks_do_not_grow_the_window(valid_job, run_tasks):
+    import domain.prelabel_project as prelabel
+
+    batch = FakeBatchClient(idle_reads=2)
+    with patch.object(prelabel, "PRELABEL_MAX_IN_FLIGHT", 2):
+        run_tasks(valid_job, _tasks(6), batch)
+
+    assert batch.max_in_flight == 2
+    assert len(batch.finished) == 6
+
+
+def test_progress_is_ordered_while_tasks_finish_out_of_order(valid_job, run_tasks):
+    import domain.prelabel_project as prelabel
+
+    progress = []
+    batch = FakeBatchClient(per_read=2)
+    with patch.object(prelabel, "PRELABEL_MAX_IN_FLIGHT", 4):
+        logs, _, _ = run_tasks(valid_job, _tasks(5), batch, progress_cb=progress.append)
+
+    finished = [line.split()[2] for line in logs if line.startswith("[TIME] Task")]
+    assert finished != sorted(finished)
+    assert progress == [0, 20, 40, 60, 80, 100]
+    summary = next(line for line in logs if line.startswith("[SUMMARY]"))
+    assert summary.startswith("[SUMMARY] Processed: 5 tasks")
+    assert "In flight: 4" in summary
+
+
+def test_failed_task_is_logged_and_the_rest_go_on(valid_job, run_tasks):
+    logs, send_task_meta, _ = run_tasks(valid_job, _tasks(3), FakeBatchClient(failing={"2"}))
+
+    assert "[WARN] /predict returned 502 for task 2. Continuing." in logs
+    assert sorted(c.kwargs["task_id"] for c in send_task_meta.call_args_list) == [1, 3]
+
+
+def test_meta_redis_did_not_take_is_sent_again_after_the_last_task(valid_job, run_tasks):
+    refused = []
+
+    def send_meta(*, task_id, meta, job):
+        if task_id == 2 and not refused:
+            refused.append(task_id)
+            raise ExternalServiceError(code="EVENT_BUS_UNAVAILABLE", message="down")
+
+    logs, send_task_meta, _ = run_tasks(
+        valid_job, _tasks(3), FakeBatchClient(), send_meta=send_meta
+    )
+
+    assert "[WARN] Could not record the meta of task 2 (EVENT_BUS_UNAVAILABLE)." in logs
+    assert any(line.startswith("[TIME] Task 3 finished") for line in logs)
+    assert [c.kwargs["task_id"] for c in send_task_meta.call_args_list][-1] == 2
+    assert "[INFO] Recorded 1 metas on the second try." in logs
+
+
+def test_meta_that_still_fails_is_logged_and_the_job_ends(valid_job, run_tasks):
+    down = ExternalServiceError(code="EVENT_BUS_UNAVAILABLE", message="down")
+
+    logs, _, _ = run_tasks(valid_job, _tasks(2), FakeBatchClient(), send_meta=down)
+
+    assert "[ERROR] Metas of tasks [1, 2] are lost; their predictions are saved." in logs
+    assert any(line.startswith("[SUMMARY] Processed: 2 tasks") for line in logs)
+
+
+def test_tasks_without_html_are_skipped_and_counted(valid_job, run_tasks):
+    tasks = _tasks(2) + [{"id": 3, "data": {"name": "3.html"}}]
+    progress = []
+
+    logs, _, _ = run_tasks(valid_job, tasks, FakeBatchClient(), progress_cb=progress.append)
+
+    assert "[WARN] Task 3 has no HTML. Skipping." in logs
+    assert progress[-1] == 100
+
+
+def test_cancel_stops_reading_and_drops_queued_tasks(valid_job, run_tasks):
+    import domain.prelabel_project as prelabel
+
+    batch = FakeBatchClient()
+    with patch.object(prelabel, "PRELABEL_MAX_IN_FLIGHT", 2):
+        logs, send_task_meta, _ = run_tasks(
+            valid_job, _tasks(5), batch, cancel_cb=lambda: len(batch.finished) >= 2
+        )
+
+    assert "[INFO] Cancel observed. Stopping." in logs
+    assert send_task_meta.call_count == 2
+    assert batch.closed
+    # nothing new is queued once the cancel is seen
+    assert len(batch.finished) + len(batch.queued) == 3
+
+
+# --- checkpoints ---
+
+
+def test_checkpointed_tasks_are_skipped_and_counted_as_done(valid_job, run_tasks):
+    progress = []
+    batch = FakeBatchClient()
+
+    # task 2 finished before the restart; Label Studio may not show its prediction
+    logs, send_task_meta, _ = run_tasks(
+        valid_job, _tasks(4), batch, checkpointed={2, 9}, progress_cb=progress.append
+    )
+
+    assert "[INFO] Resuming: 2 tasks already done by this run." in logs
+    assert sorted(c.kwargs["task_id"] for c in send_task_meta.call_args_list) == [1, 3, 4]
+    assert progress[0] == 40 and progress[-1] == 100
+
+
+def test_unreadable_checkpoint_does_not_stop_the_job(valid_job, run_tasks):
+    import domain.prelabel_project as prelabel
+
+    error = ExternalServiceError(code="ORCHESTRATOR_UNAVAILABLE", message="down")
+    with patch.object(prelabel, "get_checkpointed_task_ids", side_effect=error):
+        batch = FakeBatchClient()
+        with (
+            patch.object(prelabel, "resolve_project_id", return_value=1),
+            patch.object(prelabel, "get_task_ids_without_predictions", return_value=[1]),
+            patch.object(
+                prelabel, "iter_tasks", side_effect=lambda ids, token: iter_list(_tasks(1))
+            ),
+            patch.object(prelabel, "open_predict_batch", side_effect=batch.open),
+            patch.object(prelabel, "fetch_predict_batch_results", side_effect=batch.fetch),
+            patch.object(prelabel, "close_predict_batch", side_effect=batch.close),
+            patch.object(prelabel, "send_task_meta"),
+            patch.object(prelabel, "send_model_load"),
+            patch.object(prelabel, "preload_model", return_value=1.0),
+        ):
+            logs = prelabel.prelabel_project(valid_job)
+
+    assert any("Could not read the run's checkpoint" in line for line in logs)
+    assert len(batch.finished) == 1
+
+
+# --- save acknowledgement ---
+
+
+def test_acknowledged_predictions_are_trusted(valid_job, run_tasks):
+    logs, _, _ = run_tasks(valid_job, _tasks(2), FakeBatchClient())
+
+    assert any(line.endswith("(ok, prediction 101).") for line in logs)
+    run_tasks.verify.assert_not_called()
+
+
+def test_unacknowledged_predictions_are_checked_once_after_the_last_task(valid_job, run_tasks):
+    batch = FakeBatchClient(unacknowledged={"2", "3"})
+
+    logs, _, _ = run_tasks(valid_job, _tasks(3), batch, in_label_studio={1, 2})
+
+    run_tasks.verify.assert_called_once()
+    assert "[WARN] 1 of 2 predictions are missing in Label Studio: tasks [3]." in logs
+
+
+def test_verify_saved_checks_every_prediction(valid_job, run_tasks):
+    import domain.prelabel_project as prelabel
+
+    with patch.object(prelabel, "PRELABEL_VERIFY_SAVED", True):
+        logs, _, _ = run_tasks(valid_job, _tasks(2), FakeBatchClient(), in_label_studio={1, 2})
+
+    assert "[INFO] Verified 2 predictions in Label Studio." in logs
+
+
+def test_task_ids_with_predictions_are_read_page_by_page():
+    import infrastructure.label_studio as ls
+
+    pages = [
+        {
+            "results": [{"id": 1, "predictions": [{"id": 9}]}, {"id": 2, "predictions": []}],
+            "next": "p2",
+        },
+        {"results": [{"id": 3, "predictions": [{"id": 8}]}], "next": None},
+    ]
+    responses = [_response(200, page) for page in pages]
+    with patch("infrastructure.label_studio.requests.get", side_effect=responses) as get:
+        assert ls.get_task_ids_with_predictions(5, "t") == {1, 3}
+
+    assert get.call_count == 2
+    assert get.call_args.kwargs["params"]["fields"] == "id,total_predictions"
+
+
+# --- task enumeration ---
+
+
+def test_open_task_ids_are_listed_without_documents():
+    import infrastructure.label_studio as ls
+
+    page = {
+        "results": [{"id": 1, "total_predictions": 0}, {"id": 2, "total_predictions": 1}],
+        "next": None,
+    }
+    with patch(
+        "infrastructure.label_studio.requests.get", return_value=_response(200, page)
+    ) as get:
+        assert ls.get_task_ids_without_predictions(5, "t") == [1]
+
+    assert "data" not in get.call_args.kwargs["params"]["fields"]
+
+
+def test_documents_are_fetched_in_order_with_bounded_prefetch():
+    import threading
+
+    import infrastructure.label_studio as ls
+
+    fetched = []
+    lock = threading.Lock()
+
+    def fake_fetch(task_id, token):
+        with lock:
+            fetched.append(task_id)
+        return {"id": task_id, "data": {"html": f"<p>{task_id}</p>"}}
+
+    with patch.object(ls, "_fetch_task", side_effect=fake_fetch):
+        tasks = ls.iter_tasks(range(1, 1000), "t", prefetch=3)
+        first = next(tasks)
+        assert first["id"] == 1
+        assert len(fetched) <= 4  # 3 ahead plus the one queued after the first was taken
+        rest = [t["id"] for t, _ in zip(tasks, range(9), strict=False)]
+        tasks.close()
+
+    assert rest == list(range(2, 11))
+    assert len(fetched) <= 14
+
+
+def test_task_deleted_after_listing_comes_back_without_html():
+    import infrastructure.label_studio as ls
+
+    with patch("infrastructure.label_studio.requests.get", return_value=_response(404, {})):
+        assert ls._fetch_task(7, "t") == {"id": 7, "data": {}}
+
+
+# --- reliable queue ---
+
+
+class FakeRedis:
+    """The list, set, hash and key commands of the queue and telemetry; expiry is only recorded."""
+
+    def __init__(self):
+        self.lists = {}
+        self.sets = {}
+        self.keys = {}
+        self.hashes = {}
+        self.ttls = {}
+        self.round_trips = 0
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def blmove(self, src, dst, timeout, wherefrom, whereto):
+        return self.lmove(src, dst, wherefrom, whereto)
+
+    def lmove(self, src, dst, wherefrom, whereto):
+        items = self.lists.get(src) or []
+        if not items:
+            return None
+        raw = items.pop(0 if wherefrom == "LEFT" else -1)
+        target = self.lists.setdefault(dst, [])
+        target.insert(0 if whereto == "LEFT" else len(target), raw)
+        return raw
+
+    def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def lindex(self, key, index):
+        items = self.lists.get(key, [])
+        return items[index] if -len(items) <= index < len(items) else None
+
+    def ltrim(self, key, start, end):
+        items = self.lists.get(key, [])
+        self.lists[key] = items[max(len(items) + start, 0) :]
+
+    def lrem(self, key, count, raw):
+        self.lists.get(key, []).remove(raw)
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    def srem(self, key, member):
+        self.sets.get(key, set()).discard(member)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def set(self, key, value, ex=None):
+        self.keys[key] = value
+
+    def exists(self, key):
+        return key in self.keys
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hincrby(self, key, field, amount=1):
+        h = self.hashes.setdefault(key, {})
+        h[field] = str(int(h.get(field, 0)) + amount)
+        return int(h[field])
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    def xadd(self, key, fields):
+        entries = self.lists.setdefault(key, [])
+        entries.append(dict(fields))
+        return f"{len(entries)}-0"
+
+
+class FakePipeline:
+    """
+    Queues commands and runs them against the FakeRedis in one round-trip;
+    between watch() and multi() commands run at once, like redis-py's.
+    """
+
+    def __init__(self, fake):
+        self._fake = fake
+        self._calls = []
+        self._immediate = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def watch(self, *keys):
+        self._immediate = True
+
+    def multi(self):
+        self._immediate = False
+
+    def unwatch(self):
+        self._immediate = False
+
+    def __getattr__(self, name):
+        if self._immediate:
+            return getattr(self._fake, name)
+        return lambda *args, **kwargs: self._calls.append((name, args, kwargs))
+
+    def execute(self):
+        self._fake.round_trips += 1
+        calls, self._calls = self._calls, []
+        return [getattr(self._fake, n)(*a, **kw) for n, a, kw in calls]
+
+
+def test_taken_job_stays_in_processing_until_acked():
+    from infrastructure.job_queue import ReliableQueue
+
+    fake = FakeRedis()
+    fake.rpush("prelabel_jobs", "job-a")
+    queue = ReliableQueue(fake, ["prelabel_jobs"], "w1")
+
+    assert queue.take() == "job-a"
+    assert fake.lists[queue.processing_key] == ["job-a"]
+    queue.ack("job-a")
+    assert fake.lists[queue.processing_key] == []
+
+
+def test_jobs_of_a_dead_worker_go_back_to_the_head_of_the_queue():
+    from infrastructure.job_queue import HEARTBEAT, ReliableQueue
+
+    fake = FakeRedis()
+    fake.rpush("prelabel_jobs", "job-a")
+    fake.rpush("prelabel_jobs", "job-b")
+    dead = ReliableQueue(fake, ["prelabel_jobs"], "w1")
+    alive = ReliableQueue(fake, ["prelabel_jobs"], "w2")
+    dead.register()
+    alive.register()
+    dead.take()
+
+    assert alive.reap() == []  # w1 still beats
+    del fake.keys[f"{HEARTBEAT}w1"]
+    assert alive.reap() == ["job-a"]
+    assert fake.lists["prelabel_jobs"] == ["job-a", "job-b"]
+    assert "w1" not in fake.smembers("prelabel_workers")
+    assert alive.reap() == []  # moved exactly once
+
+
+def test_worker_that_missed_a_beat_is_announced_again_and_keeps_its_jobs():
+    from infrastructure.job_queue import HEARTBEAT, ReliableQueue
+
+    fake = FakeRedis()
+    fake.rpush("prelabel_jobs", "job-a", "job-b")
+    slow = ReliableQueue(fake, ["prelabel_jobs"], "w1")
+    alive = ReliableQueue(fake, ["prelabel_jobs"], "w2")
+    slow.register()
+    slow.take()
+    slow.take()
+
+    # w1 beats again while its jobs are being requeued: it keeps the rest
+    del fake.keys[f"{HEARTBEAT}w1"]
+    lmove = fake.lmove
+
+    def lmove_then_beat(*args):
+        raw = lmove(*args)
+        slow.heartbeat()
+        return raw
+
+    fake.lmove = lmove_then_beat
+    assert alive.reap() == ["job-b"]
+    assert fake.lists[slow.processing_key] == ["job-a"]
+    assert "w1" in fake.smembers("prelabel_workers")
+
+    # and is still reaped once it really dies
+    fake.lmove = lmove
+    del fake.keys[f"{HEARTBEAT}w1"]
+    assert alive.reap() == ["job-a"]
+
+
+def test_restarted_worker_requeues_its_own_unfinished_job():
+    from infrastructure.job_queue import ReliableQueue
+
+    fake = FakeRedis()
+    fake.rpush("prelabel_jobs", "job-a")
+    ReliableQueue(fake, ["prelabel_jobs"], "w1").take()
+
+    assert ReliableQueue(fake, ["prelabel_jobs"], "w1").register() == ["job-a"]
+    assert fake.lists["prelabel_jobs"] == ["job-a"]
+
+
+def test_jobs_of_a_dead_worker_go_back_to_the_head_of_their_class():
+    import json
+
+    from infrastructure.job_queue import ReliableQueue
+    from infrastructure.scheduling import QUEUES
+
+    fake = FakeRedis()
+    bulk = json.dumps({"job_id": "1", "priority": "bulk"})
+    interactive = json.dumps({"job_id": "2", "priority": "interactive"})
+    fake.rpush("prelabel_jobs", "bulk-waiting")
+    fake.rpush("prelabel_jobs:interactive", "eval-waiting")
+    # w1 took both jobs before it restarted
+    fake.rpush(ReliableQueue(fake, QUEUES, "w1").processing_key, bulk, interactive)
+
+    assert ReliableQueue(fake, QUEUES, "w1").register() == [interactive, bulk]
+    assert fake.lists["prelabel_jobs:interactive"] == [interactive, "eval-waiting"]
+    assert fake.lists["prelabel_jobs"] == [bulk, "bulk-waiting"]
+
+
+def test_interactive_jobs_are_taken_before_bulk_jobs():
+    from infrastructure.job_queue import ReliableQueue
+    from infrastructure.scheduling import QUEUES
+
+    fake = FakeRedis()
+    fake.rpush("prelabel_jobs", "bulk-a")
+    fake.rpush("prelabel_jobs:interactive", "eval-a")
+    queue = ReliableQueue(fake, QUEUES, "w1")
+
+    assert [queue.take(), queue.take()] == ["eval-a", "bulk-a"]
+    assert queue.take(timeout=0) is None
+
+
+def test_process_job_runs_and_acks(valid_payload):
+    import json
+
+    import app as worker_app
+
+    queue = MagicMock(worker_id="w1")
+    mock_r = MagicMock()
+    mock_r.hincrby.return_value = 1
+    mock_r.hget.return_value = "PENDING"
+    raw = json.dumps(valid_payload)
+
+    with (
+        patch.object(worker_app, "r", mock_r),
+        patch.object(worker_app, "handle_job") as handle_job,
+    ):
+        worker_app.process_job(queue, raw)
+
+    handle_job.assert_called_once()
+    mock_r.hset.assert_any_call("status:123", mapping={"worker": "w1"})
+    queue.ack.assert_called_once_with(raw)
+
+
+def test_job_interrupted_too_often_is_failed(valid_payload):
+    import json
+
+    import app as worker_app
+
+    queue = MagicMock(worker_id="w1")
+    mock_r = MagicMock()
+    mock_r.hincrby.return_value = worker_app.PRELABEL_MAX_ATTEMPTS + 1
+
+    with (
+        patch.object(worker_app, "r", mock_r),
+        patch.object(worker_app, "handle_job") as handle_job,
+        patch.object(worker_app, "_send_callback") as callback,
+    ):
+        worker_app.process_job(queue, json.dumps(valid_payload))
+
+    handle_job.assert_not_called()
+    assert callback.call_args.args[:2] == ("123", "failed")
+    queue.ack.assert_called_once()
+
+
+def test_invalid_payload_is_dropped_from_processing():
+    import app as worker_app
+
+    queue = MagicMock(worker_id="w1")
+    worker_app.process_job(queue, "not json")
+
+    queue.ack.assert_called_once_with("not json")
+
+
+# --- fair-share scheduling ---
+
+
+def test_job_gives_way_after_its_slice_and_reports_failures_of_the_drain(valid_job, run_tasks):
+    import domain.prelabel_project as prelabel
+
+    asked = []
+
+    def give_way(failed):
+        asked.append(failed)
+        return True
+
+    batch = FakeBatchClient(failing={"1"})
+    with patch.object(prelabel, "PRELABEL_MAX_IN_FLIGHT", 2):
+        logs, send_task_meta, _ = run_tasks(
+            valid_job, _tasks(6), batch, slice_tasks=2, yield_cb=give_way
+        )
+
+    assert "[INFO] Giving way to waiting jobs after 2 tasks." in logs
+    # the tasks in flight finish, nothing new is queued
+    assert sorted(int(r["task_id"]) for r in batch.finished) == [1, 2, 3, 4]
+    assert send_task_meta.call_count == 3
+    assert asked == [[1]]
+
+
+def test_job_runs_on_while_no_job_waits(valid_job, run_tasks):
+    batch = FakeBatchClient()
+    run_tasks(valid_job, _tasks(6), batch, slice_tasks=2, yield_cb=lambda failed: False)
+
+    assert len(batch.finished) == 6
+
+
+def test_tasks_failed_in_an_earlier_turn_are_not_retried(valid_job, run_tasks):
+    progress = []
+    batch = FakeBatchClient()
+    job = valid_job.model_copy(update={"skip_task_ids": [1, 3]})
+
+    logs, send_task_meta, _ = run_tasks(
+        job, _tasks(4), batch, checkpointed={2}, progress_cb=progress.append
+    )
+
+    assert "[INFO] Not retrying 2 tasks that failed in an earlier turn." in logs
+    assert [c.kwargs["task_id"] for c in send_task_meta.call_args_list] == [4]
+    assert progress[0] == 75
+
+
+def test_handle_job_requeues_a_job_that_gave_way(valid_job):
+    import app as worker_app
+
+    mock_r = MagicMock()
+    mock_r.hget.return_value = "RUNNING"
+
+    def fake_prelabel(job, yield_cb, **kwargs):
+        assert kwargs["slice_tasks"] == 50
+        yield_cb([5])
+        return []
+
+    give_way = MagicMock(return_value=True)
+    with (
+        patch.object(worker_app, "r", mock_r),
+        patch.object(worker_app, "jobs_waiting", return_value=True),
+        patch.object(worker_app, "_send_callback") as callback,
+        patch("app.prelabel_project", side_effect=fake_prelabel),
+    ):
+        worker_app.handle_job(valid_job, give_way=give_way)
+
+    give_way.assert_called_once_with([5])
+    callback.assert_not_called()
+    assert not any("SUCCEEDED" in str(c) for c in mock_r.hset.call_args_list)
+
+
+def test_requeued_turn_goes_to_the_tail_of_its_class(valid_job):
+    import json
+
+    import app as worker_app
+    from infrastructure.job_queue import ReliableQueue
+    from infrastructure.scheduling import QUEUES
+
+    fake = FakeRedis()
+    raw = valid_job.model_dump_json()
+    fake.rpush("prelabel_jobs", raw, "other")
+    fake.hset("status:123", mapping={"state": "RUNNING", "attempts": "1"})
+    queue = ReliableQueue(fake, QUEUES, "w1")
+    queue.take()
+
+    with patch.object(worker_app, "r", fake):
+        assert worker_app._requeue_turn(queue, raw, valid_job, [5]) is True
+
+    assert fake.lists[queue.processing_key] == []
+    assert fake.lists["prelabel_jobs"][0] == "other"
+    assert json.loads(fake.lists["prelabel_jobs"][1])["skip_task_ids"] == [5]
+    assert fake.hgetall("status:123") == {"state": "PENDING", "attempts": "0"}
+
+    fake.hset("status:123", mapping={"state": "CANCEL_REQUESTED"})
+    with patch.object(worker_app, "r", fake):
+        assert worker_app._requeue_turn(queue, raw, valid_job, []) is False
+
+
+def test_project_weights_scale_the_slice():
+    import infrastructure.scheduling as scheduling
+
+    weights = scheduling._parse_weights("notes=2, trials=0.5,broken,x=abc")
+    assert weights == {"notes": 2.0, "trials": 0.5}
+    with (
+        patch.object(scheduling, "_weights", weights),
+        patch.object(scheduling, "PRELABEL_SLICE_TASKS", 40),
+    ):
+        assert [scheduling.slice_tasks(p) for p in ("notes", "trials", "other")] == [80, 20, 40]
+
+
+def test_throughput_is_a_moving_average_per_task():
+    from infrastructure.scheduling import STATS, record_throughput
+
+    fake = FakeRedis()
+    record_throughput(fake, 10, 20.0)
+    record_throughput(fake, 10, 40.0)
+
+    assert fake.hget(STATS, "task_seconds") == "2.6"
+
+
+# --- telemetry ---
+
+
+def test_telemetry_is_flushed_in_one_round_trip_with_progress_coalesced():
+    from infrastructure.telemetry import TelemetryWriter
+
+    fake = FakeRedis()
+    fake.hset("status:1", mapping={"state": "RUNNING"})
+    writer = TelemetryWriter(fake, "status:1", "logs:1", flush_seconds=60, max_buffered=10)
+    writer.flush()
+    fake.round_trips = 0
+
+    for i in range(1, 4):
+        writer.log(f"[TIME] Task {i}")
+        writer.log(f"[PROGRESS] {i}/3")
+        writer.status(progress=str(i * 33))
+    writer.log("[PROGRESS] 3/3")
+    assert writer.state() == "RUNNING"
+    assert fake.round_trips == 0
+
+    writer.flush()
+    assert fake.round_trips == 1
+    assert fake.lists["logs:1"] == [
+        "[TIME] Task 1",
+        "[PROGRESS] 1/3",
+        "[TIME] Task 2",
+        "[PROGRESS] 2/3",
+        "[TIME] Task 3",
+        "[PROGRESS] 3/3",
+    ]
+    assert fake.hashes["status:1"]["progress"] == "99"
+    assert fake.hashes["status:1"]["log_count"] == "6"
+
+
+def test_telemetry_flushes_when_the_buffer_is_full_and_sees_cancel():
+    from infrastructure.telemetry import TelemetryWriter
+
+    fake = FakeRedis()
+    writer = TelemetryWriter(fake, "status:1", "logs:1", flush_seconds=60, max_buffered=2)
+    writer.flush()
+
+    fake.hset("status:1", mapping={"state": "CANCEL_REQUESTED"})
+    writer.log("[TIME] Task 1")
+    assert writer.state() is None  # not flushed yet
+    writer.log("[TIME] Task 2")
+    assert writer.state() == "CANCEL_REQUESTED"
+    assert fake.lists["logs:1"] == ["[TIME] Task 1", "[TIME] Task 2"]
+
+
+def test_logs_are_capped_but_counted(monkeypatch):
+    from infrastructure import telemetry
+
+    monkeypatch.setattr(telemetry, "JOB_LOG_MAX_LINES", 3)
+    fake = FakeRedis()
+    writer = telemetry.TelemetryWriter(fake, "status:1", "logs:1", max_buffered=100)
+    for i in range(5):
+        writer.log(f"[INFO] line {i}")
+    writer.flush()
+
+    assert fake.lists["logs:1"] == ["[INFO] line 2", "[INFO] line 3", "[INFO] line 4"]
+    assert fake.hashes["status:1"]["log_count"] == "5"
+
+
+def test_finished_job_keys_expire(valid_job):
+    import app as worker_app
+    from infrastructure.telemetry import JOB_STATE_TTL_SECONDS
+
+    fake = FakeRedis()
+    with (
+        patch.object(worker_app, "r", fake),
+        patch.object(worker_app, "_send_callback"),
+        patch("app.prelabel_project", return_value=["log1"]),
+    ):
+        worker_app.handle_job(valid_job)
+
+    assert fake.hashes["status:123"]["state"] == "SUCCEEDED"
+    assert fake.ttls == {
+        "status:123": JOB_STATE_TTL_SECONDS,
+        "logs:123": JOB_STATE_TTL_SECONDS,
+        "result:123": JOB_STATE_TTL_SECONDS,
+    }
+
+
+# --- pushed cancellation ---
+
+
+class FakePubSub:
+    """Delivers the given messages, then nothing."""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.channels = []
+
+    def subscribe(self, channel):
+        self.channels.append(channel)
+
+    def get_message(self, timeout):
+        if self.messages:
+            return self.messages.pop(0)
+        time.sleep(0.01)
+        return None
+
+    def close(self):
+        pass
+
+
+def test_pushed_cancel_sets_the_running_job_event_once():
+    from infrastructure.cancellation import CANCEL_CHANNEL, CancelListener
+
+    pubsub = FakePubSub(
+        [
+            {"type": "message", "data": "other-job"},
+            {"type": "message", "data": "123"},
+            {"type": "message", "data": "123"},
+        ]
+    )
+    client = MagicMock()
+    client.pubsub.return_value = pubsub
+    forwarded = []
+    listener = CancelListener(client, on_cancel=forwarded.append)
+    event = listener.watch("123")
+
+    stop = listener.start()
+    assert event.wait(5)
+    while pubsub.messages:
+        time.sleep(0.01)
+    stop.set()
+
+    assert pubsub.channels == [CANCEL_CHANNEL]
+    assert forwarded == ["123"]
+
+
+def test_cancel_seen_in_the_status_hash_is_forwarded(valid_job):
+    import app as worker_app
+
+    mock_r = MagicMock()
+    mock_r.pipeline.return_value.execute.return_value = ["CANCEL_REQUESTED"]
+    mock_r.hget.return_value = "CANCEL_REQUESTED"
+    seen = []
+
+    def fake_prelabel(job, cancel_cb, **kwargs):
+        seen.append(cancel_cb())
+        seen.append(cancel_cb())
+        return []
+
+    listener = worker_app.CancelListener(mock_r, on_cancel=worker_app._forward_cancel)
+    with (
+        patch.object(worker_app, "r", mock_r),
+        patch.object(worker_app, "cancel_listener", listener),
+        patch.object(worker_app, "cancel_job_predictions", return_value=2) as forward,
+        patch.object(worker_app, "_send_callback"),
+        patch("app.prelabel_project", side_effect=fake_prelabel),
+    ):
+        worker_app.handle_job(valid_job)
+
+    assert seen == [True, True]
+    forward.assert_called_once_with(job_id="123")
+    assert any("2 LLM calls aborted" in str(c) for c in mock_r.pipeline.return_value.mock_calls)
+
+
+def test_cancel_is_forwarded_to_ml_backend():
+    from infrastructure.ml_backend import cancel_job_predictions
+
+    with patch(
+        "infrastructure.ml_backend.requests.request",
+        return_value=_response(200, {"job_id": "123", "aborted": 3}),
+    ) as request:
+        assert cancel_job_predictions(job_id="123") == 3
+
+    assert request.call_args.args == ("POST", "http://ml_backend:6789/cancel/123")
+
+
+# --- event stream ---
+
+
+def test_task_meta_is_published_to_the_event_stream(valid_job):
+    import json
+
+    import infrastructure.events as events
+    from infrastructure.orchestrator import send_task_meta
+
+    fake = FakeRedis()
+    with patch.object(events, "events_client", fake):
+        send_task_meta(task_id=7, meta={"filename": "a.html", "n_llm_calls": 2}, job=valid_job)
+
+    [entry] = fake.lists[events.EVENTS_STREAM]
+    assert entry["type"] == "task_meta"
+    data = json.loads(entry["data"])
+    assert (data["job_id"], data["task_id"], data["filename"], data["n_llm_calls"]) == (
+        "123",
+        7,
+        "a.html",
+        2,
+    )
+
+
+def test_job_outcome_is_published_after_the_task_metas(valid_job):
+    import json
+
+    import app as worker_app
+    import infrastructure.events as events
+
+    fake = FakeRedis()
+
+    def fake_prelabel(job, **kwargs):
+        events.publish_event("task_meta", {"job_id": job.job_id, "task_id": 1})
+        return []
+
+    with (
+        patch.object(worker_app, "r", fake),
+        patch.object(events, "events_client", fake),
+        patch("app.prelabel_project", side_effect=fake_prelabel),
+    ):
+        worker_app.handle_job(valid_job)
+
+    entries = fake.lists[events.EVENTS_STREAM]
+    assert [e["type"] for e in entries] == ["task_meta", "job_status"]
+    assert json.loads(entries[1]["data"]) == {"job_id": "123", "status": "done", "error": None}
+
+
+def test_unpublishable_event_is_retried_then_raised(monkeypatch):
+    import infrastructure.events as events
+    import redis
+
+    monkeypatch.setattr(events, "EVENTS_PUBLISH_RETRY_DELAY_SECONDS", 0)
+    client = MagicMock()
+    client.xadd.side_effect = redis.ConnectionError("down")
+
+    with pytest.raises(ExternalServiceError) as exc:
+        events.publish_event("task_meta", {"job_id": "1"}, client)
+
+    assert exc.value.code == "EVENT_BUS_UNAVAILABLE"
+    assert client.xadd.call_count == events.EVENTS_PUBLISH_RETRIES
+
+
+def test_unpublished_model_load_does_not_stop_the_job(valid_job):
+    import infrastructure.orchestrator as orchestrator
+
+    error = ExternalServiceError(code="EVENT_BUS_UNAVAILABLE", message="down")
+    with patch.object(orchestrator, "publish_event", side_effect=error):
+        orchestrator.send_model_load(load_ms=5.0, job=valid_job)